@@ -0,0 +1,168 @@
+"""
+Component micro-benchmarks - one function per measured component
+"""
+import random
+import statistics
+import string
+import time
+
+from benchmarks.fixtures import build_fixtures, QUICK_LENGTHS
+
+PLAYLIST_SIZES = (1_000, 100_000, 1_000_000)
+
+
+def timed(fn, repeat: int = 5, number: int = 1) -> dict:
+    """Run fn `number` times per sample, `repeat` samples. Seconds per call."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - started) / number)
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "max": max(samples),
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+def _result(name: str, params: dict, stats: dict) -> dict:
+    return {"name": name, "params": params, "stats": stats}
+
+
+def bench_waveform(fixtures: list, repeat: int = 3) -> list:
+    from utils.waveform import compute_waveform
+    results = []
+    for fx in fixtures:
+        if fx["art"]:
+            continue  # Same audio as the plain fixture
+        stats = timed(lambda: compute_waveform(fx["path"]), repeat=repeat)
+        results.append(_result("compute_waveform", _fixture_params(fx), stats))
+    return results
+
+
+def bench_metadata(fixtures: list, repeat: int = 5) -> list:
+    from utils.metadata import get_track_metadata
+    return [
+        _result("get_track_metadata", _fixture_params(fx),
+                timed(lambda: get_track_metadata(fx["path"]), repeat=repeat))
+        for fx in fixtures
+    ]
+
+
+def bench_album_art(fixtures: list, repeat: int = 5) -> list:
+    from utils.metadata import extract_album_art
+    return [
+        _result("extract_album_art", _fixture_params(fx),
+                timed(lambda: extract_album_art(fx["path"]), repeat=repeat))
+        for fx in fixtures
+    ]
+
+
+def bench_sanitize_filename(count: int = 10_000) -> list:
+    from utils.youtube import sanitize_filename
+    rng = random.Random(0)
+    alphabet = string.ascii_letters + string.digits + '  <>:"/\\|?*-_()[]'
+    titles = ["".join(rng.choice(alphabet) for _ in range(rng.randint(10, 160)))
+              for _ in range(count)]
+
+    def run():
+        for t in titles:
+            sanitize_filename(t)
+
+    stats = timed(run, repeat=5)
+    stats = {k: (v / count if isinstance(v, float) else v) for k, v in stats.items()}
+    return [_result("sanitize_filename", {"titles": count}, stats)]
+
+
+def bench_playlist(sizes=PLAYLIST_SIZES) -> list:
+    from core.playlist import Playlist
+    results = []
+
+    for size in sizes:
+        paths = [f"/music/artist_{i % 997}/album_{i % 97}/track_{i:07d}.mp3" for i in range(size)]
+        repeat = 3 if size >= 1_000_000 else 5
+        params = {"tracks": size}
+
+        def build():
+            pl = Playlist()
+            pl.add_multiple(paths)
+            return pl
+
+        results.append(_result("playlist.add_multiple", params, timed(build, repeat=repeat)))
+        pl = build()
+
+        results.append(_result("playlist.get_display_names", params,
+                               timed(pl.get_display_names, repeat=repeat)))
+
+        def step():
+            for _ in range(1000):
+                pl.next()
+        stats = timed(step, repeat=repeat)
+        results.append(_result("playlist.next", params,
+                               {k: (v / 1000 if isinstance(v, float) else v) for k, v in stats.items()}))
+
+        def remove_middle():
+            pl.remove(len(pl) // 2)
+            pl.tracks.insert(len(pl) // 2, paths[0])
+        results.append(_result("playlist.remove_middle", params,
+                               timed(remove_middle, repeat=repeat, number=10)))
+
+        def clear_and_refill():
+            pl.clear()
+            pl.add_multiple(paths)
+        results.append(_result("playlist.clear_refill", params,
+                               timed(clear_and_refill, repeat=repeat)))
+
+        # Type-to-filter: index build, then one query per keystroke
+        results.append(_result("playlist.filter_index", params,
+                               timed(lambda: (pl.clear(), pl.add_multiple(paths), pl.search("tr")),
+                                     repeat=1 if size >= 1_000_000 else 3)))
+        query = "artist_12 track_00"
+
+        def type_query():
+            for end in range(2, len(query) + 1):
+                pl.search(query[:end])
+        stats = timed(type_query, repeat=repeat)
+        results.append(_result("playlist.filter_keystroke", params,
+                               {k: (v / (len(query) - 1) if isinstance(v, float) else v)
+                                for k, v in stats.items()}))
+
+    return results
+
+
+def bench_equalizer() -> list:
+    from benchmarks.bench_equalizer import measure
+    r = measure("Rock", blocks=500)
+    return [_result("equalizer.process", {"preset": "Rock"},
+                    {"mean": r["mean_ms"] / 1000, "p99": r["p99_ms"] / 1000,
+                     "cpu_load": r["cpu_load"]})]
+
+
+def _fixture_params(fx: dict) -> dict:
+    return {"format": fx["format"], "seconds": fx["seconds"],
+            "kind": fx["kind"], "art": fx["art"]}
+
+
+def run_all(fixture_dir: str, lengths=QUICK_LENGTHS, playlist_sizes=PLAYLIST_SIZES,
+            only: set = None) -> list:
+    """Run every component benchmark (or the names in `only`)."""
+    fixtures = build_fixtures(fixture_dir, lengths)
+    suites = {
+        "waveform": lambda: bench_waveform(fixtures),
+        "metadata": lambda: bench_metadata(fixtures),
+        "album_art": lambda: bench_album_art(fixtures),
+        "sanitize": bench_sanitize_filename,
+        "playlist": lambda: bench_playlist(playlist_sizes),
+        "equalizer": bench_equalizer,
+    }
+    results = []
+    for name, suite in suites.items():
+        if only and name not in only:
+            continue
+        print(f"  {name}...", flush=True)
+        results.extend(suite())
+    return results
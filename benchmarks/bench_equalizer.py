@@ -0,0 +1,59 @@
+"""
+Equalizer CPU budget - per-block cost at 48 kHz stereo
+
+Run: python -m benchmarks.bench_equalizer
+Exits non-zero if the EQ needs more than 5% of one core in real time.
+"""
+import sys
+import time
+import numpy as np
+
+from core.equalizer import Equalizer
+from config.settings import AUDIO_BLOCK_FRAMES, EQ_PRESETS
+
+SAMPLE_RATE = 48000
+CHANNELS = 2
+BLOCKS = 2000
+CPU_BUDGET = 0.05
+
+
+def measure(preset: str, blocks: int = BLOCKS) -> dict:
+    """Time `blocks` consecutive EQ blocks for one preset."""
+    eq = Equalizer(SAMPLE_RATE, AUDIO_BLOCK_FRAMES)
+    eq.set_preset(preset)
+
+    rng = np.random.default_rng(0)
+    block = (rng.standard_normal((AUDIO_BLOCK_FRAMES, CHANNELS)) * 0.1).astype(np.float32)
+    eq.process(block)  # Absorb the initial crossfade
+
+    times = np.empty(blocks)
+    for i in range(blocks):
+        started = time.perf_counter()
+        eq.process(block)
+        times[i] = time.perf_counter() - started
+
+    block_seconds = AUDIO_BLOCK_FRAMES / SAMPLE_RATE
+    return {
+        "preset": preset,
+        "mean_ms": times.mean() * 1000,
+        "p99_ms": np.percentile(times, 99) * 1000,
+        "cpu_load": times.mean() / block_seconds,
+    }
+
+
+def main() -> int:
+    worst = 0.0
+    print(f"{'preset':<14}{'mean ms':>10}{'p99 ms':>10}{'cpu %':>8}")
+    for preset in EQ_PRESETS:
+        r = measure(preset)
+        worst = max(worst, r["cpu_load"])
+        print(f"{preset:<14}{r['mean_ms']:>10.3f}{r['p99_ms']:>10.3f}{r['cpu_load'] * 100:>8.2f}")
+
+    ok = worst < CPU_BUDGET
+    print(f"\nWorst case {worst * 100:.2f}% of one core (budget {CPU_BUDGET * 100:.0f}%)"
+          f" - {'OK' if ok else 'OVER BUDGET'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
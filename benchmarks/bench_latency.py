@@ -0,0 +1,233 @@
+"""
+End-to-end latency benchmark - drives MusicPlayerApp headlessly
+
+Run: python -m benchmarks.bench_latency [--out latency.json]
+
+Measures, per scripted action, the time until first sound, title, album
+art and waveform are on screen, and reports p50/p95/p99. Needs an X
+display; when DISPLAY is unset and Xvfb is installed one is started.
+Audio goes to the null output, paced like a real sound card.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import time
+import types
+
+os.environ.setdefault("CASANOVA_AUDIO_OUTPUT", "null")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from benchmarks.fixtures import build_fixtures, DEFAULT_DIR
+from utils.latency import MILESTONES
+
+MILESTONE_TIMEOUT = 15.0
+
+
+def percentile(values: list, pct: float) -> float:
+    """Linear-interpolated percentile of a non-empty list."""
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(samples: dict) -> dict:
+    """{milestone: [seconds]} -> {milestone: {p50, p95, p99, count}} in ms."""
+    out = {}
+    for name, values in samples.items():
+        if not values:
+            continue
+        out[name] = {
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "count": len(values),
+        }
+    return out
+
+
+def ensure_display():
+    """Start Xvfb if there is no display. Returns the process or None."""
+    if os.environ.get("DISPLAY") or sys.platform == "win32":
+        return None
+    xvfb = shutil.which("Xvfb")
+    if not xvfb:
+        raise RuntimeError("No DISPLAY and Xvfb not found - run under xvfb-run")
+    display = ":97"
+    proc = subprocess.Popen([xvfb, display, "-screen", "0", "1280x800x24"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.environ["DISPLAY"] = display
+    time.sleep(1.0)
+    return proc
+
+
+class Script:
+    """
+    Runs a generator inside the Tk main loop.
+    The generator yields either a delay in ms or a predicate to wait for
+    (polled every 2 ms, gives up after MILESTONE_TIMEOUT).
+    """
+
+    def __init__(self, app, gen):
+        self.app = app
+        self.gen = gen
+
+    def start(self):
+        self.app.after(100, self._step)
+
+    def _step(self, value=None):
+        try:
+            cmd = self.gen.send(value)
+        except StopIteration:
+            self.app.quit()
+            return
+        if callable(cmd):
+            self._wait(cmd, time.perf_counter() + MILESTONE_TIMEOUT)
+        else:
+            self.app.after(int(cmd), self._step)
+
+    def _wait(self, predicate, deadline):
+        if predicate():
+            self._step(True)
+        elif time.perf_counter() > deadline:
+            self._step(False)
+        else:
+            self.app.after(2, self._wait, predicate, deadline)
+
+
+def _record(samples: dict, reached: dict):
+    for name in MILESTONES:
+        if name in reached:
+            samples.setdefault(name, []).append(reached[name])
+
+
+def scenario_next(app, results, rounds):
+    """Click next and wait for every milestone."""
+    samples = {}
+    for _ in range(rounds):
+        app.next_track()
+        yield app.latency.is_complete
+        _record(samples, app.latency.reached)
+        yield 200
+    results["next"] = summarize(samples)
+
+
+def scenario_next_spam(app, results, rounds, burst=10, gap_ms=30):
+    """Mash next `burst` times, then time the final track's milestones."""
+    samples = {}
+    settle = []
+    for _ in range(rounds):
+        first_click = time.perf_counter()
+        for _ in range(burst):
+            app.next_track()
+            yield gap_ms
+        yield app.latency.is_complete
+        _record(samples, app.latency.reached)
+        settle.append(time.perf_counter() - first_click)
+        yield 300
+    samples["settle_after_burst"] = settle
+    results["next_spam"] = summarize(samples)
+
+
+def scenario_folder_load(app, results, rounds):
+    """Clear, load the fixture folder, start playing."""
+    samples = {"folder_load": []}
+    for _ in range(rounds):
+        app.clear_playlist()
+        yield 50
+        started = time.perf_counter()
+        app.load_default_folder()
+        samples["folder_load"].append(time.perf_counter() - started)
+        app.play_pause_toggle()
+        yield app.latency.is_complete
+        _record(samples, app.latency.reached)
+        yield 200
+    results["folder_load"] = summarize(samples)
+
+
+def scenario_seek_storm(app, results, seeks=60, gap_ms=20):
+    """Random relative seeks in quick succession while playing."""
+    from config.settings import SEEK_STEP
+    rng = random.Random(0)
+    samples = {"seek": []}
+    if not app.player.is_playing:
+        app.play_pause_toggle()
+        yield 300
+    for _ in range(seeks):
+        started = time.perf_counter()
+        app.seek_relative(rng.choice((-SEEK_STEP, SEEK_STEP)))
+        samples["seek"].append(time.perf_counter() - started)
+        yield gap_ms
+    results["seek_storm"] = summarize(samples)
+
+
+def run(fixture_dir: str, rounds: int) -> dict:
+    fixtures = build_fixtures(fixture_dir, lengths=(60,))
+    folder = os.path.join(fixture_dir, "library")
+    os.makedirs(folder, exist_ok=True)
+    for fx in fixtures:
+        target = os.path.join(folder, os.path.basename(fx["path"]))
+        if not os.path.exists(target):
+            shutil.copyfile(fx["path"], target)
+
+    import customtkinter as ctk
+    import ui.app as app_module
+    from config.settings import APPEARANCE_MODE, COLOR_THEME
+
+    # Script the folder, keep the user's session untouched, silence modal dialogs
+    app_module.DEFAULT_PLAYLIST_FOLDER = folder
+    app_module.SESSION_FILE = os.path.join(fixture_dir, "session.json")
+    quiet = lambda *a, **k: None
+    app_module.messagebox = types.SimpleNamespace(
+        showinfo=quiet, showerror=quiet, showwarning=quiet)
+
+    ctk.set_appearance_mode(APPEARANCE_MODE)
+    ctk.set_default_color_theme(COLOR_THEME)
+    app = app_module.MusicPlayerApp()
+
+    results = {}
+
+    def script():
+        yield from scenario_folder_load(app, results, rounds)
+        yield from scenario_next(app, results, rounds)
+        yield from scenario_next_spam(app, results, max(3, rounds // 4))
+        yield from scenario_seek_storm(app, results)
+
+    Script(app, script()).start()
+    app.mainloop()
+    app.destroy()
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="End-to-end latency benchmark")
+    parser.add_argument("--out", default="bench_results_latency.json")
+    parser.add_argument("--fixtures", default=DEFAULT_DIR)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    xvfb = ensure_display()
+    try:
+        results = run(args.fixtures, args.rounds)
+    finally:
+        if xvfb:
+            xvfb.terminate()
+
+    for scenario, milestones in results.items():
+        print(f"\n{scenario}")
+        for name, s in milestones.items():
+            print(f"  {name:<20} p50 {s['p50_ms']:8.1f}ms  p95 {s['p95_ms']:8.1f}ms  "
+                  f"p99 {s['p99_ms']:8.1f}ms  (n={s['count']})")
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}, f, indent=2)
+    print(f"\nWrote {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
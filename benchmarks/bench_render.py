@@ -0,0 +1,61 @@
+"""
+Headless render throughput - decode + DSP speed with no sound device
+
+Run: python -m benchmarks.bench_render path/to/track.mp3 [--preset Rock]
+Streams the track through the full playback pipeline into a null sink
+(as fast as possible) and reports speed relative to real time.
+"""
+import argparse
+import sys
+import time
+
+from core.output import NullOutput, WavFileOutput
+from core.player import AudioPlayer
+from config.settings import EQ_PRESETS
+
+
+def render(filepath: str, preset: str = "Flat", wav_path: str = None) -> dict:
+    """Render one track through the pipeline and time it."""
+    if wav_path:
+        output = WavFileOutput(wav_path, realtime=False)
+    else:
+        output = NullOutput(realtime=False)
+
+    player = AudioPlayer(output)
+    player.equalizer.set_preset(preset)
+    player.load(filepath, 0)
+
+    started = time.perf_counter()
+    if not player.play():
+        raise RuntimeError(f"Could not decode {filepath}")
+    while not player.is_track_ended():
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - started
+    output.close()
+
+    audio_seconds = output.frames_written / output.sample_rate
+    return {
+        "file": filepath,
+        "preset": preset,
+        "audio_seconds": audio_seconds,
+        "wall_seconds": elapsed,
+        "speed_x_realtime": audio_seconds / elapsed if elapsed else 0.0,
+        "eq_cpu_load": player.equalizer.cpu_load,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("file")
+    parser.add_argument("--preset", default="Flat", choices=list(EQ_PRESETS))
+    parser.add_argument("--wav", help="Also write the rendered audio to this WAV file")
+    args = parser.parse_args()
+
+    r = render(args.file, args.preset, args.wav)
+    print(f"{r['audio_seconds']:.1f}s of audio in {r['wall_seconds']:.2f}s "
+          f"({r['speed_x_realtime']:.1f}x real time, EQ load {r['eq_cpu_load'] * 100:.2f}%)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""
+Deterministic synthetic audio fixtures for benchmarks
+
+WAV files are generated directly with NumPy (streamed in chunks so a 3 h
+fixture never sits in memory). MP3/FLAC/OGG are encoded from the WAV with
+ffmpeg when it is available and skipped otherwise.
+"""
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import wave
+import numpy as np
+
+from utils.paths import find_ffmpeg
+
+SAMPLE_RATE = 44100
+CHANNELS = 2
+CHUNK_SECONDS = 30
+
+DEFAULT_DIR = os.path.join(tempfile.gettempdir(), "casanova_bench_fixtures")
+QUICK_LENGTHS = (10, 60, 600)
+FULL_LENGTHS = (10, 60, 600, 3600, 10800)  # 10 s .. 3 h
+ENCODED_FORMATS = {
+    "mp3": ["-c:a", "libmp3lame", "-b:a", "192k"],
+    "flac": ["-c:a", "flac"],
+    "ogg": ["-c:a", "libvorbis", "-q:a", "5"],
+}
+
+
+def ffmpeg_available() -> bool:
+    """True if an ffmpeg binary can be found."""
+    ffmpeg = find_ffmpeg()
+    return os.path.exists(ffmpeg) or shutil.which(ffmpeg) is not None
+
+
+def make_wav(path: str, seconds: int, kind: str = "sine", seed: int = 0):
+    """
+    Write a deterministic 16-bit stereo WAV.
+    kind: 'sine' (440 Hz with a slow amplitude envelope) or 'noise'.
+    """
+    rng = np.random.default_rng(seed)
+    total = seconds * SAMPLE_RATE
+    chunk = CHUNK_SECONDS * SAMPLE_RATE
+
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(CHANNELS)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+
+        for start in range(0, total, chunk):
+            n = min(chunk, total - start)
+            t = (np.arange(n) + start) / SAMPLE_RATE
+            if kind == "noise":
+                mono = rng.standard_normal(n) * 0.2
+            else:
+                envelope = 0.3 + 0.25 * np.sin(2 * np.pi * 0.1 * t)
+                mono = np.sin(2 * np.pi * 440 * t) * envelope
+            frames = np.repeat((mono * 32767).astype(np.int16)[:, None], CHANNELS, axis=1)
+            wav.writeframes(frames.tobytes())
+
+
+def make_cover(size: int = 500) -> bytes:
+    """Deterministic JPEG cover art."""
+    from PIL import Image
+
+    x = np.linspace(0, 255, size, dtype=np.uint8)
+    rgb = np.stack(np.broadcast_arrays(x[None, :], x[:, None], x[::-1][None, :]), axis=-1)
+    out = io.BytesIO()
+    Image.fromarray(rgb, "RGB").save(out, format="JPEG", quality=85)
+    return out.getvalue()
+
+
+def encode(src_wav: str, dest: str, fmt: str) -> bool:
+    """Encode a WAV fixture with ffmpeg. Returns False if it failed."""
+    cmd = [find_ffmpeg(), "-nostdin", "-v", "error", "-y", "-i", src_wav]
+    cmd += ENCODED_FORMATS[fmt] + [dest]
+    try:
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return True
+    except (OSError, subprocess.CalledProcessError):
+        return False
+
+
+def embed_art(path: str, fmt: str, cover: bytes):
+    """Embed front cover art with mutagen."""
+    if fmt == "mp3":
+        from mutagen.id3 import ID3, APIC, ID3NoHeaderError
+        try:
+            tags = ID3(path)
+        except ID3NoHeaderError:
+            tags = ID3()
+        tags.add(APIC(encoding=3, mime="image/jpeg", type=3, desc="Cover", data=cover))
+        tags.save(path)
+        return
+
+    from mutagen.flac import Picture
+    pic = Picture()
+    pic.type = 3
+    pic.mime = "image/jpeg"
+    pic.data = cover
+
+    if fmt == "flac":
+        from mutagen.flac import FLAC
+        audio = FLAC(path)
+        audio.add_picture(pic)
+        audio.save()
+    elif fmt == "ogg":
+        import base64
+        from mutagen.oggvorbis import OggVorbis
+        audio = OggVorbis(path)
+        audio["metadata_block_picture"] = [base64.b64encode(pic.write()).decode("ascii")]
+        audio.save()
+
+
+def build_fixtures(root: str = DEFAULT_DIR, lengths=QUICK_LENGTHS,
+                   formats=("wav", "mp3", "flac", "ogg"), kinds=("sine", "noise")) -> list:
+    """
+    Create (or reuse) fixtures and describe them.
+    Returns list of dicts: path, format, seconds, kind, art.
+    """
+    os.makedirs(root, exist_ok=True)
+    can_encode = ffmpeg_available()
+    cover = None
+    fixtures = []
+
+    for seconds in lengths:
+        for kind in kinds:
+            wav_path = os.path.join(root, f"{kind}_{seconds}s.wav")
+            if not os.path.exists(wav_path):
+                make_wav(wav_path, seconds, kind, seed=seconds)
+            if "wav" in formats:
+                fixtures.append({"path": wav_path, "format": "wav",
+                                 "seconds": seconds, "kind": kind, "art": False})
+
+            if not can_encode:
+                continue
+            for fmt in formats:
+                if fmt == "wav":
+                    continue
+                plain = os.path.join(root, f"{kind}_{seconds}s.{fmt}")
+                if not os.path.exists(plain) and not encode(wav_path, plain, fmt):
+                    continue
+                fixtures.append({"path": plain, "format": fmt,
+                                 "seconds": seconds, "kind": kind, "art": False})
+
+                with_art = os.path.join(root, f"{kind}_{seconds}s_art.{fmt}")
+                if not os.path.exists(with_art):
+                    cover = cover or make_cover()
+                    shutil.copyfile(plain, with_art)
+                    embed_art(with_art, fmt, cover)
+                fixtures.append({"path": with_art, "format": fmt,
+                                 "seconds": seconds, "kind": kind, "art": True})
+
+    return fixtures
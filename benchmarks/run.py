@@ -0,0 +1,102 @@
+"""
+Benchmark runner - writes machine-readable JSON and compares runs
+
+Run:      python -m benchmarks.run --out results.json
+Full:     python -m benchmarks.run --full --out results.json   (fixtures up to 3 h)
+Compare:  python -m benchmarks.run --compare main.json branch.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from benchmarks.fixtures import DEFAULT_DIR, QUICK_LENGTHS, FULL_LENGTHS, ffmpeg_available
+from benchmarks.bench_components import run_all, PLAYLIST_SIZES
+
+SCHEMA_VERSION = 1
+REGRESSION_THRESHOLD = 0.10  # 10% slower median
+
+
+def _git_revision() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _key(result: dict) -> str:
+    params = ",".join(f"{k}={v}" for k, v in sorted(result["params"].items()))
+    return f"{result['name']}[{params}]"
+
+
+def compare(base_path: str, new_path: str, threshold: float = REGRESSION_THRESHOLD) -> int:
+    """Print per-benchmark deltas. Returns the number of regressions."""
+    with open(base_path, encoding="utf-8") as f:
+        base = {_key(r): r for r in json.load(f)["results"]}
+    with open(new_path, encoding="utf-8") as f:
+        new = {_key(r): r for r in json.load(f)["results"]}
+
+    regressions = 0
+    for key in sorted(base.keys() & new.keys()):
+        old_t = base[key]["stats"].get("median", base[key]["stats"].get("mean"))
+        new_t = new[key]["stats"].get("median", new[key]["stats"].get("mean"))
+        if not old_t:
+            continue
+        delta = (new_t - old_t) / old_t
+        flag = ""
+        if delta > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{key:<70} {old_t * 1000:>10.3f}ms -> {new_t * 1000:>10.3f}ms {delta:+7.1%}{flag}")
+
+    for key in sorted(new.keys() - base.keys()):
+        print(f"{key:<70} (new)")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Casanova Player benchmarks")
+    parser.add_argument("--out", default="bench_results.json", help="JSON output path")
+    parser.add_argument("--fixtures", default=DEFAULT_DIR, help="Fixture cache directory")
+    parser.add_argument("--full", action="store_true", help="Include 1 h and 3 h fixtures")
+    parser.add_argument("--lengths", type=int, nargs="+", help="Fixture lengths in seconds")
+    parser.add_argument("--playlist-sizes", type=int, nargs="+", default=list(PLAYLIST_SIZES))
+    parser.add_argument("--only", nargs="+", help="Suites to run (waveform, metadata, "
+                        "album_art, sanitize, playlist, equalizer)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"),
+                        help="Compare two result files instead of running")
+    args = parser.parse_args()
+
+    if args.compare:
+        return 1 if compare(*args.compare) else 0
+
+    lengths = args.lengths or (FULL_LENGTHS if args.full else QUICK_LENGTHS)
+    print(f"Running benchmarks (fixtures: {lengths}, ffmpeg: {ffmpeg_available()})")
+    started = time.time()
+    results = run_all(args.fixtures, lengths, args.playlist_sizes,
+                      set(args.only) if args.only else None)
+
+    report = {
+        "schema": SCHEMA_VERSION,
+        "revision": _git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started)),
+        "duration_seconds": round(time.time() - started, 2),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "ffmpeg": ffmpeg_available(),
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
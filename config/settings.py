@@ -37,10 +37,18 @@ SLIDER_BUTTON = "#e6edf3"
 WAVEFORM_WIDTH = 480
 WAVEFORM_HEIGHT = 100
 
+# Startup
+STARTUP_BUDGET_MS = 400  # First paint budget for --profile-startup
+
 # Playback settings
 SEEK_STEP = 5
 UPDATE_INTERVAL_MS = 250
+DISPATCH_INTERVAL_MS = 16   # Background updates are applied once per frame...
+DISPATCH_BUDGET_MS = 8      # ...for at most this long, the rest next frame
 DEFAULT_VOLUME = 0.7
+PREFETCH_AHEAD = 3                # Upcoming tracks whose details are prepared in advance
+PREFETCH_PAUSE_S = 0.25           # Breather between prefetched tracks
+TRACK_DETAIL_CACHE_ENTRIES = 32   # Tracks' title/art/waveform kept in memory
 
 # Icon sizes
 ICON_SIZE_CONTROL = (28, 28)
@@ -53,10 +61,20 @@ ALBUM_ART_SIZE = (120, 130)
 
 # Supported audio formats
 AUDIO_FILETYPES = [
-    ("Audio files", "*.mp3 *.wav *.flac *.ogg *.m4a *.aac"),
+    ("Audio files", "*.mp3 *.wav *.flac *.ogg *.opus *.m4a *.aac"),
     ("All files", "*.*")
 ]
 
+# Playlist import/export
+PLAYLIST_FILETYPES = [
+    ("Playlists", "*.m3u *.m3u8 *.pls *.xspf *.json"),
+    ("M3U playlist", "*.m3u8 *.m3u"),
+    ("PLS playlist", "*.pls"),
+    ("XSPF playlist", "*.xspf"),
+    ("JSON playlist", "*.json"),
+]
+PLAYLIST_IO_BATCH = 2000  # Tracks per batch handed to the playlist
+
 # Font settings
 FONT_FAMILY = "Segoe UI"
 FONT_SIZE_TITLE = 15
@@ -67,6 +85,84 @@ FONT_SIZE_SMALL = 11
 DEFAULT_PLAYLIST_FOLDER = os.path.join(os.path.expanduser("~"), "Music", "playlist")
 MUSIC_DOWNLOAD_FOLDER = DEFAULT_PLAYLIST_FOLDER  # Same as playlist folder
 MAX_SEARCH_RESULTS = 7  # (Thala for a reason)
+SEARCH_DEBOUNCE_MS = 350   # Search-as-you-type waits for a pause in typing
+SEARCH_MIN_CHARS = 3       # Shorter queries only search on Enter
+SEARCH_MAX_IN_FLIGHT = 2   # Concurrent searches; older queued ones are dropped
+SEARCH_MAX_TOTAL = 200     # "Load more" stops here; pages are MAX_SEARCH_RESULTS long
+
+# Playlist view
+PLAYLIST_ROW_HEIGHT = 24
+FILTER_RANK_LIMIT = 2000  # Broader filter results stay in playlist order
+
+# App data (session snapshot, caches)
+APP_DATA_DIR = os.path.join(
+    os.environ.get("APPDATA") or os.path.join(os.path.expanduser("~"), ".config"),
+    "CasanovaPlayer"
+)
+SESSION_FILE = os.path.join(APP_DATA_DIR, "session.json")
+SESSION_SAVE_DELAY_MS = 1000      # Coalesce bursts of changes into one write
+SESSION_POSITION_INTERVAL_S = 5   # How often the play position is snapshotted
+
+# YouTube search cache (stale entries are shown while refreshing, and offline)
+YT_SEARCH_CACHE_DIR = os.path.join(APP_DATA_DIR, "cache", "search")
+YT_SEARCH_CACHE_TTL_S = 60 * 60                  # Fresh for an hour
+YT_SEARCH_CACHE_MAX_AGE_S = 30 * 24 * 60 * 60    # Kept for offline use
+YTDL_POOL_IDLE = 2                               # Warm yt-dlp instances kept per kind
+
+# Search result thumbnails
+THUMBNAIL_CACHE_DIR = os.path.join(APP_DATA_DIR, "cache", "thumbnails")
+THUMBNAIL_WORKERS = 4
+THUMBNAIL_MEMORY_ENTRIES = 256
+THUMBNAIL_DISK_ENTRIES = 5000
+
+# Download queue (partial downloads are resumed after a restart)
+DOWNLOAD_QUEUE_FILE = os.path.join(APP_DATA_DIR, "downloads.json")
+DOWNLOAD_STAGING_DIR = os.path.join(APP_DATA_DIR, "cache", "downloads")
+DOWNLOAD_INDEX_FILE = os.path.join(APP_DATA_DIR, "download_index.json")  # Video ID -> local file
+DOWNLOAD_NETWORK_WORKERS = 3                                  # Parallel yt-dlp downloads
+DOWNLOAD_CONVERT_WORKERS = max(1, (os.cpu_count() or 2) // 2)  # Parallel ffmpeg encodes
+DOWNLOAD_AUDIO_FORMAT = "mp3"                                  # "mp3" re-encodes; "native" keeps YouTube's Opus/AAC (.opus/.m4a)
+PROGRESS_UPDATES_PER_S = 5                                     # Download progress reaching listeners/UI
+
+# Background analysis (tags + waveform of every playlist track, kept on disk)
+ANALYSIS_CACHE_DIR = os.path.join(APP_DATA_DIR, "cache", "analysis")
+ANALYSIS_WORKERS = 1             # Worker processes (tracks analyzed at once)
+ANALYSIS_MAX_CRASHES = 2         # A file that kills its worker this often is skipped
+ANALYSIS_UPCOMING = 25           # Upcoming tracks analyzed before the visible rows
+ANALYSIS_STALL_BACKOFF_S = 10    # Analysis stays paused this long after playback stutters
+ANALYSIS_POLL_S = 0.5            # How often a paused worker checks whether it may resume
 
 # Supported audio extensions
-AUDIO_EXTENSIONS = (".mp3", ".wav", ".flac", ".ogg", ".m4a", ".aac")
\ No newline at end of file
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".flac", ".ogg", ".opus", ".m4a", ".aac")
+
+# Audio output (PCM pipeline)
+AUDIO_SAMPLE_RATE = 48000
+AUDIO_CHANNELS = 2
+AUDIO_BLOCK_FRAMES = 2048  # ~43 ms per block at 48 kHz
+AUDIO_OUTPUT = os.environ.get("CASANOVA_AUDIO_OUTPUT", "pygame")  # pygame | null | wav
+
+# Equalizer - 10 peaking bands (Hz)
+EQ_BANDS = (31, 62, 125, 250, 500, 1000, 2000, 4000, 8000, 16000)
+EQ_Q = 1.41
+EQ_MAX_GAIN_DB = 12.0
+DEFAULT_EQ_PRESET = "Flat"
+EQ_PRESETS = {
+    "Flat":         (0, 0, 0, 0, 0, 0, 0, 0, 0, 0),
+    "Bass Boost":   (6, 5, 4, 2, 0, 0, 0, 0, 0, 0),
+    "Treble Boost": (0, 0, 0, 0, 0, 0, 2, 4, 5, 6),
+    "Vocal":        (-2, -2, -1, 1, 3, 4, 3, 1, 0, -1),
+    "Rock":         (4, 3, 2, 0, -1, -1, 1, 2, 3, 4),
+    "Pop":          (-1, 0, 2, 3, 4, 3, 1, 0, -1, -1),
+    "Electronic":   (5, 4, 1, 0, -2, 1, 0, 1, 4, 5),
+    "Acoustic":     (3, 3, 2, 1, 1, 1, 2, 2, 2, 1),
+}
+
+# Spectrum analyzer / VU meter
+SPECTRUM_BARS = 20
+SPECTRUM_FFT_SIZE = 2048
+SPECTRUM_FPS = 30
+SPECTRUM_FLOOR_DB = -70.0
+SPECTRUM_WIDTH = 150
+SPECTRUM_HEIGHT = 26
+SPECTRUM_COLOR = "#3fb950"
+VU_COLOR = "#58a6ff"
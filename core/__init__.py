@@ -1,2 +1,19 @@
-from .player import AudioPlayer
-from .playlist import Playlist
\ No newline at end of file
+"""
+Core playback components - submodules load on first attribute access
+"""
+import importlib
+
+_EXPORTS = {
+    "AudioPlayer": "player",
+    "Playlist": "playlist",
+    "SessionStore": "session",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f".{module}", __name__), name)
@@ -0,0 +1,225 @@
+"""
+10-band parametric equalizer - cascaded biquads processed in blocks
+"""
+import math
+import threading
+import time
+import numpy as np
+from config.settings import (
+    AUDIO_SAMPLE_RATE, AUDIO_BLOCK_FRAMES, EQ_BANDS, EQ_Q, EQ_MAX_GAIN_DB,
+    EQ_PRESETS, DEFAULT_EQ_PRESET
+)
+
+
+def peaking_biquad(freq: float, gain_db: float, q: float, sample_rate: int) -> tuple:
+    """
+    RBJ peaking filter coefficients.
+    Returns normalized (b0, b1, b2, a1, a2).
+    """
+    if gain_db == 0 or freq <= 0 or freq >= sample_rate / 2:
+        return 1.0, 0.0, 0.0, 0.0, 0.0
+
+    a = 10 ** (gain_db / 40)
+    w0 = 2 * math.pi * freq / sample_rate
+    alpha = math.sin(w0) / (2 * q)
+    cos_w0 = math.cos(w0)
+
+    a0 = 1 + alpha / a
+    return (
+        (1 + alpha * a) / a0,
+        (-2 * cos_w0) / a0,
+        (1 - alpha * a) / a0,
+        (-2 * cos_w0) / a0,
+        (1 - alpha / a) / a0,
+    )
+
+
+class _BlockKernel:
+    """
+    Exact block form of a biquad cascade.
+
+    The cascade is turned into one state-space system (A, B, C, D) and
+    unrolled over a fixed block of L frames, so a whole block is:
+        y  = h * x + O @ s      (FFT convolution + state response)
+        s' = Ctl @ x + A^L @ s  (state carried into the next block)
+    which is the same result as running the biquads sample by sample,
+    without a Python loop on the audio thread.
+    """
+
+    def __init__(self, sections: list, block_frames: int, preamp: float):
+        n = 2 * len(sections)
+        a_mat = np.zeros((n, n))
+        b_vec = np.zeros(n)
+        c_vec = np.zeros(n)
+        d = 1.0
+
+        # Series-compose DF2T sections: each one feeds the next
+        for k, (b0, b1, b2, a1, a2) in enumerate(sections):
+            i = 2 * k
+            ak = np.array([[-a1, 1.0], [-a2, 0.0]])
+            bk = np.array([b1 - a1 * b0, b2 - a2 * b0])
+            a_mat[i:i + 2, :i] = np.outer(bk, c_vec[:i])
+            a_mat[i:i + 2, i:i + 2] = ak
+            b_vec[i:i + 2] = bk * d
+            c_vec[:i] *= b0
+            c_vec[i] = 1.0
+            d *= b0
+
+        c_vec *= preamp
+        d *= preamp
+
+        length = block_frames
+        impulse = np.empty(length)
+        observe = np.empty((length, n))
+        control = np.empty((n, length))
+
+        row = c_vec.copy()        # C A^k
+        col = b_vec.copy()        # A^k B
+        impulse[0] = d
+        for k in range(length):
+            observe[k] = row
+            control[:, length - 1 - k] = col
+            if k + 1 < length:
+                impulse[k + 1] = row @ b_vec
+            row = row @ a_mat
+            col = a_mat @ col
+
+        self.block_frames = length
+        self.fft_size = 2 * length
+        self.freq_response = np.fft.rfft(impulse, self.fft_size)[:, None]
+        self.observe = observe
+        self.control = control
+        self.transition = np.linalg.matrix_power(a_mat, length)
+        self.order = n
+
+    def run(self, x: np.ndarray, state: np.ndarray) -> tuple:
+        """Filter one block (frames x channels). Returns (y, new_state)."""
+        spectrum = np.fft.rfft(x, self.fft_size, axis=0)
+        y = np.fft.irfft(spectrum * self.freq_response, self.fft_size, axis=0)
+        y = y[:self.block_frames] + self.observe @ state
+        new_state = self.control @ x + self.transition @ state
+        return y, new_state
+
+
+class Equalizer:
+    """
+    10-band parametric EQ applied to float PCM blocks.
+    Parameter changes are picked up at the next block and crossfaded
+    over it, so moving a slider never clicks.
+    """
+
+    def __init__(self, sample_rate: int = AUDIO_SAMPLE_RATE,
+                 block_frames: int = AUDIO_BLOCK_FRAMES):
+        self.sample_rate = sample_rate
+        self.block_frames = block_frames
+        self.bands = [[float(f), 0.0, EQ_Q] for f in EQ_BANDS]
+        self.preset = DEFAULT_EQ_PRESET
+
+        self._kernel = None       # None = bypass (flat)
+        self._pending = None      # (kernel,) waiting for the stream thread
+        self._pending_lock = threading.Lock()
+        self._state = None
+
+        # CPU accounting (fraction of real time spent per block)
+        self.last_block_ms = 0.0
+        self.cpu_load = 0.0
+
+        self.set_preset(self.preset)
+
+    @property
+    def enabled(self) -> bool:
+        """True when any band has non-zero gain."""
+        return any(gain != 0 for _, gain, _ in self.bands)
+
+    def get_gains(self) -> list:
+        """Current gain of every band in dB."""
+        return [gain for _, gain, _ in self.bands]
+
+    def set_preset(self, name: str) -> bool:
+        """Apply a named preset. Returns True if it exists."""
+        gains = EQ_PRESETS.get(name)
+        if gains is None:
+            return False
+        self.preset = name
+        self.set_gains(gains)
+        return True
+
+    def set_gains(self, gains):
+        """Set the gain (dB) of every band at once."""
+        for band, gain in zip(self.bands, gains):
+            band[1] = max(-EQ_MAX_GAIN_DB, min(EQ_MAX_GAIN_DB, float(gain)))
+        self._rebuild()
+
+    def set_band(self, index: int, gain_db: float = None,
+                 freq: float = None, q: float = None):
+        """Adjust a single band live."""
+        band = self.bands[index]
+        if gain_db is not None:
+            band[1] = max(-EQ_MAX_GAIN_DB, min(EQ_MAX_GAIN_DB, float(gain_db)))
+        if freq is not None:
+            band[0] = float(freq)
+        if q is not None:
+            band[2] = max(0.1, float(q))
+        self._rebuild()
+
+    def _rebuild(self):
+        """Precompute the block kernel off the audio thread."""
+        if not self.enabled:
+            kernel = None
+        else:
+            sections = [peaking_biquad(f, g, q, self.sample_rate) for f, g, q in self.bands]
+            # Headroom so boosted bands don't clip
+            preamp = 10 ** (-max(0.0, max(self.get_gains())) / 20)
+            kernel = _BlockKernel(sections, self.block_frames, preamp)
+        with self._pending_lock:
+            self._pending = (kernel,)  # Replaces a kernel the stream hasn't picked up yet
+
+    def reset(self):
+        """Clear filter state (new track or seek)."""
+        self._state = None
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        Filter one block of float samples shaped (frames, channels).
+        Blocks must be block_frames long.
+        """
+        started = time.perf_counter()
+
+        with self._pending_lock:
+            pending, self._pending = self._pending, None
+        if pending is not None:
+            new_kernel, = pending
+            out = self._crossfade(block, self._kernel, new_kernel)
+            self._kernel = new_kernel
+        elif self._kernel is None:
+            out = block
+        else:
+            out = self._run(self._kernel, block)
+
+        elapsed = time.perf_counter() - started
+        self.last_block_ms = elapsed * 1000
+        block_seconds = len(block) / self.sample_rate
+        self.cpu_load = 0.9 * self.cpu_load + 0.1 * (elapsed / block_seconds)
+        return out
+
+    def _run(self, kernel: _BlockKernel, block: np.ndarray) -> np.ndarray:
+        x = block.astype(np.float64)
+        if self._state is None or self._state.shape != (kernel.order, x.shape[1]):
+            self._state = np.zeros((kernel.order, x.shape[1]))
+        y, self._state = kernel.run(x, self._state)
+        return y.astype(np.float32)
+
+    def _crossfade(self, block, old_kernel, new_kernel) -> np.ndarray:
+        """Run old and new filters on the same block and blend between them."""
+        state = self._state
+        old = block if old_kernel is None else self._run(old_kernel, block)
+
+        # Both cascades share the same section layout, so the old state
+        # is a close starting point for the new coefficients
+        self._state = state
+        new = block if new_kernel is None else self._run(new_kernel, block)
+        if new_kernel is None:
+            self._state = None
+
+        ramp = np.linspace(0.0, 1.0, len(block), dtype=np.float32)[:, None]
+        return old * (1 - ramp) + new * ramp
@@ -0,0 +1,205 @@
+"""
+Audio output backends - where processed PCM blocks end up
+"""
+import os
+import tempfile
+import threading
+import time
+import wave
+import numpy as np
+from config.settings import (
+    AUDIO_SAMPLE_RATE, AUDIO_CHANNELS, AUDIO_BLOCK_FRAMES, AUDIO_OUTPUT
+)
+
+
+def to_int16(block: np.ndarray) -> np.ndarray:
+    """Convert float samples in [-1, 1] to clipped 16-bit PCM."""
+    return (np.clip(block, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+class OutputBackend:
+    """
+    Base class for audio sinks.
+
+    The stream thread polls can_accept() and then calls write() with one
+    float32 block shaped (frames, channels). Backends keep at most about
+    one block of look-ahead so pause/seek/DSP changes take effect quickly.
+    """
+
+    name = "base"
+    realtime = True  # Plays at wall-clock speed (so running dry is audible)
+
+    def __init__(self, sample_rate: int = AUDIO_SAMPLE_RATE,
+                 channels: int = AUDIO_CHANNELS):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.volume = 1.0
+        self.frames_written = 0
+        self.lock = threading.Lock()  # Serializes writes against stop()
+
+    def can_accept(self) -> bool:
+        """True if write() can take another block right now."""
+        return True
+
+    def write(self, block: np.ndarray):
+        self.frames_written += len(block)
+
+    def is_busy(self) -> bool:
+        """True while written audio is still playing out."""
+        return False
+
+    def pause(self):
+        pass
+
+    def resume(self):
+        pass
+
+    def stop(self):
+        """Drop anything queued and go silent."""
+        pass
+
+    def set_volume(self, volume: float):
+        self.volume = volume
+
+    def get_volume(self) -> float:
+        return self.volume
+
+    def close(self):
+        self.stop()
+
+
+class PygameOutput(OutputBackend):
+    """Plays blocks on a reserved pygame mixer channel."""
+
+    name = "pygame"
+
+    def __init__(self, sample_rate: int = AUDIO_SAMPLE_RATE,
+                 channels: int = AUDIO_CHANNELS):
+        super().__init__(sample_rate, channels)
+        from pygame import mixer
+        self._mixer = mixer
+        mixer.init(frequency=sample_rate, size=-16, channels=channels, buffer=1024)
+        mixer.set_reserved(1)
+        self.channel = mixer.Channel(0)
+
+    def can_accept(self) -> bool:
+        # One block playing, at most one waiting in the channel queue
+        return self.channel.get_queue() is None
+
+    def write(self, block: np.ndarray):
+        sound = self._mixer.Sound(buffer=to_int16(block).tobytes())
+        if self.channel.get_busy():
+            self.channel.queue(sound)
+        else:
+            # First block, or the decoder fell behind and the channel ran dry
+            self.channel.play(sound)
+            self.channel.set_volume(self.volume)
+        self.frames_written += len(block)
+
+    def is_busy(self) -> bool:
+        return self.channel.get_busy()
+
+    def pause(self):
+        self.channel.pause()
+
+    def resume(self):
+        self.channel.unpause()
+
+    def stop(self):
+        self.channel.stop()
+
+    def set_volume(self, volume: float):
+        self.volume = volume
+        self.channel.set_volume(volume)
+
+
+class NullOutput(OutputBackend):
+    """
+    Discards audio. With realtime=True it paces writes like a sound card
+    (one block of look-ahead); otherwise it accepts blocks as fast as the
+    pipeline can render them.
+    """
+
+    name = "null"
+
+    def __init__(self, sample_rate: int = AUDIO_SAMPLE_RATE,
+                 channels: int = AUDIO_CHANNELS, realtime: bool = True):
+        super().__init__(sample_rate, channels)
+        self.realtime = realtime
+        self._block_seconds = AUDIO_BLOCK_FRAMES / sample_rate
+        self._play_until = 0.0     # Monotonic time the written audio runs out
+        self._paused_left = None   # Seconds left when paused
+
+    def _buffered(self) -> float:
+        if self._paused_left is not None:
+            return self._paused_left
+        return max(0.0, self._play_until - time.monotonic())
+
+    def can_accept(self) -> bool:
+        if not self.realtime:
+            return True
+        if self._paused_left is not None:
+            return False
+        # Same look-ahead as the pygame channel: playing + one queued
+        return self._buffered() <= self._block_seconds
+
+    def write(self, block: np.ndarray):
+        seconds = len(block) / self.sample_rate
+        self._block_seconds = seconds
+        if self.realtime:
+            self._play_until = max(self._play_until, time.monotonic()) + seconds
+        self.frames_written += len(block)
+
+    def is_busy(self) -> bool:
+        return self.realtime and self._buffered() > 0
+
+    def pause(self):
+        if self._paused_left is None:
+            self._paused_left = self._buffered()
+
+    def resume(self):
+        if self._paused_left is not None:
+            self._play_until = time.monotonic() + self._paused_left
+            self._paused_left = None
+
+    def stop(self):
+        self._play_until = 0.0
+        self._paused_left = None
+
+
+class WavFileOutput(NullOutput):
+    """Writes the rendered stream to a 16-bit WAV file."""
+
+    name = "wav"
+
+    def __init__(self, path: str, sample_rate: int = AUDIO_SAMPLE_RATE,
+                 channels: int = AUDIO_CHANNELS, realtime: bool = False):
+        super().__init__(sample_rate, channels, realtime)
+        self.path = path
+        self._wav = wave.open(path, "wb")
+        self._wav.setnchannels(channels)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(sample_rate)
+
+    def write(self, block: np.ndarray):
+        if self._wav is not None:
+            self._wav.writeframes(to_int16(block * self.volume).tobytes())
+        super().write(block)
+
+    def close(self):
+        super().close()
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+
+def create_output(name: str = AUDIO_OUTPUT, **kwargs) -> OutputBackend:
+    """Build an output backend by name: 'pygame', 'null' or 'wav'."""
+    if name == "pygame":
+        return PygameOutput(**kwargs)
+    if name == "null":
+        return NullOutput(**kwargs)
+    if name == "wav":
+        kwargs.setdefault("path", os.path.join(tempfile.gettempdir(), "casanova_output.wav"))
+        return WavFileOutput(**kwargs)
+    raise ValueError(f"Unknown audio output: {name}")
@@ -1,16 +1,25 @@
 """
-Audio playback engine using pygame mixer
+Audio playback engine - streams tracks through the DSP chain to an output backend
 """
 import time
-from pygame import mixer
 from config.settings import DEFAULT_VOLUME
+from core.equalizer import Equalizer
+from core.output import OutputBackend, create_output
+from core.stream import PCMStream
 
 class AudioPlayer:
     """Handles audio playback, seeking, and volume control."""
     
-    def __init__(self):
-        mixer.init()
-        mixer.music.set_volume(DEFAULT_VOLUME)
+    def __init__(self, output: OutputBackend = None):
+        # Sound device (or null/file sink for headless runs)
+        self.output = output or create_output()
+        self.output.set_volume(DEFAULT_VOLUME)
+        self.volume = DEFAULT_VOLUME
+
+        # DSP chain applied to every block before it reaches the output
+        self.equalizer = Equalizer(self.output.sample_rate)
+        self.processors = [self.equalizer]
+        self.stream = None
         
         self.current_file = None
         self.length = 0
@@ -18,6 +27,8 @@ class AudioPlayer:
         self.is_paused = False
         self.start_time = 0.0
         self.paused_time = 0.0
+        self.cue_position = 0  # Where the next play() starts
+        self.last_stall = None  # Monotonic time the output last ran dry
 
         # Mute state
         self.is_muted = False
@@ -25,31 +36,36 @@ class AudioPlayer:
     
     def load(self, filepath: str, length: int):
         """Load an audio file for playback."""
+        self._stop_stream()
         self.current_file = filepath
         self.length = length
         self.is_playing = False
         self.is_paused = False
         self.start_time = 0.0
         self.paused_time = 0.0
+        self.cue_position = 0
+    
+    def cue(self, seconds: int):
+        """Make the next play() start at `seconds` (e.g. a restored session)."""
+        self.cue_position = max(0, min(seconds, self.length or seconds))
     
     def play(self) -> bool:
         """Start playback. Returns True on success."""
         if not self.current_file:
             return False
-        try:
-            mixer.music.load(self.current_file)
-            mixer.music.play()
-            self.start_time = time.time()
-            self.is_playing = True
-            self.is_paused = False
-            return True
-        except Exception:
+        start, self.cue_position = self.cue_position, 0
+        if not self._start_stream(start):
             return False
+        self.start_time = time.time() - start
+        self.is_playing = True
+        self.is_paused = False
+        return True
     
     def pause(self):
         """Pause playback."""
         if self.is_playing:
-            mixer.music.pause()
+            if self.stream:
+                self.stream.pause()
             self.paused_time = time.time() - self.start_time
             self.is_playing = False
             self.is_paused = True
@@ -57,14 +73,15 @@ class AudioPlayer:
     def unpause(self):
         """Resume playback."""
         if self.is_paused:
-            mixer.music.unpause()
+            if self.stream:
+                self.stream.unpause()
             self.start_time = time.time() - self.paused_time
             self.is_playing = True
             self.is_paused = False
     
     def stop(self):
         """Stop playback completely."""
-        mixer.music.stop()
+        self._stop_stream()
         self.is_playing = False
         self.is_paused = False
     
@@ -72,19 +89,17 @@ class AudioPlayer:
         """Seek to position in seconds. Returns True on success."""
         if not self.current_file or self.length == 0:
             return False
-        try:
-            mixer.music.play(start=seconds)
-            self.start_time = time.time() - seconds
-            self.is_playing = True
-            self.is_paused = False
-            return True
-        except Exception:
+        if not self._start_stream(seconds):
             return False
+        self.start_time = time.time() - seconds
+        self.is_playing = True
+        self.is_paused = False
+        return True
     
     def set_volume(self, volume: float):
         """Set volume (0.0 to 1.0)."""
         vol = max(0.0, min(1.0, volume))
-        mixer.music.set_volume(vol)
+        self._apply_volume(vol)
         # If user adjusts volume, unmute
         if vol > 0 and self.is_muted:
             self.is_muted = False
@@ -94,12 +109,12 @@ class AudioPlayer:
         """Toggle mute state. Returns new mute state."""
         if self.is_muted:
             # Unmute - restore previous volume
-            mixer.music.set_volume(self.volume_before_mute)
+            self._apply_volume(self.volume_before_mute)
             self.is_muted = False
         else:
             # Mute - save current volume and set to 0
-            self.volume_before_mute = mixer.music.get_volume()
-            mixer.music.set_volume(0.0)
+            self.volume_before_mute = self.volume
+            self._apply_volume(0.0)
             self.is_muted = True
         return self.is_muted
     
@@ -109,10 +124,12 @@ class AudioPlayer:
             return int(time.time() - self.start_time)
         elif self.is_paused:
             return int(self.paused_time)
-        return 0
+        return int(self.cue_position)
     
     def is_track_ended(self) -> bool:
         """Check if current track has finished playing."""
+        if self.is_playing and self.stream:
+            return self.stream.finished
         if self.is_playing and self.length > 0:
             return self.get_elapsed() >= self.length
         return False
@@ -120,7 +137,7 @@ class AudioPlayer:
     def reset(self):
         """Fully reset the audio player state after clearing the playlist."""
         try:
-            mixer.music.stop()
+            self._stop_stream()
         except Exception:
             pass
 
@@ -130,3 +147,35 @@ class AudioPlayer:
         self.length = 0
         self.start_time = 0.0
         self.paused_time = 0.0
+        self.cue_position = 0
+
+    def _start_stream(self, seconds: float) -> bool:
+        """(Re)start the PCM stream at the given position."""
+        self._stop_stream()
+        self.stream = PCMStream(
+            self.current_file,
+            self.output,
+            processors=self.processors,
+            start=seconds,
+            on_underrun=self._on_underrun,
+        )
+        if self.stream.start():
+            return True
+        self._stop_stream()
+        return False
+
+    def _on_underrun(self):
+        self.last_stall = time.monotonic()
+
+    def stalled_within(self, seconds: float) -> bool:
+        """True if playback stuttered in the last `seconds`."""
+        return self.last_stall is not None and time.monotonic() - self.last_stall < seconds
+
+    def _stop_stream(self):
+        if self.stream:
+            self.stream.stop()
+            self.stream = None
+
+    def _apply_volume(self, vol: float):
+        self.volume = vol
+        self.output.set_volume(vol)
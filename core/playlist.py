@@ -2,7 +2,8 @@
 Playlist management
 """
 import os
-from typing import Optional, List
+import threading
+from typing import Dict, Optional, List
 
 class Playlist:
     """Manages the list of audio tracks."""
@@ -10,17 +11,56 @@ class Playlist:
     def __init__(self):
         self.tracks: List[str] = []
         self.current_index: int = -1
+        self.info: Dict[str, str] = {}  # path -> "title artist" once known
+        self.revision = 0           # Bumped whenever the track list changes
+        # Search index - built on a background thread whenever the whole
+        # list is replaced, then kept up to date change by change
+        self._index = None          # TrackIndex, once built and adopted
+        self._index_ops = []        # Changes made while a build was running
+        self._index_build = None    # (thread, result holder) of the running build
     
     def add(self, filepath: str):
         """Add a track to the playlist."""
-        self.tracks.append(filepath)
-        if self.current_index == -1:
-            self.current_index = 0
+        self.add_multiple([filepath])
     
     def add_multiple(self, filepaths: List[str]):
         """Add multiple tracks to the playlist."""
-        for f in filepaths:
-            self.add(f)
+        self.tracks.extend(filepaths)
+        self.revision += 1
+        if self.current_index == -1 and self.tracks:
+            self.current_index = 0
+        if self._index is None and self._index_build is None:
+            self._build_index()  # First tracks - the build snapshot includes them
+        else:
+            self._index_change("append", list(filepaths))
+    
+    def set_tracks(self, filepaths: List[str], current_index: int = 0):
+        """Replace the whole playlist (e.g. a restored session)."""
+        self.tracks = list(filepaths)
+        self.revision += 1
+        self.current_index = current_index if 0 <= current_index < len(self.tracks) else (
+            0 if self.tracks else -1)
+        self._build_index()
+    
+    def move(self, from_idx: int, to_idx: int):
+        """Swap two tracks, keeping the current track selected."""
+        tracks = self.tracks
+        tracks[from_idx], tracks[to_idx] = tracks[to_idx], tracks[from_idx]
+        self.revision += 1
+        
+        # Update current index if affected
+        if self.current_index == from_idx:
+            self.current_index = to_idx
+        elif self.current_index == to_idx:
+            self.current_index = from_idx
+        self._index_change("swap", from_idx, to_idx)
+    
+    def permute(self, order: List[int]):
+        """Reorder tracks: new position k gets the track at old position order[k]."""
+        self.tracks = [self.tracks[i] for i in order]
+        self.revision += 1
+        self.current_index = -1  # Reset current track
+        self._index_change("permute", order)
     
     def remove(self, index: int) -> bool:
         """Remove track at index. Returns True if current track changed."""
@@ -28,6 +68,8 @@ class Playlist:
             return False
         
         del self.tracks[index]
+        self.revision += 1
+        self._index_change("remove", index)
         current_changed = False
         
         if index == self.current_index:
@@ -45,6 +87,8 @@ class Playlist:
         """Clear all tracks."""
         self.tracks = []
         self.current_index = -1
+        self.revision += 1
+        self._build_index()
     
     def get_current(self) -> Optional[str]:
         """Get current track filepath."""
@@ -78,10 +122,88 @@ class Playlist:
         self.current_index = (self.current_index - 1) % len(self.tracks)
         return True
     
+    def upcoming(self, count: int) -> List[str]:
+        """The next `count` tracks in playback order (shuffle reorders the list itself)."""
+        if not self.tracks:
+            return []
+        total = len(self.tracks)
+        if self.current_index >= 0:
+            count = min(count, total - 1)  # Wraps around, but not back to the current track
+        start = self.current_index + 1
+        return [self.tracks[(start + i) % total] for i in range(min(count, total))]
+    
     def get_display_names(self) -> List[str]:
         """Get list of track filenames for display."""
         return [os.path.basename(f) for f in self.tracks]
     
+    def search(self, query: str) -> Optional[List[int]]:
+        """Positions of tracks matching `query`, best first (None = no filter)."""
+        if not query.strip():
+            return None
+        # Normally built long before the first keystroke; right after a
+        # big load this waits for the build to finish
+        return self._get_index(wait=True).search(query)
+    
+    def annotate(self, index: int, title: str, artist: str):
+        """Make a track findable by its tag title/artist."""
+        if not 0 <= index < len(self.tracks):
+            return
+        path = self.tracks[index]
+        self.info[path] = f"{title} {artist}"
+        self._index_change("annotate", index, path)
+    
+    def _search_texts(self, paths: List[str]) -> List[str]:
+        from core.track_index import track_text
+        info = self.info
+        return [track_text(p, info.get(p, "")) for p in paths]
+    
+    # ===== Search index =====
+    
+    def _build_index(self):
+        """Index a snapshot of the tracks on a background thread (supersedes any running build)."""
+        paths, info = list(self.tracks), dict(self.info)
+        result = {}
+        
+        def run():
+            from core.track_index import TrackIndex, track_text
+            result["index"] = TrackIndex([track_text(p, info.get(p, "")) for p in paths])
+        
+        self._index = None
+        self._index_ops = []
+        thread = threading.Thread(target=run, name="track-index", daemon=True)
+        self._index_build = (thread, result)
+        thread.start()
+    
+    def _get_index(self, wait: bool = False):
+        """The index, adopting a finished build (replaying changes made meanwhile)."""
+        if self._index is None and self._index_build is not None:
+            thread, result = self._index_build
+            if wait:
+                thread.join()
+            if "index" in result:
+                self._index_build = None
+                self._index = result["index"]
+                ops, self._index_ops = self._index_ops, []
+                for op in ops:
+                    self._apply_index_change(*op)
+        return self._index
+    
+    def _index_change(self, *op):
+        if self._get_index() is None:
+            self._index_ops.append(op)  # Applied once the running build is adopted
+        else:
+            self._apply_index_change(*op)
+    
+    def _apply_index_change(self, name: str, *args):
+        index = self._index
+        if name == "append":
+            index.append(self._search_texts(args[0]))
+        elif name == "annotate":
+            position, path = args
+            index.set_text(position, self._search_texts([path])[0])
+        else:
+            getattr(index, name)(*args)  # swap / permute / remove
+    
     def is_empty(self) -> bool:
         """Check if playlist is empty."""
         return len(self.tracks) == 0
@@ -0,0 +1,188 @@
+"""
+Session persistence - playlist, position and volume survive restarts
+"""
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+SESSION_VERSION = 1
+
+
+def pack_tracks(tracks: list) -> dict:
+    """
+    Compact track list: file names joined into one string plus runs of
+    (folder index, count). Tracks loaded from a folder share a handful of
+    folders, so this is far smaller and faster to parse than a path list.
+    """
+    folders = {}
+    runs = []
+    names = []
+    for path in tracks:
+        folder, name = os.path.split(path)
+        idx = folders.setdefault(folder, len(folders))
+        if runs and runs[-1][0] == idx:
+            runs[-1][1] += 1
+        else:
+            runs.append([idx, 1])
+        names.append(name)
+    return {"folders": list(folders), "runs": runs, "names": "\n".join(names)}
+
+
+def unpack_tracks(data: dict) -> tuple:
+    """Inverse of pack_tracks. Returns (paths, file names)."""
+    names = data["names"].split("\n") if data.get("names") else []
+    folders = [os.path.join(folder, "") for folder in data.get("folders", [])]
+    paths = []
+    pos = 0
+    for idx, count in data.get("runs", []):
+        prefix = folders[idx]
+        paths.extend([prefix + name for name in names[pos:pos + count]])
+        pos += count
+    return paths, names
+
+
+class SessionStore:
+    """
+    Reads and writes the session snapshot.
+
+    save_async() hands a snapshot to a writer thread; snapshots that arrive
+    while a write is in flight are coalesced so only the newest one hits
+    the disk. Writes go to a temp file that replaces the snapshot
+    atomically, so a crash never leaves a half-written session.
+
+    The track list is only written when a snapshot carries one ("tracks").
+    Snapshots without it (position, volume, ...) go to a small side record
+    tagged with the generation of the track list they belong to, so the
+    periodic position saves never re-pack a large playlist.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.state_path = f"{os.path.splitext(path)[0]}-state.json"
+        self._pending = None
+        self._seq = 0           # Bumped for every snapshot handed in
+        self._written = 0       # Newest snapshot already on disk
+        self._tracks = None     # Newest track list handed in
+        self._tracks_seq = 0    # ... and the snapshot it came with
+        self._tracks_written = 0
+        self._generation = None  # Tag of the track list on disk
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def load(self) -> Optional[dict]:
+        """Return the saved session, or None if missing/unreadable."""
+        state = _read_json(self.path)
+        if state is None or state.get("version") != SESSION_VERSION:
+            return None
+        try:
+            state["tracks"], state["names"] = unpack_tracks(state)
+        except (KeyError, IndexError, TypeError, AttributeError):
+            return None
+        self._generation = state.get("generation")
+        if self._generation is None:
+            self._tracks = state["tracks"]  # Older file - rewritten whole on the next save
+
+        # Newer position/volume saved since the track list was written
+        side = _read_json(self.state_path)
+        if (side is not None and self._generation is not None
+                and side.pop("generation", None) == self._generation):
+            side.pop("version", None)
+            state.update(side)
+        return state
+
+    def _accept(self, state: dict) -> tuple:
+        """Number a snapshot; its track list (if any) is kept apart. Callers hold _lock."""
+        self._seq += 1
+        if "tracks" in state:
+            state = dict(state)
+            self._tracks = state.pop("tracks")
+            self._tracks_seq = self._seq
+        return self._seq, state
+
+    def save(self, state: dict, seq: int = None):
+        """Write a snapshot now. Older snapshots than the last written are skipped."""
+        if seq is None:
+            with self._lock:
+                seq, state = self._accept(state)
+        with self._write_lock:
+            if seq < self._written:
+                return
+            self._written = seq
+            with self._lock:
+                tracks, tracks_seq = self._tracks, self._tracks_seq
+            if tracks_seq > self._tracks_written or self._generation is None:
+                self._write(state, tracks if tracks is not None else [])
+                self._tracks_written = tracks_seq
+            else:
+                self._write_state(state)
+
+    def _write(self, state: dict, tracks: list):
+        data = dict(state)
+        data.update(pack_tracks(tracks))
+        data["version"] = SESSION_VERSION
+        data["generation"] = time.time_ns()
+        if _write_json(self.path, data):
+            self._generation = data["generation"]
+
+    def _write_state(self, state: dict):
+        data = dict(state)
+        data["version"] = SESSION_VERSION
+        data["generation"] = self._generation
+        _write_json(self.state_path, data)
+
+    def save_async(self, state: dict):
+        """Queue a snapshot for the writer thread, replacing any unwritten one."""
+        with self._lock:
+            self._pending = self._accept(state)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._writer, name="session-writer", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def flush(self, state: dict = None):
+        """Write `state` (or whatever is still queued) synchronously."""
+        with self._lock:
+            pending, self._pending = self._pending, None
+            if state is not None:
+                pending = self._accept(state)
+        if pending is not None:
+            self.save(pending[1], pending[0])
+
+    def _writer(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            with self._lock:
+                pending, self._pending = self._pending, None
+            if pending is not None:
+                self.save(pending[1], pending[0])
+
+
+def _read_json(path: str) -> Optional[dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _write_json(path: str, data: dict) -> bool:
+    """Atomically replace `path` with `data`. False if it couldn't be written."""
+    tmp = f"{path}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"Error saving session: {e}")
+        return False
+    return True
@@ -0,0 +1,136 @@
+"""
+Spectrum analyzer and VU meter fed from the live PCM stream
+"""
+import collections
+import threading
+import time
+from typing import Optional
+import numpy as np
+from config.settings import (
+    AUDIO_SAMPLE_RATE, SPECTRUM_BARS, SPECTRUM_FFT_SIZE, SPECTRUM_FPS,
+    SPECTRUM_FLOOR_DB
+)
+
+
+class SpectrumAnalyzer:
+    """
+    Taps the PCM stream and turns it into bar heights on a worker thread.
+
+    Sits in the player's processor chain but never modifies the audio.
+    The stream thread only appends a reference to each block; the FFT runs
+    at most SPECTRUM_FPS times per second over whatever has arrived since.
+    Consumers poll get_frame() and receive only finished bar heights.
+    """
+
+    def __init__(self, sample_rate: int = AUDIO_SAMPLE_RATE,
+                 bars: int = SPECTRUM_BARS, fft_size: int = SPECTRUM_FFT_SIZE,
+                 fps: int = SPECTRUM_FPS):
+        self.sample_rate = sample_rate
+        self.bars = bars
+        self.fft_size = fft_size
+        self.frame_interval = 1.0 / fps
+
+        self._window = np.hanning(fft_size).astype(np.float32)
+        self._window_gain = self._window.sum() / 2
+        self._edges = self._band_edges()
+
+        self._pending = collections.deque(maxlen=16)
+        self._history = np.zeros(fft_size, np.float32)
+        self._wake = threading.Event()
+        self._active = False
+
+        self._lock = threading.Lock()
+        self._frame = None
+        self._version = 0
+        self._seen = 0
+        self._levels = np.zeros(bars, np.float32)
+        self._vu = np.zeros(2, np.float32)
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _band_edges(self) -> np.ndarray:
+        """Log-spaced FFT bin edges from ~40 Hz to Nyquist."""
+        freqs = np.geomspace(40, self.sample_rate / 2, self.bars + 1)
+        bins = np.round(freqs * self.fft_size / self.sample_rate).astype(int)
+        bins = np.clip(bins, 1, self.fft_size // 2)
+        # Keep at least one bin per bar at the low end
+        for i in range(1, len(bins)):
+            bins[i] = max(bins[i], bins[i - 1] + 1)
+        return np.minimum(bins, self.fft_size // 2 + 1)
+
+    # --- Stream tap (processor interface) ---
+    def reset(self):
+        self._pending.clear()
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        if self._active:
+            self._pending.append(block)
+            self._wake.set()
+        return block
+
+    # --- Consumer side ---
+    def set_active(self, active: bool):
+        """Enable or disable analysis. Inactive costs nothing per block."""
+        self._active = active
+        if not active:
+            self._pending.clear()
+            self._levels[:] = 0
+            self._vu[:] = 0
+
+    def get_frame(self) -> Optional[tuple]:
+        """Return (bars, (vu_left, vu_right)) if a new frame is ready."""
+        with self._lock:
+            if self._version == self._seen:
+                return None
+            self._seen = self._version
+            return self._frame
+
+    # --- Worker ---
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            started = time.perf_counter()
+
+            blocks = []
+            while self._pending:
+                blocks.append(self._pending.popleft())
+            if not blocks or not self._active:
+                continue
+
+            self._analyze(np.concatenate(blocks))
+
+            # Cap the analysis rate; blocks keep batching up meanwhile
+            spare = self.frame_interval - (time.perf_counter() - started)
+            if spare > 0:
+                time.sleep(spare)
+
+    def _analyze(self, samples: np.ndarray):
+        # VU: RMS per channel over everything since the last frame
+        rms = np.sqrt(np.mean(np.square(samples, dtype=np.float32), axis=0))
+        if rms.size == 1:
+            rms = np.repeat(rms, 2)
+        vu_db = 20 * np.log10(np.maximum(rms[:2], 1e-6))
+        vu = np.clip(1 - vu_db / SPECTRUM_FLOOR_DB, 0, 1)
+
+        # Spectrum: windowed real FFT over the newest fft_size mono frames
+        mono = samples.mean(axis=1) if samples.ndim == 2 else samples
+        if len(mono) >= self.fft_size:
+            self._history = mono[-self.fft_size:].astype(np.float32)
+        else:
+            self._history = np.concatenate([self._history[len(mono):], mono])
+
+        mag = np.abs(np.fft.rfft(self._history * self._window)) / self._window_gain
+        power = np.add.reduceat(np.square(mag), self._edges[:-1])
+        widths = np.maximum(np.diff(self._edges), 1)
+        band_db = 10 * np.log10(np.maximum(power / widths, 1e-12))
+        levels = np.clip(1 - band_db / SPECTRUM_FLOOR_DB, 0, 1).astype(np.float32)
+
+        # Fast attack, slow release
+        self._levels = np.maximum(levels, self._levels * 0.85)
+        self._vu = np.maximum(vu.astype(np.float32), self._vu * 0.8)
+
+        with self._lock:
+            self._frame = (self._levels.tolist(), tuple(self._vu.tolist()))
+            self._version += 1
@@ -0,0 +1,121 @@
+"""
+PCM streaming pipeline - decodes a track, runs the DSP chain and feeds the output
+"""
+import threading
+import time
+import numpy as np
+
+from utils.decoder import PCMDecoder
+from config.settings import AUDIO_BLOCK_FRAMES
+
+
+class PCMStream:
+    """
+    Background thread that keeps an output backend fed with processed blocks.
+    The backend holds about one block of look-ahead, so DSP changes are heard
+    within a block or two. `on_underrun()` is called (on the stream thread)
+    whenever the output ran dry before the next block was ready.
+    """
+
+    def __init__(self, filepath: str, output, processors: list = None,
+                 start: float = 0.0, block_frames: int = AUDIO_BLOCK_FRAMES,
+                 on_underrun=None):
+        self.filepath = filepath
+        self.output = output
+        self.processors = processors or []
+        self.on_underrun = on_underrun
+        self.start_offset = start
+        self.block_frames = block_frames
+        self.block_seconds = block_frames / output.sample_rate
+
+        self.ok = False
+        self.finished = False
+        self.underruns = 0
+        self._started = threading.Event()
+        self._stop = threading.Event()
+        self._resume = threading.Event()
+        self._resume.set()
+        self._thread = None
+
+    def start(self, timeout: float = 5.0) -> bool:
+        """Start streaming. Returns True once the first block is playing."""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._started.wait(timeout)
+        return self.ok
+
+    def pause(self):
+        self._resume.clear()
+        self.output.pause()
+
+    def unpause(self):
+        self.output.resume()
+        self._resume.set()
+
+    def stop(self):
+        """Stop streaming and silence the output."""
+        self._stop.set()
+        self._resume.set()
+        with self.output.lock:
+            self.output.stop()
+
+    def _run(self):
+        try:
+            decoder = PCMDecoder(self.filepath, self.start_offset,
+                                 self.output.sample_rate, self.output.channels)
+        except OSError:
+            self._started.set()
+            return
+
+        for proc in self.processors:
+            proc.reset()
+
+        try:
+            while not self._stop.is_set():
+                block = decoder.read_block(self.block_frames)
+                if block is None:
+                    break
+                if len(block) < self.block_frames:
+                    pad = np.zeros((self.block_frames - len(block), block.shape[1]), np.float32)
+                    block = np.concatenate([block, pad])
+
+                for proc in self.processors:
+                    block = proc.process(block)
+
+                if not self._wait_for_slot():
+                    break
+                with self.output.lock:
+                    if self._stop.is_set():
+                        break
+                    stalled = self.ok and self.output.realtime and not self.output.is_busy()
+                    self.output.write(block)
+                if stalled:
+                    self.underruns += 1
+                    if self.on_underrun:
+                        self.on_underrun()
+
+                if not self.ok:
+                    self.ok = True
+                    self._started.set()
+        except Exception as e:
+            print(f"Stream error: {e}")
+        finally:
+            decoder.close()
+
+        # Let the last queued blocks play out
+        while not self._stop.is_set() and self.output.is_busy():
+            time.sleep(self.block_seconds / 2)
+
+        self.finished = self.ok and not self._stop.is_set()
+        self._started.set()
+
+    def _wait_for_slot(self) -> bool:
+        """Block until the output can take another block. False if stopped."""
+        while not self._stop.is_set():
+            if not self._resume.is_set():
+                self._resume.wait(0.1)
+            elif self.output.can_accept():
+                return True
+            else:
+                time.sleep(self.block_seconds / 4)
+        return False
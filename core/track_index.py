@@ -0,0 +1,297 @@
+"""
+Trigram index over playlist tracks - backs the type-to-filter box
+"""
+from typing import List, Optional
+
+import numpy as np
+
+from config.settings import FILTER_RANK_LIMIT
+
+SEGMENT_SIZE = 1024         # Recently added tracks are scanned until this many pile up
+BOUNDARIES = " /\\-_.([&,"  # Characters that start a new word
+_SHIFT = np.uint64(32)
+
+
+def track_text(path: str, info: str = "") -> str:
+    """Searchable text for a track: last folders + file name (+ title/artist)."""
+    parts = path.replace("\\", "/").rsplit("/", 3)[-3:]
+    text = " " + "/".join(parts).lower()
+    if info:
+        text += " " + info.lower()
+    return text
+
+
+def _gram_codes(data: bytes) -> np.ndarray:
+    arr = np.frombuffer(data, np.uint8).astype(np.uint32)
+    return (arr[:-2] << 16) | (arr[1:-1] << 8) | arr[2:]
+
+
+def _code(gram: str) -> Optional[int]:
+    raw = gram.encode("utf-8")
+    if len(raw) != 3:
+        return None
+    return (raw[0] << 16) | (raw[1] << 8) | raw[2]
+
+
+class _Segment:
+    """Immutable postings for a batch of ids: (gram, id) pairs sorted by gram."""
+
+    def __init__(self, keys: np.ndarray):
+        self.keys = keys
+        self.grams = (keys >> _SHIFT).astype(np.uint32)
+        self.ids = (keys & np.uint64(0xFFFFFFFF)).astype(np.int64)
+
+    @classmethod
+    def build(cls, ids: list, texts: list) -> "_Segment":
+        encoded = [t.encode("utf-8") for t in texts]
+        data = b"\x00".join(encoded)
+        if len(data) < 3:
+            return cls(np.empty(0, np.uint64))
+        codes = _gram_codes(data)
+        lens = np.fromiter(map(len, encoded), np.int64, len(encoded)) + 1
+        owner = np.repeat(np.asarray(ids, np.uint64), lens)[:len(codes)]
+        # Grams spanning the separator belong to no track
+        raw = np.frombuffer(data, np.uint8)
+        valid = (raw[:-2] != 0) & (raw[1:-1] != 0) & (raw[2:] != 0)
+        keys = (codes[valid].astype(np.uint64) << _SHIFT) | owner[valid]
+        return cls(_unique_sorted(keys))
+
+    @classmethod
+    def merge(cls, a: "_Segment", b: "_Segment", alive: np.ndarray) -> "_Segment":
+        keys = np.concatenate((a.keys, b.keys))
+        ids = (keys & np.uint64(0xFFFFFFFF)).astype(np.int64)
+        keys = keys[alive[ids]]  # Drop removed tracks while we're at it
+        keys.sort()
+        return cls(keys)
+
+    def posting(self, code: int) -> np.ndarray:
+        lo = np.searchsorted(self.grams, code, "left")
+        hi = np.searchsorted(self.grams, code, "right")
+        return self.ids[lo:hi]
+
+
+def _unique_sorted(keys: np.ndarray) -> np.ndarray:
+    keys.sort()
+    if len(keys) < 2:
+        return keys
+    keep = np.empty(len(keys), bool)
+    keep[0] = True
+    np.not_equal(keys[1:], keys[:-1], out=keep[1:])
+    return keys[keep]
+
+
+class TrackIndex:
+    """
+    Trigram index keyed by playlist position.
+
+    Tracks get internal ids; postings live in immutable segments (merged
+    log-structured style as they grow), the newest few tracks are scanned
+    directly, and removals just clear an `alive` flag. Positions are kept
+    in an id -> position array so removes and swaps stay vectorized.
+
+    search() narrows the previous result when the new query only extends
+    it (typing one more letter), ranks up to FILTER_RANK_LIMIT matches and
+    returns playlist positions.
+    """
+
+    def __init__(self, texts: List[str] = ()):
+        self.texts = []                          # id -> searchable text
+        self.order = []                          # position -> id
+        self.alive = np.zeros(0, bool)           # id -> still in playlist
+        self.position = np.zeros(0, np.int64)    # id -> playlist position
+        self.segments = []
+        self.pending = []                        # ids not in a segment yet
+        self._last = None                        # (tokens, indexed ids, pending ids) for narrowing
+        if texts:
+            self.append(texts)
+            self._flush()
+
+    # ===== Maintenance =====
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def _grow(self, count: int):
+        size = len(self.texts) + count
+        if size > len(self.alive):
+            capacity = max(size, len(self.alive) * 2, 1024)
+            self.alive = np.concatenate((self.alive, np.zeros(capacity - len(self.alive), bool)))
+            self.position = np.concatenate(
+                (self.position, np.full(capacity - len(self.position), -1, np.int64)))
+
+    def append(self, texts: List[str]):
+        """Add tracks at the end of the playlist."""
+        self._grow(len(texts))
+        first_id = len(self.texts)
+        first_pos = len(self.order)
+        ids = range(first_id, first_id + len(texts))
+        self.texts.extend(texts)
+        self.order.extend(ids)
+        self.alive[first_id:first_id + len(texts)] = True
+        self.position[first_id:first_id + len(texts)] = np.arange(
+            first_pos, first_pos + len(texts))
+        self.pending.extend(ids)
+        if len(self.pending) >= SEGMENT_SIZE:
+            self._flush()
+        self._last = None
+
+    def remove(self, position: int):
+        """Remove the track at `position`; later tracks shift up."""
+        track_id = self.order.pop(position)
+        self.alive[track_id] = False
+        self.position[track_id] = -1
+        self.position[self.position > position] -= 1
+        self._last = None
+
+    def swap(self, i: int, j: int):
+        a, b = self.order[i], self.order[j]
+        self.order[i], self.order[j] = b, a
+        self.position[a], self.position[b] = j, i
+        self._last = None
+
+    def permute(self, new_order: List[int]):
+        """Reorder tracks: new position k holds the track from old position new_order[k]."""
+        self.order = [self.order[p] for p in new_order]
+        self.position[np.asarray(self.order, np.int64)] = np.arange(len(self.order))
+        self._last = None
+
+    def set_text(self, position: int, text: str):
+        """Replace a track's text (e.g. once its title/artist are known)."""
+        old_id = self.order[position]
+        self._grow(1)
+        new_id = len(self.texts)
+        self.texts.append(text)
+        self.alive[old_id] = False
+        self.position[old_id] = -1
+        self.alive[new_id] = True
+        self.position[new_id] = position
+        self.order[position] = new_id
+        self.pending.append(new_id)
+        self._last = None
+
+    def _flush(self):
+        """Index pending ids as a new segment; merge segments of similar size."""
+        if not self.pending:
+            return
+        ids = self.pending
+        self.pending = []
+        self.segments.append(_Segment.build(ids, [self.texts[i] for i in ids]))
+        segs = self.segments
+        while len(segs) > 1 and len(segs[-1].keys) * 2 >= len(segs[-2].keys):
+            b = segs.pop()
+            a = segs.pop()
+            segs.append(_Segment.merge(a, b, self.alive))
+
+    # ===== Queries =====
+
+    def _token_ids(self, token: str) -> np.ndarray:
+        """Ids whose text holds every trigram of `token` (or a word starting with it)."""
+        if len(token) == 2:
+            # Two letters: match word starts (" lo", "/lo", "-lo", ...)
+            mask = np.zeros(len(self.texts), bool)
+            for b in BOUNDARIES:
+                code = _code(b + token)
+                if code is not None:
+                    mask[self._posting(code)] = True
+            return np.flatnonzero(mask)
+        data = token.encode("utf-8")
+        if len(data) < 3:
+            return np.zeros(0, np.int64)
+        result = None
+        for code in set(_gram_codes(data).tolist()):
+            result = self._intersect(result, self._posting(code))
+            if not len(result):
+                break
+        return result
+
+    def _posting(self, code: int) -> np.ndarray:
+        code = np.uint32(code)  # Same dtype as the gram arrays, or searchsorted copies them
+        parts = [seg.posting(code) for seg in self.segments]
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts) if parts else np.zeros(0, np.int64)
+
+    def _intersect(self, a: Optional[np.ndarray], b: np.ndarray) -> np.ndarray:
+        if a is None:
+            return b
+        if len(a) > len(b):
+            a, b = b, a
+        mask = np.zeros(len(self.texts), bool)
+        mask[a] = True
+        return b[mask[b]]
+
+    @staticmethod
+    def _text_matches(text: str, tokens: List[str]) -> bool:
+        """Same rule as the index, for tracks that aren't in a segment yet."""
+        for token in tokens:
+            if len(token) == 2:
+                if not any(b + token in text for b in BOUNDARIES):
+                    return False
+            elif token not in text and not all(
+                    token[k:k + 3] in text for k in range(len(token) - 2)):
+                return False
+        return True
+
+    @staticmethod
+    def _narrows(old: List[str], new: List[str]) -> bool:
+        """True if every match for `new` is also a match for `old`."""
+        # Two-letter tokens mean "word starts with", so they can't be narrowed from
+        return all(len(o) > 2 and any(o in n for n in new) for o in old)
+
+    def search(self, query: str) -> Optional[List[int]]:
+        """
+        Playlist positions matching every word of `query` (None means no filter).
+
+        A word matches when the track contains all of its trigrams - typos
+        that keep the letters in order mostly still match, exact substrings
+        rank first. Two-letter words match word starts; single letters are ignored.
+        """
+        tokens = [t for t in query.lower().split() if len(t) >= 2]
+        if not tokens:
+            self._last = None
+            return None
+        if len(self.pending) > SEGMENT_SIZE // 4:
+            self._flush()
+
+        # Each keystroke narrows the previous result instead of starting over
+        candidates = None
+        pending = self.pending
+        if self._last and self._narrows(self._last[0], tokens):
+            _, candidates, pending = self._last
+
+        for token in sorted(tokens, key=len, reverse=True):
+            if candidates is not None and not len(candidates):
+                break
+            candidates = self._intersect(candidates, self._token_ids(token))
+        candidates = candidates[self.alive[candidates]]
+
+        extra = [i for i in pending if self.alive[i] and self._text_matches(self.texts[i], tokens)]
+        self._last = (tokens, candidates, extra)
+        if extra:
+            candidates = np.concatenate((candidates, np.asarray(extra, np.int64)))
+        return self._rank(candidates, tokens)
+
+    def _rank(self, ids: np.ndarray, tokens: List[str]) -> List[int]:
+        if len(ids) > FILTER_RANK_LIMIT:
+            # Too broad to rank; keep playlist order
+            mask = np.zeros(len(self.order), bool)
+            mask[self.position[ids]] = True
+            return np.flatnonzero(mask).tolist()
+
+        # Exact matches in the file name beat folder matches; word starts beat the middle
+        scored = []
+        for track_id, pos in zip(ids.tolist(), self.position[ids].tolist()):
+            text = self.texts[track_id]
+            name = text[text.rfind("/") + 1:]
+            score = 0
+            for token in tokens:
+                at = name.find(token)
+                if at == 0:
+                    continue
+                if at > 0:
+                    score += 1 if name[at - 1] in BOUNDARIES else 2
+                else:
+                    score += 3 if token in text else 4
+            scored.append((score, pos))
+        scored.sort()
+        return [pos for _, pos in scored]
@@ -36,32 +36,62 @@ warnings.filterwarnings("ignore", category=DeprecationWarning)
 import os
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "1"
 
+# Optional startup profiling (import times + first paint)
+PROFILE_STARTUP = "--profile-startup" in sys.argv
+profiler = None
+if PROFILE_STARTUP:
+    from utils.startup import StartupProfiler
+    profiler = StartupProfiler()
+    profiler.install()
+
 # ============================================
 # Now import everything else
 # ============================================
 import customtkinter as ctk
-from config.settings import APPEARANCE_MODE, COLOR_THEME
+from config.settings import APPEARANCE_MODE, COLOR_THEME, STARTUP_BUDGET_MS
 
 
 def main():
     # Additional Windows patches for pydub
-    from utils.windows_patch import apply_windows_patch, configure_pydub
+    # (pydub itself is configured by the background warm-up)
+    from utils.windows_patch import apply_windows_patch
     apply_windows_patch()
     
     # Configure CustomTkinter
     ctk.set_appearance_mode(APPEARANCE_MODE)
     ctk.set_default_color_theme(COLOR_THEME)
     
-    # Configure pydub paths
-    configure_pydub()
-    
     # Import app here (after all patches applied)
     from ui.app import MusicPlayerApp
+    if profiler:
+        profiler.mark("app_imported")
     
     # Create and run app
     app = MusicPlayerApp()
+    if profiler:
+        _attach_profiler(app)
     app.mainloop()
+    
+    if profiler and profiler.elapsed("first_paint") * 1000 > STARTUP_BUDGET_MS:
+        sys.exit(1)
+
+
+def _attach_profiler(app):
+    """Mark window/paint/warm-up phases, print the report and exit."""
+    profiler.mark("window_built")
+    app.after_idle(lambda: profiler.mark("first_paint"))
+    
+    def on_ready():
+        profiler.mark("warm_up_done")
+        profiler.uninstall()
+        print(profiler.report(budget_ms=STARTUP_BUDGET_MS))
+        app.after(100, app.destroy)
+    
+    app.startup_callbacks.append(on_ready)
 
 
 if __name__ == "__main__":
+    # Analysis worker processes re-enter here in the frozen build
+    import multiprocessing
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -1,4 +1,20 @@
-from .app import MusicPlayerApp
-from .left_panel import LeftPanel
-from .right_panel import RightPanel
-from .search_panel import SearchPanel
\ No newline at end of file
+"""
+UI components - submodules load on first attribute access
+"""
+import importlib
+
+_EXPORTS = {
+    "MusicPlayerApp": "app",
+    "LeftPanel": "left_panel",
+    "RightPanel": "right_panel",
+    "SearchPanel": "search_panel",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f".{module}", __name__), name)
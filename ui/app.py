@@ -3,32 +3,46 @@ Main application window - orchestrates all components
 """
 import os
 import threading
+import time
 import customtkinter as ctk
-from tkinter import filedialog, messagebox
-from PIL import ImageTk
+from tkinter import filedialog, messagebox, TclError
 
 from config.settings import (
     WINDOW_TITLE, WINDOW_WIDTH, WINDOW_HEIGHT, WINDOW_RESIZABLE,
     BG_PRIMARY, BG_SECONDARY, SEEK_STEP, UPDATE_INTERVAL_MS, AUDIO_FILETYPES,
-    AUDIO_EXTENSIONS, DEFAULT_PLAYLIST_FOLDER
+    AUDIO_EXTENSIONS, DEFAULT_PLAYLIST_FOLDER, SPECTRUM_FPS, PREFETCH_AHEAD,
+    SESSION_FILE, SESSION_SAVE_DELAY_MS, SESSION_POSITION_INTERVAL_S,
+    DEFAULT_VOLUME, EQ_PRESETS, PLAYLIST_FILETYPES, DOWNLOAD_QUEUE_FILE,
+    ANALYSIS_UPCOMING, ANALYSIS_STALL_BACKOFF_S
 )
 from utils.paths import get_icon_path
-from utils.metadata import get_track_metadata, extract_album_art
-from utils.waveform import compute_waveform
+from utils.latency import LatencyTracker
+from utils.track_details import TrackDetailLoader
+from utils.startup import warm_up
+from ui import dispatcher
 from ui.left_panel import LeftPanel
 from ui.right_panel import RightPanel
-from core.player import AudioPlayer
 from core.playlist import Playlist
+from core.session import SessionStore
 
 class MusicPlayerApp(ctk.CTk):
     """Main application class using CustomTkinter."""
     
     def __init__(self):
         super().__init__()
+        # Background threads hand UI updates to this instead of calling Tk
+        self.dispatcher = dispatcher.install(self)
         self._setup_window()
         self._init_components()
         self._bind_shortcuts()
         self._start_updater()
+        self._start_spectrum()
+        self._restore_session()
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        
+        # Heavy subsystems load once the first frame is on screen
+        self.startup_callbacks = []
+        self.after_idle(self._finish_startup)
     
     def _setup_window(self):
         """Configure main window."""
@@ -38,7 +52,10 @@ class MusicPlayerApp(ctk.CTk):
         self.resizable(WINDOW_RESIZABLE, WINDOW_RESIZABLE)
 
         # Set window icon (works for taskbar and window)
-        self.iconbitmap(get_icon_path("app.ico"))
+        try:
+            self.iconbitmap(get_icon_path("app.ico"))
+        except TclError:
+            pass  # .ico icons are Windows-only (e.g. headless Linux benchmarks)
 
         # Center window on screen
         self.update_idletasks()
@@ -48,10 +65,27 @@ class MusicPlayerApp(ctk.CTk):
     
     def _init_components(self):
         """Initialize all application components."""
-        self.player = AudioPlayer()
+        self._player = None  # Created on first use or after warm-up
+        self._downloads = None  # Download manager, started on first use
+        self.analysis = None  # Background analysis of the whole playlist, after warm-up
+        self.spectrum = None
         self.playlist = Playlist()
+        self.latency = LatencyTracker()
+        self.track_details = TrackDetailLoader(
+            self._on_track_meta, self._on_track_art, self._on_track_waveform)
+        self.spectrum_visible = False
+        self.spectrum_idle = True
         self.is_dragging = False
         
+        # Session snapshot (playlist, position, volume)
+        self.session = SessionStore(SESSION_FILE)
+        self.resume = None
+        self.current_meta = ("", "")
+        self._session_job = None
+        self._last_position_save = 0.0
+        self._saved_revision = None  # Playlist revision last handed to the session store
+        self.resumed_path = None
+        
         # Left panel callbacks
         left_callbacks = {
             "prev": self.prev_track,
@@ -62,6 +96,7 @@ class MusicPlayerApp(ctk.CTk):
             "end_drag": self._end_drag,
             "set_volume": self._set_volume,
             "toggle_mute": self._toggle_mute,
+            "set_eq_preset": self._set_eq_preset,
         }
         self.left_panel = LeftPanel(self, left_callbacks)
         self.left_panel.place(x=0, y=0)
@@ -76,6 +111,10 @@ class MusicPlayerApp(ctk.CTk):
             "shuffle": self._on_shuffle,
             "youtube_search": self._open_youtube_search,
             "load_default_folder": self.load_default_folder,
+            "filter": self._filter_playlist,
+            "import_playlist": self.import_playlist,
+            "export_playlist": self.export_playlist,
+            "rows_shown": self._on_rows_shown,
         }
         self.right_panel = RightPanel(self, right_callbacks)
         self.right_panel.place(x=565, y=10)
@@ -83,6 +122,46 @@ class MusicPlayerApp(ctk.CTk):
         # Search panel reference
         self.search_panel = None
     
+    @property
+    def player(self):
+        """Audio engine - built lazily so numpy/pygame stay off the first paint."""
+        if self._player is None:
+            from core.player import AudioPlayer
+            from core.spectrum import SpectrumAnalyzer
+            
+            self._player = AudioPlayer()
+            # Visualizer taps the PCM stream after the equalizer
+            self.spectrum = SpectrumAnalyzer()
+            self.spectrum.set_active(self.spectrum_visible)
+            self._player.processors.append(self.spectrum)
+            self._apply_resume()
+        return self._player
+    
+    @property
+    def downloads(self):
+        """Download queue - workers start on first use."""
+        if self._downloads is None:
+            from utils.downloads import get_download_manager
+            from utils.download_index import get_download_index
+            self._downloads = get_download_manager()
+            self._downloads.add_listener(self._on_download_changed)
+            get_download_index().attach(self._downloads)
+            self._downloads.start()
+        return self._downloads
+    
+    def _finish_startup(self):
+        """Warm up heavy modules in the background, then build the player."""
+        warm_up(on_done=lambda: dispatcher.post(self._on_warmed_up))
+    
+    def _on_warmed_up(self):
+        self.player  # Cheap now that its imports are loaded
+        self._refresh_resumed_track()
+        if os.path.exists(DOWNLOAD_QUEUE_FILE):
+            self.downloads  # Resume downloads interrupted by the last exit
+        self._start_analysis()
+        for callback in self.startup_callbacks:
+            callback()
+    
     def _bind_shortcuts(self):
         """Bind keyboard shortcuts."""
         self.bind("<space>", lambda e: self.play_pause_toggle())
@@ -99,9 +178,11 @@ class MusicPlayerApp(ctk.CTk):
         for f in files:
             self.playlist.add(f)
             self.right_panel.add_item(self.playlist.get_display_names()[-1])
+        self._analyze_tracks(files)
         
         if len(self.playlist) == len(files):
             self._load_current_track()
+        self._session_changed()
 
     def remove_selected(self):
         """Remove selected track from playlist."""
@@ -109,13 +190,15 @@ class MusicPlayerApp(ctk.CTk):
         if idx < 0:
             return
         
-        self.right_panel.remove_item(idx)
         current_changed = self.playlist.remove(idx)
+        self.right_panel.remove_item(idx)
+        self._analyze_tracks()
         
         if current_changed:
             self.player.stop()
             if not self.playlist.is_empty():
                 self._load_current_track()
+        self._session_changed()
     
     def clear_playlist(self):
         """Clear entire playlist."""
@@ -123,6 +206,7 @@ class MusicPlayerApp(ctk.CTk):
         self.player.reset()
         self.playlist.clear()
         self.right_panel.clear()
+        self._analyze_tracks()
         self.left_panel.set_title("No track loaded", "Select a track to play")
         self.left_panel.clear_waveform()
         self.left_panel.set_playing(False)
@@ -130,35 +214,24 @@ class MusicPlayerApp(ctk.CTk):
         # RESET timestamp + slider
         self.left_panel.set_time(0, 0)
         self.left_panel.set_seek_position(0)
+        self.current_meta = ("", "")
+        self._session_changed()
 
     def _on_reorder(self, from_idx: int, to_idx: int):
         """Handle track reordering."""
-        # Swap in playlist
-        tracks = self.playlist.tracks
-        tracks[from_idx], tracks[to_idx] = tracks[to_idx], tracks[from_idx]
-        
-        # Update current index if affected
-        if self.playlist.current_index == from_idx:
-            self.playlist.current_index = to_idx
-        elif self.playlist.current_index == to_idx:
-            self.playlist.current_index = from_idx
-    
-    def _on_shuffle(self, new_order: list):
-        """Handle playlist shuffle."""
-        # Create mapping from display names to file paths
-        name_to_path = {}
-        for path in self.playlist.tracks:
-            name = os.path.basename(path)
-            name_to_path[name] = path
-        
-        # Rebuild playlist in new order
-        new_tracks = []
-        for name in new_order:
-            if name in name_to_path:
-                new_tracks.append(name_to_path[name])
-        
-        self.playlist.tracks = new_tracks
-        self.playlist.current_index = -1  # Reset current track
+        self.playlist.move(from_idx, to_idx)
+        self._prefetch_upcoming()
+        self._session_changed()
+    
+    def _on_shuffle(self, order: list):
+        """Handle playlist shuffle (order[k] = old position of the new k-th track)."""
+        self.playlist.permute(order)
+        self._prefetch_upcoming()
+        self._session_changed()
+    
+    def _filter_playlist(self, text: str):
+        """Narrow the playlist view to tracks matching `text`."""
+        self.right_panel.set_filter(self.playlist.search(text))
 
     # --- YouTube Search ---
     def _open_youtube_search(self):
@@ -168,17 +241,36 @@ class MusicPlayerApp(ctk.CTk):
             return
         
         from ui.search_panel import SearchPanel
-        self.search_panel = SearchPanel(self, self._on_youtube_download)
+        self.search_panel = SearchPanel(self, self.downloads, on_play_local=self._play_downloaded)
+    
+    def _on_download_changed(self, item):
+        """Finished downloads join the playlist, whether or not the search panel is open."""
+        from utils.downloads import DONE
+        if item.state == DONE and item.filepath:
+            dispatcher.post(self._on_youtube_download, item.filepath)
     
     def _on_youtube_download(self, filepath: str):
         """Handle downloaded file from YouTube."""
         # Add to playlist
         self.playlist.add(filepath)
         self.right_panel.add_item(os.path.basename(filepath))
+        self._analyze_tracks([filepath])
         
         # If first track, load it
         if len(self.playlist) == 1:
             self._load_current_track()
+        self._session_changed()
+
+    def _play_downloaded(self, filepath: str):
+        """Play a search result we already have on disk (added to the playlist if needed)."""
+        if filepath not in self.playlist.tracks:
+            self.playlist.add(filepath)
+            self.right_panel.add_item(os.path.basename(filepath))
+            self._analyze_tracks([filepath])
+        self.playlist.set_current(self.playlist.tracks.index(filepath))
+        self._load_current_track()
+        self._play()
+        self._session_changed()
 
     def load_default_folder(self):
         """Load all audio files from default playlist folder."""
@@ -208,19 +300,79 @@ class MusicPlayerApp(ctk.CTk):
             return
         
         # Add to playlist
-        for f in audio_files:
-            self.playlist.add(f)
-            self.right_panel.add_item(os.path.basename(f))
+        self.playlist.add_multiple(audio_files)
+        self.right_panel.add_items([os.path.basename(f) for f in audio_files])
+        self._analyze_tracks(audio_files)
         
         # Load first track if playlist was empty before
         if len(self.playlist) == len(audio_files):
             self._load_current_track()
+        self._session_changed()
         
         messagebox.showinfo(
             "Loaded", 
             f"Loaded {len(audio_files)} songs from playlist folder."
         )
     
+    def import_playlist(self):
+        """Stream a playlist file into the playlist on a background thread."""
+        path = filedialog.askopenfilename(filetypes=PLAYLIST_FILETYPES)
+        if not path:
+            return
+        was_empty = self.playlist.is_empty()
+        
+        def run():
+            from utils.playlist_io import import_playlist
+            try:
+                # Batches are applied on the main thread in arrival order
+                added, skipped = import_playlist(
+                    path, lambda batch: dispatcher.post(self._add_tracks, batch))
+            except Exception as e:
+                dispatcher.post(messagebox.showerror,
+                                "Import failed", f"Could not read playlist:\n{e}")
+                return
+            dispatcher.post(self._on_import_done, added, skipped, was_empty)
+        
+        threading.Thread(target=run, daemon=True).start()
+    
+    def _add_tracks(self, paths: list):
+        self.playlist.add_multiple(paths)
+        self.right_panel.add_items([os.path.basename(p) for p in paths])
+        self._analyze_tracks(paths)
+    
+    def _on_import_done(self, added: int, skipped: int, was_empty: bool):
+        if was_empty and not self.playlist.is_empty():
+            self._load_current_track()
+        self._session_changed()
+        message = f"Imported {added} songs."
+        if skipped:
+            message += f"\n{skipped} missing files were skipped."
+        messagebox.showinfo("Imported", message)
+    
+    def export_playlist(self):
+        """Save the playlist (format from the chosen extension)."""
+        if self.playlist.is_empty():
+            messagebox.showinfo("Export", "Playlist is empty.")
+            return
+        path = filedialog.asksaveasfilename(
+            defaultextension=".m3u8", filetypes=PLAYLIST_FILETYPES)
+        if not path:
+            return
+        tracks = list(self.playlist.tracks)
+        
+        def run():
+            from utils.playlist_io import export_playlist
+            try:
+                count = export_playlist(path, tracks)
+            except Exception as e:
+                dispatcher.post(messagebox.showerror,
+                                "Export failed", f"Could not save playlist:\n{e}")
+                return
+            dispatcher.post(messagebox.showinfo,
+                            "Exported", f"Saved {count} songs to\n{path}")
+        
+        threading.Thread(target=run, daemon=True).start()
+    
     def play_selected(self):
         """Play the selected track."""
         idx = self.right_panel.get_selection()
@@ -236,6 +388,7 @@ class MusicPlayerApp(ctk.CTk):
         if self.player.is_playing:
             self.player.pause()
             self.left_panel.set_playing(False)
+            self._session_changed()
         elif self.player.is_paused:
             self.player.unpause()
             self.left_panel.set_playing(True)
@@ -260,6 +413,7 @@ class MusicPlayerApp(ctk.CTk):
     def _play(self):
         """Start playback of current track."""
         if self.player.play():
+            self.latency.mark(self.latency.token, "first_sound")
             self.left_panel.set_playing(True)
              # Highlight current track in playlist
             self.right_panel.set_playing_index(self.playlist.current_index)
@@ -272,6 +426,7 @@ class MusicPlayerApp(ctk.CTk):
         filepath = self.playlist.get_current()
         if not filepath:
             return
+        token = self.latency.begin()
         
         # Quick load - just get title and length for immediate playback
         filename = os.path.basename(filepath)
@@ -279,14 +434,21 @@ class MusicPlayerApp(ctk.CTk):
         
         # Set basic info immediately
         self.left_panel.set_title(title, "Loading...")
+        self.current_meta = (title, "")
+        
+        # Details the prefetcher already prepared show in this same frame
+        cached = self.track_details.cached(filepath)
         
         # Get length quickly for player
-        try:
-            from mutagen.mp3 import MP3
-            audio = MP3(filepath)
-            length = int(audio.info.length)
-        except:
-            length = 0
+        if "meta" in cached:
+            length = cached["meta"]["length"]
+        else:
+            try:
+                # Header-only read, any container (MP3, Opus, M4A, FLAC...)
+                from mutagen import File as MutagenFile
+                length = int(MutagenFile(filepath).info.length)
+            except Exception:
+                length = 0  # Corrected once the full probe arrives (_set_title)
         
         # Load into player immediately
         self.player.load(filepath, length)
@@ -296,44 +458,111 @@ class MusicPlayerApp(ctk.CTk):
         # Highlight in playlist
         self.right_panel.set_playing_index(self.playlist.current_index)
         
-        # Load metadata, album art, and waveform in background
-        thread = threading.Thread(
-            target=self._load_track_details,
-            args=(filepath,),
-            daemon=True
-        )
-        thread.start()
+        if "meta" in cached:
+            self._set_title(cached["meta"]["title"], cached["meta"]["artist"], token, filepath)
+        if "art" in cached:
+            self._set_album_art(cached["art"], token)
+        if "heights" in cached:
+            self._set_waveform(cached["heights"], token)
+        
+        # Load whatever is missing in background (supersedes older loads),
+        # then get the next tracks ready
+        self.track_details.load(filepath, token, shown=cached.keys())
+        self._prefetch_upcoming()
+        self._session_changed()
+    
+    def _prefetch_upcoming(self):
+        """Prepare details of the tracks that will play next."""
+        self.track_details.prefetch(self.playlist.upcoming(PREFETCH_AHEAD))
+        self._prioritize_analysis()
+    
+    # --- Background Analysis ---
+    def _start_analysis(self):
+        """Analyze every playlist track in the background (resumes where the last run stopped)."""
+        from utils.analysis import AnalysisScheduler
+        self.analysis = AnalysisScheduler(should_pause=self._analysis_paused)
+        self.analysis.set_tracks(self.playlist.tracks)
+        self._prioritize_analysis()
+        self._on_rows_shown(list(self.right_panel.shown_rows))
+        self.analysis.start()
+    
+    def _analyze_tracks(self, added: list = None):
+        """Tell the analyzer about playlist changes (appended tracks, or a rebuild)."""
+        if self.analysis is None:
+            return
+        if added is None:
+            self.analysis.set_tracks(self.playlist.tracks)
+        else:
+            self.analysis.add_tracks(added)
+    
+    def _prioritize_analysis(self):
+        from utils.analysis import CURRENT, UPCOMING
+        if self.analysis is None:
+            return
+        current = self.playlist.get_current()
+        self.analysis.prioritize(CURRENT, [current] if current else [])
+        self.analysis.prioritize(UPCOMING, self.playlist.upcoming(ANALYSIS_UPCOMING))
+    
+    def _on_rows_shown(self, positions: list):
+        from utils.analysis import VISIBLE
+        if self.analysis is None:
+            return
+        tracks = self.playlist.tracks
+        self.analysis.prioritize(VISIBLE, [tracks[i] for i in positions if i < len(tracks)])
+    
+    def _analysis_paused(self) -> bool:
+        """Analysis (worker threads) yields to loading tracks and to struggling playback."""
+        if not self.track_details.is_idle():
+            return True
+        player = self._player
+        return player is not None and player.stalled_within(ANALYSIS_STALL_BACKOFF_S)
 
-    def _load_track_details(self, filepath: str):
-        """Load track details in background thread."""
-        try:
-            # Get full metadata
-            meta = get_track_metadata(filepath)
-            
-            # Update UI from main thread
-            self.after(0, lambda: self.left_panel.set_title(
-                meta["title"], meta["artist"]
-            ))
-            
-            # Load album art
-            art = extract_album_art(filepath)
-            album_img = ImageTk.PhotoImage(art)
-            self.after(0, lambda: self._set_album_art(album_img))
-            
-            # Compute waveform (slowest operation)
-            try:
-                heights = compute_waveform(filepath)
-                self.after(0, lambda: self.left_panel.draw_waveform(heights))
-            except Exception:
-                self.after(0, lambda: self.left_panel.clear_waveform())
-                
-        except Exception as e:
-            print(f"Error loading track details: {e}")
-    
-    def _set_album_art(self, image):
-        """Set album art (called from main thread)."""
-        self.album_img = image  # Keep reference
+    # Track detail results (worker threads) - keyed, so a queued update for
+    # an older track is replaced rather than applied first
+    def _on_track_meta(self, token: int, filepath: str, meta: dict):
+        dispatcher.post(self._set_title, meta["title"], meta["artist"], token, filepath,
+                        meta["length"], key="track-title")
+    
+    def _on_track_art(self, token: int, image):
+        dispatcher.post(self._set_album_art, image, token, key="track-art")
+    
+    def _on_track_waveform(self, token: int, heights):
+        dispatcher.post(self._set_waveform, heights, token, key="track-waveform")
+    
+    def _set_title(self, title: str, artist: str, token: int, filepath: str = None,
+                   length: int = None):
+        """Set track title, and the probed length (called from main thread)."""
+        if token != self.latency.token:
+            return  # A newer track was loaded meanwhile
+        self.left_panel.set_title(title, artist)
+        if length and filepath == self.player.current_file and length != self.player.length:
+            self.player.length = length
+            self.left_panel.set_time(self.player.get_elapsed(), length)
+        self.latency.mark(token, "title")
+        if filepath and filepath == self.playlist.get_current():
+            # Tag title/artist become searchable in the filter box
+            self.playlist.annotate(self.playlist.current_index, title, artist)
+        self.current_meta = (title, artist)
+        self._session_changed()
+    
+    def _set_album_art(self, image, token: int):
+        """Set album art from a PIL image (called from main thread)."""
+        if token != self.latency.token:
+            return
+        from PIL import ImageTk
+        self.album_img = ImageTk.PhotoImage(image)  # Keep reference
         self.left_panel.set_album_art(self.album_img)
+        self.latency.mark(token, "art")
+    
+    def _set_waveform(self, heights, token: int):
+        """Draw or clear the waveform (called from main thread)."""
+        if token != self.latency.token:
+            return
+        if heights:
+            self.left_panel.draw_waveform(heights)
+        else:
+            self.left_panel.clear_waveform()
+        self.latency.mark(token, "waveform")
 
     # --- Seek Controls ---
     def _start_drag(self):
@@ -358,6 +587,7 @@ class MusicPlayerApp(ctk.CTk):
         if not self.player.seek(seconds):
             messagebox.showwarning("Seek", "Seek not supported on this format")
         self.left_panel.set_playing(True)
+        self._session_changed()
     
     def seek_relative(self, delta: int):
         """Seek forward or backward by delta seconds."""
@@ -373,10 +603,126 @@ class MusicPlayerApp(ctk.CTk):
     def _set_volume(self, val):
         self.player.set_volume(float(val))
         self.left_panel.set_muted(self.player.is_muted)
+        self._session_changed()
     
     def _toggle_mute(self):
         is_muted = self.player.toggle_mute()
         self.left_panel.set_muted(is_muted)
+        self._session_changed()
+    
+    # --- Equalizer ---
+    def _set_eq_preset(self, preset: str):
+        self.player.equalizer.set_preset(preset)
+        self._session_changed()
+    
+    # --- Session ---
+    def _restore_session(self):
+        """Rebuild playlist and player display from the last session without opening any audio file."""
+        state = self.session.load()
+        if not state:
+            return
+        
+        self.left_panel.set_volume(state.get("volume", DEFAULT_VOLUME))
+        self.left_panel.set_muted(state.get("muted", False))
+        if state.get("eq") in EQ_PRESETS:
+            self.left_panel.set_eq_preset(state["eq"])
+        
+        tracks = state["tracks"]
+        if tracks:
+            self.playlist.set_tracks(tracks, state.get("current", 0))
+            self._saved_revision = self.playlist.revision  # Already on disk
+            self.right_panel.set_items(state["names"])
+            self.right_panel.set_playing_index(self.playlist.current_index)
+            
+            filepath = self.playlist.get_current()
+            title = state.get("title") or os.path.splitext(os.path.basename(filepath))[0]
+            artist = state.get("artist", "")
+            length = state.get("length", 0)
+            position = state.get("position", 0)
+            self.current_meta = (title, artist)
+            self.left_panel.set_title(title, artist)
+            self.left_panel.set_time(position, length)
+            if length:
+                self.left_panel.set_seek_position((position / length) * 100)
+            state["path"] = filepath
+        
+        # Applied to the player once it exists (see the player property)
+        self.resume = state
+    
+    def _apply_resume(self):
+        """Hand the restored volume, EQ and cue position to a freshly built player."""
+        state, self.resume = self.resume, None
+        if not state:
+            return
+        player = self._player
+        player.set_volume(state.get("volume", DEFAULT_VOLUME))
+        if state.get("muted"):
+            player.toggle_mute()
+        if state.get("eq") in EQ_PRESETS:
+            player.equalizer.set_preset(state["eq"])
+        
+        filepath = state.get("path")
+        if filepath and filepath == self.playlist.get_current():
+            player.load(filepath, state.get("length", 0))
+            player.cue(state.get("position", 0))
+            self.resumed_path = filepath
+    
+    def _refresh_resumed_track(self):
+        """Lazily reload metadata, art and waveform for the restored track."""
+        filepath, self.resumed_path = self.resumed_path, None
+        if not filepath or filepath != self.player.current_file:
+            return
+        self.track_details.load(filepath, self.latency.begin())
+    
+    def _snapshot(self) -> dict:
+        """
+        Current session state (cheap - serialization happens on the writer
+        thread). The track list is only included when it changed since the
+        last snapshot, so position saves stay small.
+        """
+        title, artist = self.current_meta
+        state = {
+            "current": self.playlist.current_index,
+            "title": title,
+            "artist": artist,
+            "volume": round(self.left_panel.get_volume(), 3),
+            "eq": self.left_panel.get_eq_preset(),
+            "position": 0,
+            "length": 0,
+            "muted": False,
+        }
+        if self._player:
+            state["position"] = self._player.get_elapsed() if self._player.current_file else 0
+            state["length"] = self._player.length
+            state["muted"] = self._player.is_muted
+        elif self.resume:
+            for key in ("position", "length", "muted"):
+                state[key] = self.resume.get(key, state[key])
+        if self.playlist.revision != self._saved_revision:
+            state["tracks"] = list(self.playlist.tracks)
+            self._saved_revision = self.playlist.revision
+        return state
+    
+    def _session_changed(self):
+        """Schedule a snapshot; bursts of changes collapse into one write."""
+        if self._session_job is None:
+            self._session_job = self.after(SESSION_SAVE_DELAY_MS, self._save_session)
+    
+    def _save_session(self):
+        self._session_job = None
+        self._last_position_save = time.monotonic()
+        self.session.save_async(self._snapshot())
+    
+    def _on_close(self):
+        """Write the final snapshot synchronously, then quit."""
+        if self._session_job is not None:
+            self.after_cancel(self._session_job)
+            self._session_job = None
+        self.session.flush(self._snapshot())
+        if self.analysis is not None:
+            self.analysis.stop()
+        self.dispatcher.stop()
+        self.destroy()
     
     # --- UI Update Loop ---
     def _start_updater(self):
@@ -385,7 +731,7 @@ class MusicPlayerApp(ctk.CTk):
     
     def _update(self):
         """Periodic UI update."""
-        if self.player.current_file:
+        if self._player and self.player.current_file:
             if self.player.is_track_ended():
                 self.next_track()
             elif self.player.is_playing and not self.is_dragging:
@@ -394,5 +740,46 @@ class MusicPlayerApp(ctk.CTk):
                 if self.player.length:
                     pct = (elapsed / self.player.length) * 100
                     self.left_panel.set_seek_position(pct)
+                if time.monotonic() - self._last_position_save >= SESSION_POSITION_INTERVAL_S:
+                    self._session_changed()
+        
+        self.after(UPDATE_INTERVAL_MS, self._update)
+    
+    # --- Spectrum Visualizer ---
+    def _start_spectrum(self):
+        """Run the visualizer only while the window is mapped."""
+        self.bind("<Map>", self._on_map, add="+")
+        self.bind("<Unmap>", self._on_unmap, add="+")
+        self._set_spectrum_visible(True)
+    
+    def _on_map(self, event):
+        if event.widget is self:
+            self._set_spectrum_visible(True)
+    
+    def _on_unmap(self, event):
+        if event.widget is self:
+            self._set_spectrum_visible(False)
+    
+    def _set_spectrum_visible(self, visible: bool):
+        if visible == self.spectrum_visible:
+            return
+        self.spectrum_visible = visible
+        if self.spectrum:
+            self.spectrum.set_active(visible)
+        if visible:
+            self._update_spectrum()
+    
+    def _update_spectrum(self):
+        """Paint the newest analyzer frame, capped at SPECTRUM_FPS."""
+        if not self.spectrum_visible:
+            return
+        
+        frame = self.spectrum.get_frame() if self.spectrum else None
+        if frame:
+            self.left_panel.draw_spectrum(*frame)
+            self.spectrum_idle = False
+        elif not (self._player and self.player.is_playing) and not self.spectrum_idle:
+            self.left_panel.clear_spectrum()
+            self.spectrum_idle = True
         
-        self.after(UPDATE_INTERVAL_MS, self._update)
\ No newline at end of file
+        self.after(1000 // SPECTRUM_FPS, self._update_spectrum)
@@ -0,0 +1,93 @@
+"""
+Main-thread dispatcher - the one way background threads reach Tk
+
+Tk isn't safe to call from other threads, `after()` included. Workers
+post() callbacks instead: that only touches a lock and a dict. The Tk
+thread drains the queue every frame, running callbacks until a time
+budget is spent and leaving the rest for the next frame. Posts with the
+same key replace each other while queued, so a burst of updates to one
+target (a progress bar, a label) is applied once, with the latest value.
+"""
+import threading
+import time
+from collections import OrderedDict
+from tkinter import TclError
+from typing import Callable, Hashable, Optional
+
+from config.settings import DISPATCH_INTERVAL_MS, DISPATCH_BUDGET_MS
+
+
+class MainThreadDispatcher:
+    """
+    Thread-safe queue of callbacks run on the Tk thread in budgeted batches.
+
+    Unkeyed posts run in order. A keyed post replaces a queued one with
+    the same key and moves to the back of the queue, so it still runs
+    after everything posted before it.
+    """
+
+    def __init__(self, root, interval_ms: int = DISPATCH_INTERVAL_MS,
+                 budget_ms: float = DISPATCH_BUDGET_MS):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.budget = budget_ms / 1000
+        self._pending = OrderedDict()  # key -> (callback, args)
+        self._lock = threading.Lock()
+        self._job = None
+        self.dropped = 0               # Updates replaced before they ran
+
+    def post(self, callback: Callable, *args, key: Optional[Hashable] = None):
+        """Queue callback(*args) for the Tk thread. Safe from any thread."""
+        with self._lock:
+            if key is None:
+                key = object()
+            elif key in self._pending:
+                self._pending.move_to_end(key)
+                self.dropped += 1
+            self._pending[key] = (callback, args)
+
+    def start(self):
+        if self._job is None:
+            self._job = self.root.after(self.interval_ms, self._drain)
+
+    def stop(self):
+        if self._job is not None:
+            try:
+                self.root.after_cancel(self._job)
+            except TclError:
+                pass
+            self._job = None
+
+    def _drain(self):
+        deadline = time.perf_counter() + self.budget
+        while True:
+            with self._lock:
+                if not self._pending:
+                    break
+                _, (callback, args) = self._pending.popitem(last=False)
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Error in UI update: {e}")
+            if time.perf_counter() >= deadline:
+                break  # Out of budget - the rest waits for the next frame
+        try:
+            self._job = self.root.after(self.interval_ms, self._drain)
+        except TclError:
+            self._job = None  # Window destroyed
+
+
+_dispatcher = None
+
+
+def install(root) -> MainThreadDispatcher:
+    """Create and start the app's dispatcher (on the Tk thread)."""
+    global _dispatcher
+    _dispatcher = MainThreadDispatcher(root)
+    _dispatcher.start()
+    return _dispatcher
+
+
+def post(callback: Callable, *args, key: Optional[Hashable] = None):
+    """Run callback(*args) on the Tk thread; see MainThreadDispatcher.post."""
+    _dispatcher.post(callback, *args, key=key)
@@ -3,7 +3,6 @@ Left panel UI - Controls, waveform, and playback info
 """
 import customtkinter as ctk
 from tkinter import Canvas, ROUND
-from PIL import Image
 from config.settings import (
     BG_PRIMARY, BG_SECONDARY, BG_TERTIARY, BORDER_COLOR,
     FG_PRIMARY, FG_SECONDARY, FG_ACCENT,
@@ -12,9 +11,10 @@ from config.settings import (
     ACCENT_COLOR, ACCENT_HOVER, ACCENT_LIGHT,
     SLIDER_PROGRESS, SLIDER_FG, SLIDER_BUTTON,
     FONT_FAMILY, FONT_SIZE_TITLE, FONT_SIZE_NORMAL, FONT_SIZE_SMALL,
-    ALBUM_ART_SIZE
+    ALBUM_ART_SIZE, EQ_PRESETS, DEFAULT_EQ_PRESET,
+    SPECTRUM_BARS, SPECTRUM_WIDTH, SPECTRUM_HEIGHT, SPECTRUM_COLOR, VU_COLOR
 )
-from utils.paths import get_icon_path
+from utils.icons import get_icon
 from utils.tooltip import CTkTooltip
 
 class MarqueeLabel(ctk.CTkFrame):
@@ -150,20 +150,13 @@ class LeftPanel(ctk.CTkFrame):
     def _load_icons(self):
         """Load all icon images."""
         self.icons = {
-            "prev": ctk.CTkImage(
-                Image.open(get_icon_path("previous.png")), size=ICON_SIZE_CONTROL),
-            "play": ctk.CTkImage(
-                Image.open(get_icon_path("play.png")), size=ICON_SIZE_PLAY),
-            "pause": ctk.CTkImage(
-                Image.open(get_icon_path("pause.png")), size=ICON_SIZE_PLAY),
-            "next": ctk.CTkImage(
-                Image.open(get_icon_path("next.png")), size=ICON_SIZE_CONTROL),
-            "audio": ctk.CTkImage(
-                Image.open(get_icon_path("audio.png")), size=ICON_SIZE_VOLUME),
-            "mute": ctk.CTkImage(
-                Image.open(get_icon_path("mute.png")), size=ICON_SIZE_VOLUME),
-            "info": ctk.CTkImage(
-                Image.open(get_icon_path("info.png")), size=(18, 18)),
+            "prev": get_icon("previous.png", ICON_SIZE_CONTROL),
+            "play": get_icon("play.png", ICON_SIZE_PLAY),
+            "pause": get_icon("pause.png", ICON_SIZE_PLAY),
+            "next": get_icon("next.png", ICON_SIZE_CONTROL),
+            "audio": get_icon("audio.png", ICON_SIZE_VOLUME),
+            "mute": get_icon("mute.png", ICON_SIZE_VOLUME),
+            "info": get_icon("info.png", (18, 18)),
         }
     
     def _create_widgets(self):
@@ -434,6 +427,35 @@ class LeftPanel(ctk.CTkFrame):
             width=35
         )
         self.volume_label.pack(side="left", padx=(8, 0))
+        
+        # Equalizer preset
+        self.eq_var = ctk.StringVar(value=DEFAULT_EQ_PRESET)
+        self.eq_menu = ctk.CTkOptionMenu(
+            vol_frame,
+            values=list(EQ_PRESETS.keys()),
+            variable=self.eq_var,
+            width=120, height=26,
+            fg_color=BG_TERTIARY,
+            button_color=BG_TERTIARY,
+            button_hover_color=BORDER_COLOR,
+            dropdown_fg_color=BG_SECONDARY,
+            font=ctk.CTkFont(family=FONT_FAMILY, size=FONT_SIZE_SMALL),
+            command=self._on_eq_change
+        )
+        self.eq_menu.pack(side="right")
+        CTkTooltip(self.eq_menu, "Equalizer preset")
+        
+        # Live spectrum + VU meter
+        self.spectrum_canvas = Canvas(
+            vol_frame,
+            width=SPECTRUM_WIDTH,
+            height=SPECTRUM_HEIGHT,
+            bg=BG_PRIMARY,
+            bd=0,
+            highlightthickness=0
+        )
+        self.spectrum_canvas.pack(side="right", padx=(0, 10))
+        self._create_spectrum_items()
     
     def _on_seek_change(self, value):
         """Handle seek slider changes."""
@@ -446,6 +468,25 @@ class LeftPanel(ctk.CTkFrame):
         if self.callbacks.get("set_volume"):
             self.callbacks["set_volume"](value)
     
+    def _on_eq_change(self, preset: str):
+        """Handle equalizer preset changes."""
+        if self.callbacks.get("set_eq_preset"):
+            self.callbacks["set_eq_preset"](preset)
+    
+    def set_volume(self, value: float):
+        """Move the volume slider without firing its callback."""
+        self.volume_var.set(value)
+        self.volume_label.configure(text=f"{int(value * 100)}%")
+    
+    def get_volume(self) -> float:
+        return self.volume_var.get()
+    
+    def set_eq_preset(self, preset: str):
+        self.eq_var.set(preset)
+    
+    def get_eq_preset(self) -> str:
+        return self.eq_var.get()
+    
     def set_title(self, title: str, artist: str = ""):
         """Update the track title and artist display."""
         self.title_label.set_text(text=title if title else "No track loaded")
@@ -502,4 +543,42 @@ class LeftPanel(ctk.CTkFrame):
     
     def clear_waveform(self):
         """Clear the waveform display."""
-        self.wave_canvas.delete("all")
\ No newline at end of file
+        self.wave_canvas.delete("all")
+    
+    def _create_spectrum_items(self):
+        """Create the spectrum bars and VU meters once; frames only move them."""
+        vu_width = 4
+        bars_width = SPECTRUM_WIDTH - 2 * (vu_width + 2) - 4
+        step = bars_width / SPECTRUM_BARS
+        
+        self.spectrum_bars = []
+        for i in range(SPECTRUM_BARS):
+            x0 = int(i * step)
+            x1 = max(x0 + 1, int((i + 1) * step) - 1)
+            bar = self.spectrum_canvas.create_rectangle(
+                x0, SPECTRUM_HEIGHT, x1, SPECTRUM_HEIGHT,
+                fill=SPECTRUM_COLOR, width=0
+            )
+            self.spectrum_bars.append((bar, x0, x1))
+        
+        self.vu_bars = []
+        for i in range(2):
+            x0 = SPECTRUM_WIDTH - (2 - i) * (vu_width + 2)
+            bar = self.spectrum_canvas.create_rectangle(
+                x0, SPECTRUM_HEIGHT, x0 + vu_width, SPECTRUM_HEIGHT,
+                fill=VU_COLOR, width=0
+            )
+            self.vu_bars.append((bar, x0, x0 + vu_width))
+    
+    def draw_spectrum(self, levels: list, vu: tuple):
+        """Update spectrum bar heights (0-1) and VU levels (0-1)."""
+        for (bar, x0, x1), level in zip(self.spectrum_bars, levels):
+            top = SPECTRUM_HEIGHT - int(level * SPECTRUM_HEIGHT)
+            self.spectrum_canvas.coords(bar, x0, top, x1, SPECTRUM_HEIGHT)
+        for (bar, x0, x1), level in zip(self.vu_bars, vu):
+            top = SPECTRUM_HEIGHT - int(level * SPECTRUM_HEIGHT)
+            self.spectrum_canvas.coords(bar, x0, top, x1, SPECTRUM_HEIGHT)
+    
+    def clear_spectrum(self):
+        """Drop all spectrum and VU bars to zero."""
+        self.draw_spectrum([0.0] * SPECTRUM_BARS, (0.0, 0.0))
@@ -3,14 +3,15 @@ Right panel UI - Playlist management
 """
 import customtkinter as ctk
 import random
-from PIL import Image
+import sys
 from config.settings import (
     BG_PRIMARY, BG_SECONDARY, BG_TERTIARY, BORDER_COLOR,
     FG_PRIMARY, FG_SECONDARY, SELECTION_BG,
     ICON_SIZE_SMALL, ACCENT_COLOR, ACCENT_HOVER, ACCENT_LIGHT,
-    FONT_FAMILY, FONT_SIZE_TITLE, FONT_SIZE_NORMAL, FONT_SIZE_SMALL
+    FONT_FAMILY, FONT_SIZE_TITLE, FONT_SIZE_NORMAL, FONT_SIZE_SMALL,
+    PLAYLIST_ROW_HEIGHT
 )
-from utils.paths import get_icon_path
+from utils.icons import get_icon
 from utils.tooltip import CTkTooltip
 
 
@@ -36,22 +37,14 @@ class RightPanel(ctk.CTkFrame):
     def _load_icons(self):
         """Load all icon images."""
         self.icons = {
-            "clear": ctk.CTkImage(
-                Image.open(get_icon_path("clear.png")), size=(18, 18)),
-            "remove": ctk.CTkImage(
-                Image.open(get_icon_path("remove.png")), size=(18, 18)),
-            "add": ctk.CTkImage(
-                Image.open(get_icon_path("add_list.png")), size=(18, 18)),
-            "shuffle": ctk.CTkImage(
-                Image.open(get_icon_path("shuffle.png")), size=(16, 16)),
-            "up": ctk.CTkImage(
-                Image.open(get_icon_path("up.png")), size=(14, 14)),
-            "down": ctk.CTkImage(
-                Image.open(get_icon_path("down.png")), size=(14, 14)),
-            "youtube": ctk.CTkImage(
-                Image.open(get_icon_path("youtube.png")), size=(18, 18)),
-            "folder": ctk.CTkImage(
-                Image.open(get_icon_path("music_folder.png")), size=(18, 18)),
+            "clear": get_icon("clear.png", (18, 18)),
+            "remove": get_icon("remove.png", (18, 18)),
+            "add": get_icon("add_list.png", (18, 18)),
+            "shuffle": get_icon("shuffle.png", (16, 16)),
+            "up": get_icon("up.png", (14, 14)),
+            "down": get_icon("down.png", (14, 14)),
+            "youtube": get_icon("youtube.png", (18, 18)),
+            "folder": get_icon("music_folder.png", (18, 18)),
         }
     
     def _create_widgets(self):
@@ -149,24 +142,48 @@ class RightPanel(ctk.CTkFrame):
         add_btn.pack(side="left")
         CTkTooltip(add_btn, "Add local files")
         
+        # ===== Filter Box =====
+        self.filter_entry = ctk.CTkEntry(
+            self,
+            placeholder_text="Filter playlist...",
+            font=ctk.CTkFont(family=FONT_FAMILY, size=11),
+            height=26,
+            corner_radius=6,
+            fg_color=BG_TERTIARY,
+            border_color=BG_TERTIARY,
+            text_color=FG_PRIMARY
+        )
+        self.filter_entry.pack(fill="x", padx=10, pady=(0, 6))
+        self.filter_entry.bind("<KeyRelease>", lambda e: self._on_filter_change())
+        self.filter_entry.bind("<Escape>", lambda e: self.clear_filter())
+        self.filter_text = ""
+        self.view = None  # Playlist positions shown while filtering
+        self.shown_rows = ()  # Playlist positions on screen, last reported
+        self._refilter_job = None
+        
         # ===== Playlist Container - MAXIMIZED =====
         list_container = ctk.CTkFrame(
             self, fg_color=BG_TERTIARY, corner_radius=8
         )
         list_container.pack(fill="both", expand=True, padx=10, pady=(0, 6))
         
-        # Scrollable frame
-        self.playlist_scroll = ctk.CTkScrollableFrame(
+        # Virtual list - a fixed pool of row widgets shows a window of self.items
+        self.scrollbar = ctk.CTkScrollbar(
             list_container,
-            fg_color="transparent",
-            scrollbar_button_color=BG_SECONDARY,
-            scrollbar_button_hover_color=ACCENT_COLOR
+            button_color=BG_SECONDARY,
+            button_hover_color=ACCENT_COLOR,
+            command=self._on_scrollbar
         )
-        self.playlist_scroll.pack(fill="both", expand=True, padx=2, pady=2)
+        self.scrollbar.pack(side="right", fill="y", padx=(0, 2), pady=2)
+        
+        self.rows_frame = ctk.CTkFrame(list_container, fg_color="transparent")
+        self.rows_frame.pack(fill="both", expand=True, padx=2, pady=2)
+        self.rows_frame.bind("<Configure>", self._on_list_resize)
+        self._bind_wheel(self.rows_frame)
         
         # Empty state
         self.empty_label = ctk.CTkLabel(
-            self.playlist_scroll,
+            self.rows_frame,
             text="No tracks added\n\nUse + to add files\nor 📁 to load folder",
             font=ctk.CTkFont(family=FONT_FAMILY, size=11),
             text_color=FG_SECONDARY,
@@ -174,7 +191,8 @@ class RightPanel(ctk.CTkFrame):
         )
         self.empty_label.pack(expand=True, pady=30)
         
-        self.track_frames = []
+        self.rows = []
+        self.top = 0
         
         # ===== Bottom Controls - COMPACT =====
         bottom = ctk.CTkFrame(self, fg_color="transparent", height=32)
@@ -202,25 +220,42 @@ class RightPanel(ctk.CTkFrame):
         )
         clear_btn.pack(side="left")
         CTkTooltip(clear_btn, "Clear playlist")
+        
+        # Playlist files
+        export_btn = ctk.CTkButton(
+            bottom, text="Export",
+            width=55, height=28, fg_color=BG_TERTIARY,
+            hover_color="#3d4248", corner_radius=6,
+            font=ctk.CTkFont(family=FONT_FAMILY, size=10),
+            command=self.callbacks.get("export_playlist", lambda: None)
+        )
+        export_btn.pack(side="right")
+        CTkTooltip(export_btn, "Save playlist (M3U, PLS, XSPF, JSON)")
+        
+        import_btn = ctk.CTkButton(
+            bottom, text="Import",
+            width=55, height=28, fg_color=BG_TERTIARY,
+            hover_color="#3d4248", corner_radius=6,
+            font=ctk.CTkFont(family=FONT_FAMILY, size=10),
+            command=self.callbacks.get("import_playlist", lambda: None)
+        )
+        import_btn.pack(side="right", padx=(0, 4))
+        CTkTooltip(import_btn, "Open playlist (M3U, PLS, XSPF, JSON)")
     
-    def _create_track_item(self, index: int, name: str):
-        """Create a single track item - COMPACT."""
-        frame = ctk.CTkFrame(
-            self.playlist_scroll,
+    def _create_row(self, slot: int):
+        """Create one reusable row widget - COMPACT."""
+        inner = ctk.CTkFrame(
+            self.rows_frame,
             fg_color="transparent",
             corner_radius=4,
-            height=24  # Compact height
+            height=PLAYLIST_ROW_HEIGHT  # Compact height
         )
-        frame.pack(fill="x", pady=0)  # No vertical padding
-        frame.pack_propagate(False)
-        
-        inner = ctk.CTkFrame(frame, fg_color="transparent", corner_radius=4)
-        inner.pack(fill="both", expand=True)
+        inner.pack_propagate(False)
         
         # Track number
         num_label = ctk.CTkLabel(
             inner,
-            text=f"{index + 1:02d}",
+            text="",
             font=ctk.CTkFont(family=FONT_FAMILY, size=10),
             text_color=FG_SECONDARY,
             width=22
@@ -228,41 +263,158 @@ class RightPanel(ctk.CTkFrame):
         num_label.pack(side="left", padx=(6, 3))
         
         # Track name - compact
-        display_name = name[:38] + "..." if len(name) > 38 else name
         name_label = ctk.CTkLabel(
             inner,
-            text=display_name,
+            text="",
             font=ctk.CTkFont(family=FONT_FAMILY, size=11),
             text_color=FG_PRIMARY,
             anchor="w"
         )
         name_label.pack(side="left", fill="x", expand=True, padx=2)
         
-        # Bind events
-        for widget in [frame, inner, num_label, name_label]:
-            widget.bind("<Button-1>", lambda e, i=index: self._on_select(i))
+        # Bind events - rows are recycled, so resolve the index on each event
+        for widget in [inner, num_label, name_label]:
+            widget.bind("<Button-1>", lambda e, s=slot: self._on_row_click(s))
             widget.bind("<Double-Button-1>", lambda e: self.callbacks["play_selected"]())
-            widget.bind("<Enter>", lambda e, f=inner: f.configure(fg_color=BG_SECONDARY))
-            widget.bind("<Leave>", lambda e, f=inner, i=index: 
-                       f.configure(fg_color=ACCENT_COLOR if i == self.selected_index else "transparent"))
+            widget.bind("<Enter>", lambda e, s=slot: self._hover_row(s))
+            widget.bind("<Leave>", lambda e, s=slot: self._paint_row(s))
+            self._bind_wheel(widget)
         
-        return frame, inner, name_label
+        return {"frame": inner, "num": num_label, "name": name_label, "text": None}
+    
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self._on_mousewheel)
+        widget.bind("<Button-4>", self._on_mousewheel)
+        widget.bind("<Button-5>", self._on_mousewheel)
+    
+    def _on_list_resize(self, event):
+        """Keep one row widget per visible line."""
+        needed = max(1, event.height // PLAYLIST_ROW_HEIGHT)
+        while len(self.rows) < needed:
+            self.rows.append(self._create_row(len(self.rows)))
+        self._render()
+    
+    def _row_count(self) -> int:
+        return len(self.view) if self.view is not None else len(self.items)
+    
+    def _row_index(self, row: int) -> int:
+        """Playlist position shown on list row `row`."""
+        return self.view[row] if self.view is not None else row
+    
+    def _visible_count(self) -> int:
+        height = self.rows_frame.winfo_height()
+        return max(1, min(len(self.rows), height // PLAYLIST_ROW_HEIGHT))
+    
+    def _scroll_to(self, top: int):
+        max_top = max(0, self._row_count() - self._visible_count())
+        top = max(0, min(int(top), max_top))
+        if top != self.top:
+            self.top = top
+            self._render()
+    
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self._scroll_to(float(value) * self._row_count())
+        elif unit == "pages":
+            self._scroll_to(self.top + int(value) * self._visible_count())
+        else:
+            self._scroll_to(self.top + int(value))
+    
+    def _on_mousewheel(self, event):
+        if sys.platform.startswith("win"):
+            delta = -int(event.delta / 40)
+        elif sys.platform == "darwin":
+            delta = -event.delta
+        else:
+            delta = -3 if event.num == 4 else 3
+        self._scroll_to(self.top + delta)
+    
+    def see(self, index: int):
+        """Scroll so that playlist position `index` is visible."""
+        if self.view is not None:
+            if index not in self.view:
+                return
+            index = self.view.index(index)
+        visible = self._visible_count()
+        if index < self.top:
+            self._scroll_to(index)
+        elif index >= self.top + visible:
+            self._scroll_to(index - visible + 1)
+    
+    def _render(self):
+        """Show list rows top..top + rows in the row pool."""
+        count = self._row_count()
+        visible = self._visible_count()
+        self.top = max(0, min(self.top, count - visible))
+        
+        for slot, row in enumerate(self.rows):
+            row_number = self.top + slot
+            if slot >= visible or row_number >= count:
+                if row["text"] is not None:
+                    row["frame"].pack_forget()
+                    row["text"] = None
+                continue
+            
+            index = self._row_index(row_number)
+            name = self.items[index]
+            display_name = name[:38] + "..." if len(name) > 38 else name
+            text = (index, display_name)
+            if row["text"] != text:
+                if row["text"] is None:
+                    row["frame"].pack(fill="x", pady=0)  # No vertical padding
+                row["num"].configure(text=f"{index + 1:02d}")
+                row["name"].configure(text=display_name)
+                row["text"] = text
+            self._paint_row(slot)
+        
+        if count:
+            self.scrollbar.set(self.top / count, min(1.0, (self.top + visible) / count))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        
+        shown = tuple(self._row_index(r) for r in range(self.top, min(count, self.top + visible)))
+        if shown != self.shown_rows:
+            self.shown_rows = shown
+            if self.callbacks.get("rows_shown"):
+                self.callbacks["rows_shown"](list(shown))
+    
+    def _paint_row(self, slot: int):
+        row_number = self.top + slot
+        index = self._row_index(row_number) if row_number < self._row_count() else -1
+        color = ACCENT_COLOR if index == self.selected_index else "transparent"
+        row = self.rows[slot]
+        if row.get("color") != color:
+            row["frame"].configure(fg_color=color)
+            row["color"] = color
+    
+    def _hover_row(self, slot: int):
+        """Highlight a row under the mouse; _paint_row() restores it on leave."""
+        row = self.rows[slot]
+        if row.get("color") != BG_SECONDARY:
+            row["frame"].configure(fg_color=BG_SECONDARY)
+            row["color"] = BG_SECONDARY
+    
+    def _on_row_click(self, slot: int):
+        row_number = self.top + slot
+        if row_number < self._row_count():
+            self._on_select(self._row_index(row_number))
     
     def _on_select(self, index: int):
         """Handle track selection."""
-        if 0 <= self.selected_index < len(self.track_frames):
-            self.track_frames[self.selected_index][1].configure(fg_color="transparent")
-        
         self.selected_index = index
-        if 0 <= index < len(self.track_frames):
-            self.track_frames[index][1].configure(fg_color=ACCENT_COLOR)
+        for slot in range(len(self.rows)):
+            self._paint_row(slot)
     
     def set_playing_index(self, index: int):
         """Highlight the currently playing track."""
         self._on_select(index)
+        if 0 <= index < len(self.items):
+            self.see(index)
     
     def _move_up(self):
         """Move selected track up."""
+        if self.view is not None:
+            return  # Neighbours aren't visible while filtering
         if self.selected_index <= 0 or self.selected_index >= len(self.items):
             return
         
@@ -272,11 +424,14 @@ class RightPanel(ctk.CTkFrame):
         if self.callbacks.get("reorder"):
             self.callbacks["reorder"](idx, idx - 1)
         
-        self._rebuild_list()
         self._on_select(idx - 1)
+        self.see(idx - 1)
+        self._render()
     
     def _move_down(self):
         """Move selected track down."""
+        if self.view is not None:
+            return
         if self.selected_index < 0 or self.selected_index >= len(self.items) - 1:
             return
         
@@ -286,82 +441,109 @@ class RightPanel(ctk.CTkFrame):
         if self.callbacks.get("reorder"):
             self.callbacks["reorder"](idx, idx + 1)
         
-        self._rebuild_list()
         self._on_select(idx + 1)
+        self.see(idx + 1)
+        self._render()
     
     def _shuffle_playlist(self):
         """Shuffle all tracks randomly."""
         if len(self.items) < 2:
             return
+        self.clear_filter()
         
-        random.shuffle(self.items)
+        order = list(range(len(self.items)))
+        random.shuffle(order)
+        self.items = [self.items[i] for i in order]
         
         if self.callbacks.get("shuffle"):
-            self.callbacks["shuffle"](self.items)
+            self.callbacks["shuffle"](order)
         
-        self._rebuild_list()
         self.selected_index = -1
-    
-    def _rebuild_list(self):
-        """Rebuild the entire track list display."""
-        for frame, _, _ in self.track_frames:
-            frame.destroy()
-        self.track_frames = []
-        
-        for i, name in enumerate(self.items):
-            frame_data = self._create_track_item(i, name)
-            self.track_frames.append(frame_data)
+        self._render()
     
     def get_selection(self) -> int:
         return self.selected_index
     
     def refresh(self, items: list):
-        self.clear()
-        for item in items:
-            self.add_item(item)
+        self.set_items(items)
+    
+    def set_items(self, items: list):
+        """Replace the whole list in one go (no per-track widgets are built)."""
+        self.items = list(items)
+        self.selected_index = -1
+        self.top = 0
+        self._items_changed()
     
     def add_item(self, name: str):
-        self.empty_label.pack_forget()
-        
-        index = len(self.track_frames)
-        frame_data = self._create_track_item(index, name)
-        self.track_frames.append(frame_data)
-        self.items.append(name)
-        
-        self._update_count()
+        self.add_items([name])
+    
+    def add_items(self, names: list):
+        self.items.extend(names)
+        self._items_changed()
     
     def remove_item(self, index: int):
-        if 0 <= index < len(self.track_frames):
-            self.track_frames[index][0].destroy()
-            del self.track_frames[index]
+        if 0 <= index < len(self.items):
             del self.items[index]
             
             if self.selected_index == index:
                 self.selected_index = -1
             elif self.selected_index > index:
                 self.selected_index -= 1
+            if self.view is not None:
+                # Later positions shift down by one
+                self.view = [p - (p > index) for p in self.view if p != index]
             
-            self._rebuild_list()
-            self._update_count()
-            
-            if self.selected_index >= 0:
-                self._on_select(self.selected_index)
-            
-            if not self.track_frames:
-                self.empty_label.pack(expand=True, pady=30)
+            self._items_changed()
+    
+    def _items_changed(self):
+        if self.view is not None:
+            # Never render positions that no longer exist; the filter is
+            # re-run once the playlist is updated too
+            count = len(self.items)
+            self.view = [p for p in self.view if p < count]
+            if self._refilter_job is None:
+                self._refilter_job = self.after_idle(self._refilter)
+        if self.items:
+            self.empty_label.pack_forget()
+        else:
+            self.empty_label.pack(expand=True, pady=30)
+        self._render()
+        self._update_count()
     
     def _update_count(self):
-        count = len(self.track_frames)
-        self.count_label.configure(text=f"{count} track{'s' if count != 1 else ''}")
+        count = len(self.items)
+        text = f"{count} track{'s' if count != 1 else ''}"
+        if self.view is not None:
+            text = f"{len(self.view)} of {text}"
+        self.count_label.configure(text=text)
     
-    def clear(self):
-        for frame, _, _ in self.track_frames:
-            frame.destroy()
-        self.track_frames = []
-        self.items = []
-        self.selected_index = -1
+    # --- Filter ---
+    def _on_filter_change(self):
+        text = self.filter_entry.get()
+        if text != self.filter_text:
+            self.filter_text = text
+            self._refilter()
+    
+    def _refilter(self):
+        self._refilter_job = None
+        if self.callbacks.get("filter"):
+            self.callbacks["filter"](self.filter_text)
+    
+    def set_filter(self, positions):
+        """Show only these playlist positions, in this order (None shows everything)."""
+        self.view = positions
+        self.top = 0
+        self._render()
         self._update_count()
-        self.empty_label.pack(expand=True, pady=30)
+    
+    def clear_filter(self):
+        if self.filter_text:
+            self.filter_entry.delete(0, "end")
+            self.filter_text = ""
+            self.set_filter(None)
+    
+    def clear(self):
+        self.set_items([])
     
     def get_items(self) -> list:
-        return self.items.copy()
\ No newline at end of file
+        return self.items.copy()
@@ -2,43 +2,73 @@
 YouTube Search Panel - Search and download music from YouTube
 """
 import customtkinter as ctk
-import requests
-from io import BytesIO
-from PIL import Image
-import threading
+from concurrent.futures import ThreadPoolExecutor
 from config.settings import (
     BG_PRIMARY, BG_SECONDARY, BG_TERTIARY,
     FG_PRIMARY, FG_SECONDARY,
     ACCENT_COLOR, ACCENT_HOVER, ACCENT_LIGHT,
-    FONT_FAMILY, FONT_SIZE_NORMAL, FONT_SIZE_SMALL, ICON_SIZE_SMALL
+    FONT_FAMILY, FONT_SIZE_NORMAL, FONT_SIZE_SMALL, ICON_SIZE_SMALL,
+    SEARCH_DEBOUNCE_MS, SEARCH_MIN_CHARS, SEARCH_MAX_IN_FLIGHT
 )
-from utils.paths import get_icon_path
+from ui import dispatcher
+from utils.icons import get_icon
+from utils.thumbnails import get_thumbnail_loader, youtube_thumbnail_url
 from utils.tooltip import CTkTooltip
-from utils.youtube import search_youtube, download_audio, get_download_folder
+from utils.youtube import SearchStream, get_download_folder
+from utils.downloads import ACTIVE_STATES, MP3, NATIVE, DONE, CANCELLED
+from utils.download_index import get_download_index
+from utils.progress import format_speed, format_eta
+from utils.ytdl_pool import get_pool, PRECONNECT_URL
+
+THUMB_SIZE = (60, 60)
 
 
 class SearchPanel(ctk.CTkToplevel):
     """YouTube search and download panel."""
     
-    def __init__(self, parent, on_download_complete: callable):
+    def __init__(self, parent, downloads, on_play_local=None):
         super().__init__(parent)
         
-        self.on_download_complete = on_download_complete
+        self.downloads = downloads  # Shared DownloadManager
+        self.index = get_download_index()  # Videos we already have
+        self.on_play_local = on_play_local
         self.search_results = []
         self.selected_index = -1
-        self.is_downloading = False
+        self._reset_job = None
+        self.current_query = None
+        self.search_generation = 0  # Bumped per search; older results are dropped
+        self.stream = None  # SearchStream of the current query
+        self._shown_generation = None
+        self._search_job = None
+        self._search_futures = []
+        self._search_executor = ThreadPoolExecutor(
+            max_workers=SEARCH_MAX_IN_FLIGHT, thread_name_prefix="search")
+        self.thumb_futures = []
+        self.meta_labels = []
+        self._item_states = {}  # Download id -> last state seen by the listener
         
         self._setup_window()
         self._load_icons()
         self._create_widgets()
         
+        # Downloads outlive the panel; it only shows their progress
+        self.downloads.add_listener(self._on_download_event)
+        self.bind("<Destroy>", self._on_destroy)
+        self._refresh_progress()
+        
+        # Pick up files downloaded since the index was last saved
+        self.index.scan_async(on_done=self._on_index_scanned)
+        
+        # Get yt-dlp and a YouTube connection ready while the user types
+        get_pool("search").warm(preconnect=PRECONNECT_URL)
+        
         # Focus on search entry
         self.search_entry.focus()
     
     def _setup_window(self):
         """Configure the window."""
         self.title("YouTube Search")
-        self.geometry("500x520")
+        self.geometry("500x550")
         self.configure(fg_color=BG_PRIMARY)
         self.resizable(False, False)
         
@@ -49,16 +79,14 @@ class SearchPanel(ctk.CTkToplevel):
         # Position
         self.update_idletasks()
         x = self.master.winfo_x() + (self.master.winfo_width() - 500) // 2
-        y = self.master.winfo_y() + (self.master.winfo_height() - 520) // 2
+        y = self.master.winfo_y() + (self.master.winfo_height() - 550) // 2
         self.geometry(f"+{x}+{y}")
     
     def _load_icons(self):
         """Load icons."""
         self.icons = {
-            "search": ctk.CTkImage(
-                Image.open(get_icon_path("search.png")), size=ICON_SIZE_SMALL),
-            "download": ctk.CTkImage(
-                Image.open(get_icon_path("download.png")), size=ICON_SIZE_SMALL),
+            "search": get_icon("search.png", ICON_SIZE_SMALL),
+            "download": get_icon("download.png", ICON_SIZE_SMALL),
         }
     
     def _create_widgets(self):
@@ -91,6 +119,7 @@ class SearchPanel(ctk.CTkToplevel):
         )
         self.search_entry.pack(side="left", fill="x", expand=True, padx=(0, 10))
         self.search_entry.bind("<Return>", lambda e: self._do_search())
+        self.search_entry.bind("<KeyRelease>", self._on_query_typed)
         
         self.search_btn = ctk.CTkButton(
             search_frame,
@@ -141,13 +170,26 @@ class SearchPanel(ctk.CTkToplevel):
         
         self.result_frames = []
         
+        # Packed after the last result while more pages are available
+        self.more_btn = ctk.CTkButton(
+            self.results_scroll,
+            text="Load more",
+            height=28,
+            fg_color=BG_TERTIARY,
+            hover_color=ACCENT_COLOR,
+            text_color=FG_PRIMARY,
+            corner_radius=8,
+            font=ctk.CTkFont(family=FONT_FAMILY, size=FONT_SIZE_SMALL),
+            command=self._load_more
+        )
+        
         # ===== Progress Bar =====
         self.progress_frame = ctk.CTkFrame(self, fg_color="transparent")
         self.progress_frame.pack(fill="x", padx=20, pady=(0, 10))
         
         self.progress_bar = ctk.CTkProgressBar(
             self.progress_frame,
-            width=350,
+            width=220,  # Leaves room for speed and ETA
             height=8,
             progress_color=ACCENT_COLOR,
             fg_color=BG_TERTIARY
@@ -181,6 +223,22 @@ class SearchPanel(ctk.CTkToplevel):
         )
         self.download_btn.pack(pady=(0, 20))
         
+        # ===== Audio Format =====
+        self.native_var = ctk.BooleanVar(value=self.downloads.audio_format == NATIVE)
+        native_check = ctk.CTkCheckBox(
+            self,
+            text="Keep original audio (Opus/M4A, no re-encode)",
+            variable=self.native_var,
+            command=self._on_format_toggle,
+            font=ctk.CTkFont(family=FONT_FAMILY, size=FONT_SIZE_SMALL),
+            text_color=FG_SECONDARY,
+            fg_color=ACCENT_COLOR,
+            hover_color=ACCENT_HOVER,
+            checkbox_width=16, checkbox_height=16
+        )
+        native_check.pack(pady=(0, 8))
+        CTkTooltip(native_check, "Saves YouTube's own stream instead of converting to MP3")
+        
         # ===== Folder Info =====
         folder_label = ctk.CTkLabel(
             self,
@@ -190,121 +248,172 @@ class SearchPanel(ctk.CTkToplevel):
         )
         folder_label.pack(pady=(0, 10))
     
+    def _on_format_toggle(self):
+        """Format for new downloads (already queued ones keep theirs)."""
+        self.downloads.audio_format = NATIVE if self.native_var.get() else MP3
+    
+    def _on_query_typed(self, event):
+        """Search once typing pauses (Enter still searches right away)."""
+        if event.keysym == "Return":
+            return
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+            self._search_job = None
+        query = self.search_entry.get().strip()
+        if len(query) >= SEARCH_MIN_CHARS and query != self.current_query:
+            self._search_job = self.after(SEARCH_DEBOUNCE_MS, self._do_search)
+    
     def _do_search(self):
         """Perform YouTube search."""
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+            self._search_job = None
         query = self.search_entry.get().strip()
         if not query:
             return
         
-        # Update UI
+        # Update UI - the previous results stay up until new ones arrive
         self.status_label.configure(text="Searching...")
-        self.search_btn.configure(state="disabled")
-        self._clear_results()
+        self.more_btn.pack_forget()
+        
+        self.current_query = query
+        self.search_generation += 1
+        generation = self.search_generation
+        
+        # Searches still waiting for a worker are for older queries
+        for future in self._search_futures:
+            future.cancel()
+        self._search_futures = [f for f in self._search_futures if not f.done()]
+        if self.stream is not None:
+            self.stream.close()
+        stream = self.stream = SearchStream(query)
+        
+        # Results are shown one by one as they arrive; cached queries come
+        # back instantly and a stale entry may be replaced later (on_update)
+        def run():
+            if generation != self.search_generation:
+                return  # Superseded while queued
+            stream.first_page(
+                on_result=lambda result: self._post(self._add_result, generation, result,
+                                                    generation=generation),
+                on_update=lambda results: self._post(self._replace_results, generation, results,
+                                                     generation=generation)
+            )
+            self._fetch_ahead(generation, stream)
+        
+        self._search_futures.append(self._search_executor.submit(run))
+    
+    def _load_more(self):
+        """Show the next page - usually prefetched already."""
+        stream = self.stream
+        if stream is None or not stream.has_more:
+            return
+        generation = self.search_generation
+        self.more_btn.pack_forget()
+        self.status_label.configure(text="Loading more...")
         
-        # Search in background
-        def search_thread():
-            results = search_youtube(query)
-            self.after(0, lambda: self._show_results(results))
+        def run():
+            stream.next_page(
+                on_result=lambda result: self._post(self._add_result, generation, result,
+                                                    generation=generation))
+            self._fetch_ahead(generation, stream)
         
-        thread = threading.Thread(target=search_thread, daemon=True)
-        thread.start()
+        self._search_futures.append(self._search_executor.submit(run))
+    
+    def _fetch_ahead(self, generation: int, stream):
+        """After a page (worker thread): show it as done, then prefetch the next."""
+        self._post(self._page_done, generation, generation=generation, key="page")
+        stream.prefetch()
+        self._post(self._page_done, generation, generation=generation, key="page")
+    
+    def _post(self, callback, *args, generation: int = None, key: str = None):
+        """
+        Run callback on the UI thread while the panel is open - and, given
+        a search generation, only if no newer search has started. Safe
+        from worker threads; keyed posts replace a queued one.
+        """
+        def run():
+            if generation is not None and generation != self.search_generation:
+                return
+            if self.winfo_exists():
+                callback(*args)
+        dispatcher.post(run, key=(id(self), key) if key else None)
+    
+    def _add_result(self, generation: int, result: dict):
+        """Append one result; the first of a new search replaces the old ones."""
+        if self._shown_generation != generation:
+            self._clear_results()
+            self._shown_generation = generation
+            self.empty_label.pack_forget()
+        self.search_results.append(result)
+        self.result_frames.append(self._create_result_item(len(self.search_results) - 1, result))
+        self.status_label.configure(text=f"Found {len(self.search_results)} results (Thala for a reason!)")
+    
+    def _replace_results(self, generation: int, results: list):
+        """Swap in refreshed results for a stale cached first page."""
+        self._shown_generation = None
+        for result in results:
+            self._add_result(generation, result)
+        self._page_done(generation)
+    
+    def _page_done(self, generation: int):
+        """A page finished loading: report empty searches, offer the next page."""
+        if self._shown_generation != generation:
+            self._clear_results()
+            self._shown_generation = generation
+            self.status_label.configure(text="No results found")
+            self.empty_label.pack(expand=True, pady=50)
+            return
+        self.status_label.configure(text=f"Found {len(self.search_results)} results (Thala for a reason!)")
+        if self.stream is not None and self.stream.has_more:
+            self.more_btn.pack(pady=(4, 6))
+        else:
+            self.more_btn.pack_forget()
     
     def _clear_results(self):
         """Clear search results."""
+        for future in self.thumb_futures:
+            future.cancel()  # Thumbnails nobody will see
+        self.thumb_futures = []
         for frame in self.result_frames:
             frame.destroy()
         self.result_frames = []
+        self.meta_labels = []
         self.search_results = []
         self.selected_index = -1
-        self.download_btn.configure(state="disabled")
-
-    def _refresh_result_thumbnail(self, index):
-        """Update the thumbnail inside the correct placeholder label."""
-        try:
-            thumb = self.search_results[index].get("thumb_image")
-            widget = self.search_results[index].get("thumb_widget")
+        self.more_btn.pack_forget()
+        self._update_download_button()
 
-            if thumb and widget:
-                widget.configure(image=thumb, text="")
-        except Exception:
-            pass
-
-    def _create_thumbnail_image(self, index, img_bytes):
-        """Create CTkImage and update UI in main thread."""
-        try:
-            # Check if index is still valid
-            if index >= len(self.search_results):
-                return
-                
-            # Convert bytes back to PIL Image - FIXED
-            # We need to create a new PIL Image from the bytes, not pass the BytesIO object
-            pil_image = Image.open(img_bytes)
-            
-            # Create the CTkImage - FIXED: pass the PIL Image directly
-            thumb_image = ctk.CTkImage(
-                light_image=pil_image,  # This should be the PIL Image, not BytesIO
-                dark_image=pil_image,   # This should be the PIL Image, not BytesIO
-                size=(60, 60)
-            )
-            
-            # Store in results
-            self.search_results[index]["thumb_image"] = thumb_image
-            
-            # Update the thumbnail widget if it exists
-            thumb_widget = self.search_results[index].get("thumb_widget")
-            if thumb_widget and thumb_widget.winfo_exists():
-                thumb_widget.configure(image=thumb_image, text="")
-
-        except Exception:
-            pass  # Ignore errors in thumbnail creation
-
-    def _load_thumbnail(self, index, result):
-        """Load thumbnail in background thread."""
-        try:
-            url = result.get("thumbnail")
-            if not url:
-                return
-
-            response = requests.get(url, timeout=10)
-            if response.status_code != 200:
-                return
-                
-            img = Image.open(BytesIO(response.content))
-            img = img.resize((60, 60), Image.Resampling.LANCZOS)
-            
-            # Convert to bytes for thread-safe transfer
-            img_bytes = BytesIO()
-            img.save(img_bytes, format='PNG')
-            img_bytes.seek(0)
-            
-            # Pass the image data to main thread
-            self.after(0, lambda: self._create_thumbnail_image(index, img_bytes))
-            
-        except Exception:
-            pass  # Ignore thumbnail loading errors
-    
-    def _show_results(self, results: list):
-        """Display search results."""
-        self.search_btn.configure(state="normal")
-        self.search_results = results
+    def _request_thumbnail(self, result: dict, thumb_label):
+        """Show the result's thumbnail - from memory now, or when the loader has it."""
+        scale = ctk.ScalingTracker.get_widget_scaling(self)
+        size = (round(THUMB_SIZE[0] * scale), round(THUMB_SIZE[1] * scale))
+        video_id = result.get("id")
+        url = youtube_thumbnail_url(video_id, size) if video_id else result.get("thumbnail")
+        if not url:
+            return
         
-        if not results:
-            self.status_label.configure(text="No results found")
-            self.empty_label.pack(expand=True, pady=50)
+        loader = get_thumbnail_loader()
+        image = loader.get_cached(url, size)
+        if image is not None:
+            self._set_thumbnail(thumb_label, image)
             return
         
-        self.status_label.configure(text=f"Found {len(results)} results (Thala for a reason!)")
-        self.empty_label.pack_forget()
-        
-        for i, result in enumerate(results):
-            # download thumbnail in background thread
-            threading.Thread(
-                target=self._load_thumbnail,
-                args=(i, result),
-                daemon=True
-            ).start()
-            frame = self._create_result_item(i, result)
-            self.result_frames.append(frame)
+        def on_loaded(image):
+            if image is not None:
+                self._post(self._set_thumbnail, thumb_label, image)
+        
+        self.thumb_futures.append(loader.load(url, size, on_loaded))
+    
+    def _set_thumbnail(self, thumb_label, pil_image):
+        """Put a loaded PIL image into a result's placeholder (main thread)."""
+        try:
+            if not thumb_label.winfo_exists():
+                return  # Results were replaced
+            thumb_image = ctk.CTkImage(light_image=pil_image, dark_image=pil_image, size=THUMB_SIZE)
+            thumb_label.configure(image=thumb_image, text="")
+        except Exception:
+            pass  # Ignore errors in thumbnail creation
     
     def _create_result_item(self, index: int, result: dict):
         """Create a single search result item with thumbnail."""
@@ -338,17 +447,9 @@ class SearchPanel(ctk.CTkToplevel):
         )
         thumb_label.pack()
         
-        # Store widget reference immediately
-        result["thumb_widget"] = thumb_label
-        
-        # Start loading thumbnail
-        threading.Thread(
-            target=self._load_thumbnail,
-            args=(index, result),
-            daemon=True
-        ).start()
+        # Load thumbnail on the shared pool
+        self._request_thumbnail(result, thumb_label)
         
-        # Rest of your existing _create_result_item code...
         info_frame = ctk.CTkFrame(inner, fg_color="transparent")
         info_frame.pack(side="left", fill="both", expand=True, pady=5)
         
@@ -366,16 +467,16 @@ class SearchPanel(ctk.CTkToplevel):
         )
         title_label.pack(anchor="w")
         
-        # Channel + Duration
-        meta_text = f"{result.get('channel', '')} • {result.get('duration', '')}"
+        # Channel + Duration (marked if we already have it)
         meta_label = ctk.CTkLabel(
             info_frame,
-            text=meta_text,
+            text="",
             font=ctk.CTkFont(family=FONT_FAMILY, size=10),
-            text_color=FG_SECONDARY,
             anchor="w"
         )
         meta_label.pack(anchor="w")
+        self.meta_labels.append(meta_label)
+        self._mark_result(index)
         
         # Bind click/hover events
         clickable_widgets = [frame, inner, thumb_label, info_frame, title_label, meta_label]
@@ -393,6 +494,25 @@ class SearchPanel(ctk.CTkToplevel):
         
         return frame
 
+    def _mark_result(self, index: int):
+        """Show whether a result is already downloaded."""
+        result = self.search_results[index]
+        meta_text = f"{result.get('channel', '')} • {result.get('duration', '')}"
+        if self.index.get(result.get('id')):
+            self.meta_labels[index].configure(text=f"✓ Downloaded • {meta_text}", text_color=ACCENT_LIGHT)
+        else:
+            self.meta_labels[index].configure(text=meta_text, text_color=FG_SECONDARY)
+    
+    def _refresh_marks(self):
+        """Re-check every shown result against the index."""
+        for index in range(len(self.meta_labels)):
+            self._mark_result(index)
+        self._update_download_button()
+    
+    def _on_index_scanned(self):
+        """Index scan finished (worker thread)."""
+        self._post(self._refresh_marks, key="marks")
+    
     def _on_select(self, index: int):
         """Handle result selection."""
         # Deselect previous
@@ -406,68 +526,104 @@ class SearchPanel(ctk.CTkToplevel):
         if 0 <= index < len(self.result_frames):
             for child in self.result_frames[index].winfo_children():
                 child.configure(fg_color=ACCENT_COLOR)
-            self.download_btn.configure(state="normal")
+        self._update_download_button()
+    
+    def _selected_download(self):
+        """Active queue item for the selected result, if any."""
+        if not 0 <= self.selected_index < len(self.search_results):
+            return None
+        item = self.downloads.find(url=self.search_results[self.selected_index]['url'])
+        return item if item and item.state in ACTIVE_STATES else None
+    
+    def _selected_local_file(self):
+        """Downloaded file for the selected result, if we have it."""
+        if not 0 <= self.selected_index < len(self.search_results):
+            return None
+        return self.index.get(self.search_results[self.selected_index].get('id'))
+    
+    def _update_download_button(self):
+        """Download the selection, play it if we have it, or cancel it if it's queued."""
+        if not 0 <= self.selected_index < len(self.search_results):
+            self.download_btn.configure(state="disabled", text="Download Selected")
+        elif self.on_play_local and self._selected_local_file():
+            self.download_btn.configure(state="normal", text="Play Downloaded")
+        elif self._selected_download():
+            self.download_btn.configure(state="normal", text="Cancel Download")
+        else:
+            self.download_btn.configure(state="normal", text="Download Selected")
     
     def _do_download(self):
-        """Download selected video."""
-        if self.selected_index < 0 or self.is_downloading:
+        """Queue the selected video (or cancel it if it's already queued)."""
+        if self.selected_index < 0:
             return
         
-        result = self.search_results[self.selected_index]
-        
-        # Show progress
-        self.is_downloading = True
-        self.progress_frame.pack(fill="x", padx=20, pady=(0, 10))
-        self.progress_bar.set(0)
-        self.progress_label.configure(text="Starting...")
-        self.download_btn.configure(state="disabled", text="Downloading...")
-        
-        def on_progress(percent, status):
-            self.after(0, lambda: self._update_progress(percent, status))
-        
-        def on_complete(filepath):
-            self.after(0, lambda: self._download_complete(filepath))
+        # Already downloaded - no network, no ffmpeg
+        local_file = self._selected_local_file()
+        if local_file and self.on_play_local:
+            self.on_play_local(local_file)
+            return
         
-        def on_error(error):
-            self.after(0, lambda: self._download_error(error))
+        item = self._selected_download()
+        if item:
+            self.downloads.cancel(item.id)
+            return
         
-        download_audio(
-            url=result['url'],
-            title=result['title'],
-            on_progress=on_progress,
-            on_complete=on_complete,
-            on_error=on_error
-        )
+        result = self.search_results[self.selected_index]
+        self.downloads.add(result['url'], result['title'], video_id=result.get('id'))
     
-    def _update_progress(self, percent: float, status: str):
-        """Update progress bar."""
-        self.progress_bar.set(percent / 100)
-        self.progress_label.configure(text=status)
+    def _on_download_event(self, item):
+        """Download listener (worker thread) - coalesced into one UI refresh."""
+        self._post(self._refresh_progress, key="progress")
+        if self._item_states.get(item.id) != item.state:
+            # Progress ticks only touch the progress widgets; state changes
+            # can change the marks (finished) or the button (cancel/play)
+            self._item_states[item.id] = item.state
+            if item.state in (DONE, CANCELLED):
+                self._post(self._refresh_marks, key="marks")
+            else:
+                self._post(self._update_download_button, key="button")
     
-    def _download_complete(self, filepath: str):
-        """Handle download completion."""
-        self.is_downloading = False
-        self.progress_label.configure(text="✓ Download complete!")
-        self.download_btn.configure(state="normal", text="Download Selected")
-        
-        # Notify parent to add to playlist
-        if self.on_download_complete:
-            self.on_download_complete(filepath)
-        
-        # Reset after delay
-        self.after(2000, self._reset_progress)
+    def _refresh_progress(self):
+        """Show the aggregated progress of the current download batch."""
+        summary = self.downloads.summary()
+        if not summary["total"]:
+            return
+        
+        if self._reset_job is not None:
+            self.after_cancel(self._reset_job)
+            self._reset_job = None
+        self.progress_frame.pack(fill="x", padx=20, pady=(0, 10), before=self.download_btn)
+        self.progress_bar.set(summary["fraction"])
+        
+        finished = summary["done"] + summary["failed"]
+        if summary["active"]:
+            status = "Converting..." if summary["converting"] and not summary["downloading"] else "Downloading..."
+            text = f"{finished}/{summary['total']} · {status}"
+            if summary["downloading"] and summary["speed"]:
+                text += f" {format_speed(summary['speed'])}"
+            if summary["eta"] is not None:
+                text += f" · {format_eta(summary['eta'])} left"
+        elif summary["failed"]:
+            text = f"✓ {summary['done']} downloaded, ✗ {summary['failed']} failed"
+        else:
+            text = "✓ Download complete!" if summary["total"] == 1 else f"✓ {summary['done']} downloads complete!"
+        self.progress_label.configure(text=text)
+        
+        if not summary["active"]:
+            # Reset after delay
+            self._reset_job = self.after(3000, self._reset_progress)
     
-    def _download_error(self, error: str):
-        """Handle download error."""
-        self.is_downloading = False
-        self.progress_label.configure(text=f"✗ Error: {error[:50]}")
-        self.download_btn.configure(state="normal", text="Download Selected")
-        
-        # Reset after delay
-        self.after(3000, self._reset_progress)
+    def _on_destroy(self, event):
+        if event.widget is self:
+            self.downloads.remove_listener(self._on_download_event)
+            self.search_generation += 1  # Drop results still on their way
+            if self.stream is not None:
+                self.stream.close()
+            self._search_executor.shutdown(wait=False, cancel_futures=True)
     
     def _reset_progress(self):
         """Reset progress bar."""
+        self._reset_job = None
         self.progress_bar.set(0)
         self.progress_label.configure(text="")
         self.progress_frame.pack_forget()
\ No newline at end of file
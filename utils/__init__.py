@@ -1,5 +1,27 @@
-from .paths import resource_path, get_icon_path
-from .metadata import get_track_metadata, extract_album_art
-from .waveform import compute_waveform
-from .windows_patch import apply_windows_patch, configure_pydub
-from .tooltip import CTkTooltip, add_tooltip
\ No newline at end of file
+"""
+Utility helpers - submodules load on first attribute access to keep startup light
+"""
+import importlib
+
+_EXPORTS = {
+    "resource_path": "paths",
+    "get_icon_path": "paths",
+    "probe_track": "metadata",
+    "read_source_url": "metadata",
+    "get_track_metadata": "metadata",
+    "extract_album_art": "metadata",
+    "compute_waveform": "waveform",
+    "apply_windows_patch": "windows_patch",
+    "configure_pydub": "windows_patch",
+    "CTkTooltip": "tooltip",
+    "add_tooltip": "tooltip",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f".{module}", __name__), name)
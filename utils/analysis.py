@@ -0,0 +1,331 @@
+"""
+Background track analysis - tags and waveform for every playlist track
+
+Only the current and next few tracks used to get a waveform, and only
+for the session. The scheduler works through the whole playlist in the
+background and keeps each result on disk, keyed by the file's path,
+mtime and size, so a track analyzed once shows its waveform instantly
+from then on - after a restart too.
+
+Work is picked from a priority queue: the current track, then upcoming
+tracks, then rows visible in the playlist, then everything else in
+playlist order. The decoding and tag parsing run in low-priority
+worker processes (utils.analysis_pool), which stand aside whenever
+`should_pause()` says so (a track is loading, playback stuttered
+recently).
+"""
+import base64
+import hashlib
+import heapq
+import json
+import os
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+
+from config.settings import (
+    ANALYSIS_CACHE_DIR, ANALYSIS_WORKERS, ANALYSIS_POLL_S, ANALYSIS_MAX_CRASHES, WAVEFORM_HEIGHT
+)
+
+# Queue tiers, most urgent first
+CURRENT, UPCOMING, VISIBLE, BACKGROUND = range(4)
+
+META_KEYS = ("title", "artist", "length", "display_title")
+
+
+class AnalysisStore:
+    """
+    One small JSON record per analyzed track. Peaks are stored normalized
+    (0..1, one byte each) and scaled to the requested height on read.
+    A track whose file changed reads as not analyzed.
+    """
+
+    def __init__(self, cache_dir: str = ANALYSIS_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _record_path(self, filepath: str) -> str:
+        digest = hashlib.sha1(os.path.abspath(filepath).encode("utf-8", "surrogatepass")).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.json")
+
+    def get(self, filepath: str) -> Optional[dict]:
+        """Record of an up-to-date analysis: "meta" and "peaks" (array or None), or None."""
+        stamp = _file_stamp(filepath)
+        if stamp is None:
+            return None
+        try:
+            with open(self._record_path(filepath), encoding="utf-8") as f:
+                record = json.load(f)
+            if record["path"] != filepath or record["stamp"] != stamp:
+                return None
+            peaks = record["peaks"]
+            if peaks is not None:
+                peaks = np.frombuffer(base64.b64decode(peaks), dtype=np.uint8) / 255.0
+            return {"meta": record["meta"], "peaks": peaks}
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def has(self, filepath: str) -> bool:
+        return self.get(filepath) is not None
+
+    def heights(self, filepath: str, height: int = WAVEFORM_HEIGHT) -> Optional[list]:
+        """Stored waveform scaled like compute_waveform(), or None."""
+        record = self.get(filepath)
+        if record is None or record["peaks"] is None:
+            return None
+        return (record["peaks"] * (height / 2)).tolist()
+
+    def put(self, filepath: str, meta: Optional[dict], peaks):
+        """Save an analysis; peaks=None records a file that couldn't be decoded."""
+        stamp = _file_stamp(filepath)
+        if stamp is None:
+            return
+        if peaks is not None:
+            quantized = np.round(np.clip(np.asarray(peaks, dtype=np.float32), 0, 1) * 255)
+            peaks = base64.b64encode(quantized.astype(np.uint8).tobytes()).decode("ascii")
+        record = {
+            "version": 1,
+            "path": filepath,
+            "stamp": stamp,
+            "meta": {k: meta[k] for k in META_KEYS} if meta else None,
+            "peaks": peaks,
+        }
+        path = self._record_path(filepath)
+        tmp = f"{path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(record, f, separators=(",", ":"))
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Error saving analysis: {e}")
+
+    def put_heights(self, filepath: str, heights: list, height: int = WAVEFORM_HEIGHT):
+        """Save a waveform computed for display (tags are left to the scheduler)."""
+        if heights is None or self.has(filepath):
+            return
+        self.put(filepath, None, np.asarray(heights, dtype=np.float32) / (height / 2))
+
+
+class AnalysisScheduler:
+    """
+    Analyzes playlist tracks that have no stored analysis, most urgent first.
+
+    set_tracks()/add_tracks() give the playlist (BACKGROUND tier, in
+    order); prioritize(tier, paths) replaces the tracks of one of the
+    CURRENT, UPCOMING and VISIBLE tiers - a track takes the most urgent
+    tier it's in. `should_pause()` is polled from the workers, also while
+    a decode runs; an interrupted track is requeued.
+    """
+
+    def __init__(self, store: AnalysisStore = None, workers: int = ANALYSIS_WORKERS,
+                 should_pause: Callable[[], bool] = None):
+        self.store = store or AnalysisStore()
+        self.workers = max(1, workers)
+        self.should_pause = should_pause or (lambda: False)
+        self._cond = threading.Condition()
+        self._heap = []          # (tier, seq, path); stale when it no longer matches _pending
+        self._pending = {}       # path -> (tier, seq) it's queued at
+        self._order = {}         # path -> playlist position
+        self._tiers = {CURRENT: {}, UPCOMING: {}, VISIBLE: {}}  # tier -> {path: seq}
+        self._finished = set()   # Paths checked or analyzed this session
+        self._crashes = {}       # path -> times it took its worker process down
+        self._suspects = set()   # Paths in flight when some worker died; retried solo
+        self._threads = []
+        self._pool = None
+        self._stopped = False
+        self.analyzed = 0        # Tracks analyzed this session
+
+    # ===== Queue =====
+
+    def set_tracks(self, paths: Iterable[str]):
+        """Replace the whole playlist."""
+        with self._cond:
+            self._order = {}
+            for path in paths:
+                self._order.setdefault(path, len(self._order))
+            candidates = set(self._order)
+            for tier_paths in self._tiers.values():
+                candidates.update(tier_paths)
+            self._pending = {}
+            for path in candidates - self._finished:
+                self._pending[path] = self._rank(path)
+            self._heap = [(tier, seq, path) for path, (tier, seq) in self._pending.items()]
+            heapq.heapify(self._heap)
+            self._cond.notify_all()
+
+    def add_tracks(self, paths: Iterable[str]):
+        """Tracks appended to the playlist."""
+        with self._cond:
+            for path in paths:
+                if path not in self._order:
+                    self._order[path] = len(self._order)
+                    self._requeue(path)
+            self._cond.notify_all()
+
+    def prioritize(self, tier: int, paths: Iterable[str]):
+        """Make `paths` (in this order) the tracks of `tier`."""
+        paths = list(paths)
+        with self._cond:
+            old = self._tiers[tier]
+            self._tiers[tier] = {}
+            for path in paths:
+                self._tiers[tier].setdefault(path, len(self._tiers[tier]))
+            for path in set(old) | set(paths):
+                self._requeue(path)  # Promoted, or back to where it was
+            self._cond.notify_all()
+
+    def pending(self) -> int:
+        """Tracks still to check or analyze."""
+        with self._cond:
+            return len(self._pending)
+
+    # Callers hold _cond
+
+    def _rank(self, path: str):
+        for tier in (CURRENT, UPCOMING, VISIBLE):
+            seq = self._tiers[tier].get(path)
+            if seq is not None:
+                return tier, seq
+        return BACKGROUND, self._order.get(path, len(self._order))
+
+    def _requeue(self, path: str):
+        if path in self._finished:
+            return
+        if path not in self._order and not any(path in t for t in self._tiers.values()):
+            self._pending.pop(path, None)  # Left the playlist
+            return
+        rank = self._rank(path)
+        if self._pending.get(path) != rank:
+            self._pending[path] = rank
+            heapq.heappush(self._heap, (*rank, path))
+
+    def _take(self) -> Optional[str]:
+        """Most urgent pending path; blocks while there is none. None once stopped."""
+        with self._cond:
+            while not self._stopped:
+                while self._heap:
+                    tier, seq, path = heapq.heappop(self._heap)
+                    if self._pending.get(path) == (tier, seq):
+                        del self._pending[path]
+                        self._finished.add(path)
+                        return path
+                self._cond.wait()
+            return None
+
+    # ===== Workers =====
+
+    def start(self):
+        """Start the worker processes and one feeding thread per process."""
+        from utils.analysis_pool import AnalysisPool
+        with self._cond:
+            if self._threads:
+                return
+            try:
+                self._pool = AnalysisPool(self.workers)
+            except (OSError, ValueError) as e:
+                print(f"Error starting analysis workers: {e}")
+                return
+            self._stopped = False
+            for slot in range(self.workers):
+                thread = threading.Thread(target=self._run, args=(self._pool, slot),
+                                          name=f"analysis-{slot}", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+
+    def stop(self):
+        """Stop the workers; an analysis in progress is abandoned."""
+        with self._cond:
+            self._stopped = True
+            self._threads = []
+            pool, self._pool = self._pool, None
+            self._cond.notify_all()
+        if pool is not None:
+            pool.close()
+
+    def _interrupted(self) -> bool:
+        return self._stopped or self.should_pause()
+
+    def _run(self, pool, slot: int):
+        while True:
+            path = self._take()
+            if path is None:
+                return
+            while not self._stopped and self.should_pause():
+                time.sleep(ANALYSIS_POLL_S)
+            if self._stopped:
+                return
+            try:
+                done = self._analyze(pool, slot, path)
+            except Exception as e:
+                if self._stopped:
+                    return
+                print(f"Error analyzing {os.path.basename(path)}: {e}")
+                continue
+            if not done:
+                with self._cond:
+                    self._finished.discard(path)  # Interrupted - try again later
+                    self._requeue(path)
+
+    def _analyze(self, pool, slot: int, path: str) -> bool:
+        """Store the analysis of `path` unless it's stored already. False to retry later."""
+        from utils.analysis_pool import WorkerCrashed
+
+        record = self.store.get(path)
+        if record is not None and record["meta"] is not None:
+            return True
+        if not os.path.isfile(path):
+            return True  # Missing - nothing to analyze
+
+        # The player may have stored the waveform already; then only tags are missing
+        try:
+            result = pool.analyze(path, slot, want_peaks=record is None,
+                                  cancelled=self._interrupted, solo=path in self._suspects)
+        except WorkerCrashed as e:
+            if not e.attributed:
+                # Another file may have killed the pool - retry alone before blaming this one
+                self._suspects.add(path)
+                return False
+            crashes = self._crashes[path] = self._crashes.get(path, 0) + 1
+            if crashes < ANALYSIS_MAX_CRASHES:
+                return False
+            # Keeps crashing its worker - recorded so it isn't retried until it changes
+            print(f"Analysis worker crashed on {os.path.basename(path)}; skipping it")
+            self.store.put(path, _fallback_meta(path), None)
+            self._suspects.discard(path)
+            return True
+        if result is None:
+            return False
+        peaks = record["peaks"] if record is not None else result["peaks"]
+        self.store.put(path, result["meta"] or _fallback_meta(path), peaks)
+        self._suspects.discard(path)
+        self.analyzed += 1
+        return True
+
+
+def _fallback_meta(path: str) -> dict:
+    """Tags of a file whose tags can't be read: the file name."""
+    title = os.path.splitext(os.path.basename(path))[0]
+    return {"title": title, "artist": "Unknown artist", "length": 0, "display_title": title}
+
+
+def _file_stamp(filepath: str):
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return [stat.st_mtime, stat.st_size]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_analysis_store() -> AnalysisStore:
+    """Process-wide analysis store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = AnalysisStore()
+        return _store
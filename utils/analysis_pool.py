@@ -0,0 +1,217 @@
+"""
+Out-of-process analysis - waveform decode and tag parsing in worker processes
+
+Decoding in a thread of the UI process still costs that process CPU
+time and GIL hand-offs (sample conversion, peak reduction, tag parsing),
+which shows up as jank in scrolling labels and sliders. The pool runs
+that work in separate processes instead:
+
+- Peaks come back through one shared-memory block with a slot per
+  caller thread. Only the tags and a peak count are pickled.
+- The same block holds a cancel flag per slot, so a decode in a worker
+  stops as soon as the player needs the CPU.
+- A worker that dies (a malformed file crashing a decoder) takes only
+  its pool down. The pool is rebuilt and every call that was running
+  raises WorkerCrashed. Only a call that ran alone (`solo`) knows the
+  crash was its own file's doing.
+"""
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Callable, Optional
+
+import numpy as np
+
+from config.settings import WAVEFORM_WIDTH, ANALYSIS_POLL_S
+
+FLAGS_BYTES = 64  # Cancel flags (one byte per slot) ahead of the peak slots
+
+
+class WorkerCrashed(Exception):
+    """
+    A worker process died while this file was being analyzed. `attributed`
+    is True when nothing else was running, so this file caused it.
+    """
+
+    def __init__(self, path: str, attributed: bool):
+        super().__init__(path)
+        self.attributed = attributed
+
+
+def _layout(buf, slots: int, width: int):
+    flags = np.ndarray((slots,), dtype=np.uint8, buffer=buf)
+    peaks = np.ndarray((slots, width), dtype=np.float32, buffer=buf, offset=FLAGS_BYTES)
+    return flags, peaks
+
+
+class AnalysisPool:
+    """
+    Worker processes for analyze(). Each calling thread uses its own
+    `slot` (0..slots-1), so at most `slots` analyses run at once. A
+    `solo` call waits until no other analysis runs and keeps the pool to
+    itself, so a crash during it is known to be its file's.
+    """
+
+    def __init__(self, slots: int, width: int = WAVEFORM_WIDTH):
+        if slots > FLAGS_BYTES:
+            raise ValueError(f"At most {FLAGS_BYTES} analysis slots")
+        self.slots = slots
+        self.width = width
+        self.crashes = 0
+        self._shm = shared_memory.SharedMemory(create=True, size=FLAGS_BYTES + slots * width * 4)
+        self._flags, self._peaks = _layout(self._shm.buf, slots, width)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._closed = False
+        self._gate = threading.Condition()
+        self._running = 0          # analyze() calls in progress
+        self._solo = False         # A solo call holds the pool
+
+    def _get_executor(self, slot: int) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Analysis pool is closed")
+            self._flags[slot] = 0
+            if self._executor is None:
+                # Never fork the UI process (Tk, audio and worker threads)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.slots,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self._shm.name, self.slots, self.width),
+                )
+            return self._executor
+
+    def _discard(self, executor: ProcessPoolExecutor):
+        """Drop a broken executor; the next call starts a fresh one."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+                self.crashes += 1
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def analyze(self, path: str, slot: int, want_peaks: bool = True,
+                cancelled: Callable[[], bool] = None, solo: bool = False) -> Optional[dict]:
+        """
+        Tags and (if `want_peaks`) normalized peaks of `path`, or None if
+        `cancelled()` became true first. Returns {"meta": dict or None,
+        "peaks": float32 array, or None if it couldn't be decoded}.
+        Raises WorkerCrashed if a worker died meanwhile.
+        """
+        with self._gate:
+            while self._solo or (solo and self._running):
+                self._gate.wait()
+            self._solo = solo
+            self._running += 1
+        try:
+            return self._analyze(path, slot, want_peaks, cancelled, solo or self.slots == 1)
+        finally:
+            with self._gate:
+                self._running -= 1
+                if solo:
+                    self._solo = False
+                self._gate.notify_all()
+
+    def _analyze(self, path: str, slot: int, want_peaks: bool,
+                 cancelled: Optional[Callable[[], bool]], alone: bool) -> Optional[dict]:
+        executor = self._get_executor(slot)
+        try:
+            future = executor.submit(_analyze_file, path, slot, want_peaks)
+        except BrokenProcessPool:
+            self._discard(executor)
+            raise WorkerCrashed(path, False)  # Broken before this file even started
+
+        while True:
+            try:
+                result = future.result(timeout=ANALYSIS_POLL_S)
+                break
+            except FutureTimeout:
+                if cancelled is not None and cancelled():
+                    with self._lock:
+                        if not self._closed:
+                            self._flags[slot] = 1  # The worker stops at its next block
+            except CancelledError:
+                return None  # Pool closed before it started
+            except BrokenProcessPool:
+                self._discard(executor)
+                raise WorkerCrashed(path, alone)
+
+        if result is None:
+            return None
+        count = result.pop("count")
+        with self._lock:
+            if self._closed:
+                return None
+            result["peaks"] = self._peaks[slot, :count].copy() if count >= 0 else None
+        return result
+
+    def close(self):
+        """Stop the workers (abandoning running analyses) and free the shared block."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            executor, self._executor = self._executor, None
+            self._flags[:] = 1
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            self._flags = self._peaks = None  # Views must go before the block can close
+            self._shm.close()
+            try:
+                self._shm.unlink()
+            except OSError:
+                pass
+
+
+# ===== Worker process side =====
+
+_worker = {}
+
+
+def _init_worker(shm_name: str, slots: int, width: int):
+    """Attach to the shared block and step out of the way of the UI process."""
+    if sys.platform == "win32":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), 0x4000)  # BELOW_NORMAL_PRIORITY_CLASS
+    elif hasattr(os, "nice"):
+        try:
+            os.nice(10)
+        except OSError:
+            pass
+    shm = shared_memory.SharedMemory(name=shm_name)
+    flags, peaks = _layout(shm.buf, slots, width)
+    _worker.update(shm=shm, flags=flags, peaks=peaks, width=width)
+
+
+def _analyze_file(path: str, slot: int, want_peaks: bool) -> Optional[dict]:
+    """Runs in a worker: peaks go to the slot, the rest is returned."""
+    from utils.metadata import probe_track
+    from utils.waveform import compute_waveform
+
+    flags, peaks_out = _worker["flags"], _worker["peaks"]
+    count = -1
+    if want_peaks:
+        try:
+            # height=2 yields peaks normalized to 0..1
+            peaks = compute_waveform(path, _worker["width"], 2,
+                                     cancelled=lambda: flags[slot] != 0)
+        except Exception:
+            peaks = None  # Undecodable
+        else:
+            if peaks is None:
+                return None  # Cancelled
+            count = len(peaks)
+            peaks_out[slot, :count] = peaks
+
+    try:
+        probe = probe_track(path)
+        meta = {k: probe[k] for k in ("title", "artist", "length", "display_title")}
+    except Exception:
+        meta = None
+    return {"meta": meta, "count": count}
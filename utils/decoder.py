@@ -0,0 +1,74 @@
+"""
+PCM decoding through an ffmpeg pipe - streams samples instead of loading whole files
+"""
+import os
+import subprocess
+import sys
+from typing import Optional
+import numpy as np
+
+from utils.paths import find_ffmpeg
+from config.settings import AUDIO_SAMPLE_RATE, AUDIO_CHANNELS
+
+
+class PCMDecoder:
+    """Reads 16-bit PCM from an ffmpeg subprocess in fixed-size blocks."""
+
+    def __init__(self, filepath: str, start: float = 0.0,
+                 sample_rate: int = AUDIO_SAMPLE_RATE,
+                 channels: int = AUDIO_CHANNELS,
+                 low_priority: bool = False):
+        self.filepath = filepath
+        self.sample_rate = sample_rate
+        self.channels = channels
+
+        cmd = [find_ffmpeg(), "-nostdin", "-v", "error"]
+        if start > 0:
+            cmd += ["-ss", f"{start:.3f}"]  # Input seek - fast, no decode
+        cmd += [
+            "-i", filepath,
+            "-vn",
+            "-f", "s16le", "-acodec", "pcm_s16le",
+            "-ac", str(channels), "-ar", str(sample_rate),
+            "pipe:1",
+        ]
+        # Background decodes (prefetch, analysis) yield the CPU to playback
+        flags = subprocess.BELOW_NORMAL_PRIORITY_CLASS if low_priority and sys.platform == "win32" else 0
+        self.process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=1 << 16,
+            creationflags=flags,
+        )
+        if low_priority and hasattr(os, "setpriority"):
+            try:
+                os.setpriority(os.PRIO_PROCESS, self.process.pid, 10)
+            except OSError:
+                pass
+
+    def read_block(self, frames: int) -> Optional[np.ndarray]:
+        """
+        Read up to `frames` frames as float32 shaped (frames, channels).
+        Returns None at end of stream.
+        """
+        frame_bytes = 2 * self.channels
+        data = self.process.stdout.read(frames * frame_bytes)
+        usable = len(data) - len(data) % frame_bytes
+        if usable <= 0:
+            return None
+        samples = np.frombuffer(data[:usable], dtype=np.int16)
+        return samples.reshape(-1, self.channels).astype(np.float32) / 32768.0
+
+    def close(self):
+        """Stop ffmpeg and release the pipe."""
+        try:
+            self.process.kill()
+        except Exception:
+            pass
+        try:
+            self.process.stdout.close()
+            self.process.wait(timeout=2)
+        except Exception:
+            pass
@@ -0,0 +1,213 @@
+"""
+Index of YouTube videos already on disk - video ID -> local file
+
+Built from the source URL each download is tagged with, so files from
+earlier sessions (and older versions) count too. The index is saved
+with each file's mtime and size: a rescan only parses tags of new or
+changed files, and finished downloads are added as they complete.
+"""
+import json
+import os
+import re
+import threading
+from typing import Callable, Optional
+
+from config.settings import MUSIC_DOWNLOAD_FOLDER, DOWNLOAD_INDEX_FILE, AUDIO_EXTENSIONS
+
+VIDEO_ID_RE = re.compile(r"(?:[?&]v=|youtu\.be/|/shorts/|/embed/)([\w-]{11})")
+
+
+def video_id_from_url(url: str) -> Optional[str]:
+    """YouTube video ID in a watch/short/embed URL, or None."""
+    match = VIDEO_ID_RE.search(url or "")
+    return match.group(1) if match else None
+
+
+class DownloadIndex:
+    """
+    Maps YouTube video IDs to downloaded files in `folder`.
+
+    get() is a dict lookup plus one stat (vanished files are dropped), so
+    it's cheap enough to call per search result on the UI thread.
+    """
+
+    def __init__(self, folder: str = MUSIC_DOWNLOAD_FOLDER,
+                 state_file: str = DOWNLOAD_INDEX_FILE):
+        self.folder = folder
+        self.state_file = state_file
+        self._files = {}   # path -> [mtime, size, video_id or None]
+        self._ids = {}     # video_id -> path
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._loaded = False
+        self._scan_thread = None
+        self._scan_callbacks = []
+
+    # ===== Lookup =====
+
+    def get(self, video_id: str) -> Optional[str]:
+        """Local file for `video_id`, or None."""
+        if not video_id:
+            return None
+        self._ensure_loaded()
+        with self._lock:
+            path = self._ids.get(video_id)
+        if path is None:
+            return None
+        if not os.path.isfile(path):
+            with self._lock:
+                self._forget(path)
+            return None
+        return path
+
+    def __len__(self):
+        self._ensure_loaded()
+        with self._lock:
+            return len(self._ids)
+
+    # ===== Updates =====
+
+    def add(self, video_id: str, path: str):
+        """Record a finished download."""
+        if not video_id or not path:
+            return
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        self._ensure_loaded()
+        with self._lock:
+            self._record(path, stat.st_mtime, stat.st_size, video_id)
+        self._save()
+
+    def on_download(self, item):
+        """DownloadManager listener - index items as they finish."""
+        from utils.downloads import DONE
+        if item.state == DONE and item.filepath:
+            self.add(item.video_id or video_id_from_url(item.url), item.filepath)
+
+    def attach(self, manager):
+        """Index finished items of `manager` now and from then on."""
+        from utils.downloads import DONE
+        for item in manager.get_items():
+            if item.state == DONE:
+                self.on_download(item)
+        manager.add_listener(self.on_download)
+
+    def scan(self) -> int:
+        """Pick up files added, changed or removed in `folder`. Returns files parsed."""
+        from utils.metadata import read_source_url
+        self._ensure_loaded()
+        try:
+            entries = [e for e in os.scandir(self.folder)
+                       if e.name.lower().endswith(AUDIO_EXTENSIONS) and e.is_file()]
+        except OSError:
+            entries = []
+
+        parsed = 0
+        seen = set()
+        for entry in entries:
+            path = entry.path
+            seen.add(path)
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            with self._lock:
+                known = self._files.get(path)
+            if known and known[0] == stat.st_mtime and known[1] == stat.st_size:
+                continue
+            video_id = video_id_from_url(read_source_url(path))
+            parsed += 1
+            with self._lock:
+                self._record(path, stat.st_mtime, stat.st_size, video_id)
+
+        folder = os.path.dirname(os.path.join(self.folder, "_"))
+        with self._lock:
+            gone = [p for p in self._files if p not in seen and os.path.dirname(p) == folder]
+            for path in gone:
+                self._forget(path)
+        if parsed or gone:
+            self._save()
+        return parsed
+
+    def scan_async(self, on_done: Optional[Callable[[], None]] = None) -> threading.Thread:
+        """scan() on a daemon thread; joins a scan that is already running."""
+        with self._lock:
+            if on_done:
+                self._scan_callbacks.append(on_done)
+            thread = self._scan_thread
+            if thread is not None and thread.is_alive():
+                return thread
+
+            def _run():
+                try:
+                    self.scan()
+                except Exception as e:
+                    print(f"Error scanning downloads: {e}")
+                with self._lock:
+                    callbacks, self._scan_callbacks = self._scan_callbacks, []
+                    self._scan_thread = None
+                for callback in callbacks:
+                    callback()
+
+            thread = threading.Thread(target=_run, name="download-index", daemon=True)
+            self._scan_thread = thread
+        thread.start()
+        return thread
+
+    # ===== Internals (callers hold _lock) =====
+
+    def _record(self, path: str, mtime: float, size: int, video_id: Optional[str]):
+        old = self._files.get(path)
+        if old and old[2] and self._ids.get(old[2]) == path:
+            del self._ids[old[2]]
+        self._files[path] = [mtime, size, video_id]
+        if video_id:
+            self._ids[video_id] = path
+
+    def _forget(self, path: str):
+        entry = self._files.pop(path, None)
+        if entry and entry[2] and self._ids.get(entry[2]) == path:
+            del self._ids[entry[2]]
+
+    # ===== Persistence =====
+
+    def _ensure_loaded(self):
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            try:
+                with open(self.state_file, encoding="utf-8") as f:
+                    data = json.load(f)
+                for path, (mtime, size, video_id) in data.get("files", {}).items():
+                    self._record(path, mtime, size, video_id)
+            except (OSError, ValueError, TypeError, AttributeError):
+                pass
+
+    def _save(self):
+        with self._save_lock:
+            with self._lock:
+                data = {"version": 1, "files": dict(self._files)}
+            tmp = f"{self.state_file}.tmp"
+            try:
+                os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(data, f, separators=(",", ":"))
+                os.replace(tmp, self.state_file)
+            except OSError as e:
+                print(f"Error saving download index: {e}")
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_download_index() -> DownloadIndex:
+    """Process-wide download index."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = DownloadIndex()
+        return _index
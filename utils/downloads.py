@@ -0,0 +1,692 @@
+"""
+Download manager - persistent queue of YouTube downloads
+
+Each item is fetched by yt-dlp into a staging folder (audio plus its
+thumbnail, in one extraction), then written with tags and cover art in
+a single ffmpeg pass: encoded to MP3, or in native mode remuxed as-is
+into .opus/.ogg/.m4a. Network and conversion run on separate, bounded
+worker sets, so a long queue neither serializes nor starts a transcode
+per core-hungry thread. The queue is saved on every state change; after
+a restart unfinished items continue, and yt-dlp resumes their .part files.
+"""
+import hashlib
+import json
+import os
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Set, Tuple
+
+from config.settings import (
+    MUSIC_DOWNLOAD_FOLDER, DOWNLOAD_QUEUE_FILE, DOWNLOAD_STAGING_DIR,
+    DOWNLOAD_NETWORK_WORKERS, DOWNLOAD_CONVERT_WORKERS, DOWNLOAD_AUDIO_FORMAT
+)
+from utils.progress import ProgressAggregator
+
+QUEUED = "queued"            # Waiting for a network slot
+DOWNLOADING = "downloading"
+DOWNLOADED = "downloaded"    # Waiting for a conversion slot
+CONVERTING = "converting"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+ACTIVE_STATES = (QUEUED, DOWNLOADING, DOWNLOADED, CONVERTING)
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+NETWORK_SHARE = 0.9          # Part of an item's progress spent downloading
+CONVERT_TIME_WEIGHT = 0.3    # Weight of the newest conversion in the average conversion time
+MP3_BITRATE = "192k"
+ALBUM_NAME = "YouTube Downloads"
+COVER_SIZE = 500             # Embedded art is scaled down to this width
+INFO_KEYS = ("id", "title", "uploader", "channel", "upload_date",
+             "webpage_url", "thumbnail", "duration", "acodec")
+
+MP3 = "mp3"                  # Re-encode to MP3
+NATIVE = "native"            # Keep YouTube's stream, remuxed without re-encoding
+
+# ffmpeg muxer -> (file extension, tag key holding the source URL)
+CONTAINERS = {
+    "mp3": (".mp3", "Source"),     # TXXX:Source - ffmpeg can't write COMM frames
+    "ipod": (".m4a", "comment"),   # ©cmt - the MP4 muxer drops unknown keys
+    "opus": (".opus", "source"),
+    "ogg": (".ogg", "source"),
+}
+# Codec of the fetched stream -> muxer that stores it as-is
+NATIVE_MUXERS = {"opus": "opus", "vorbis": "ogg", "mp4a": "ipod", "aac": "ipod", "mp3": "mp3"}
+
+
+def output_muxer(item: "DownloadItem") -> Tuple[str, bool]:
+    """(ffmpeg muxer, copy the audio stream?) for an item."""
+    if item.audio_format == NATIVE:
+        codec = (item.info.get("acodec") or "").split(".")[0].lower()
+        muxer = NATIVE_MUXERS.get(codec)
+        if muxer:
+            return muxer, True
+    return "mp3", False  # Also the fallback for codecs without a matching container
+
+
+def write_picture_metadata(cover: str, path: str) -> bool:
+    """
+    Write an ffmetadata file holding the cover as a METADATA_BLOCK_PICTURE
+    comment - how Ogg files carry art (ffmpeg can't attach it as a stream).
+    """
+    import base64
+    import io
+    from PIL import Image
+    from mutagen.flac import Picture
+
+    try:
+        image = Image.open(cover)
+        image.thumbnail((COVER_SIZE, COVER_SIZE))
+        data = io.BytesIO()
+        image.convert("RGB").save(data, format="JPEG", quality=85)
+    except Exception:
+        return False
+    picture = Picture()
+    picture.type = 3  # Cover (front)
+    picture.mime = "image/jpeg"
+    picture.width, picture.height = image.size
+    picture.depth = 24
+    picture.data = data.getvalue()
+    value = base64.b64encode(picture.write()).decode("ascii")
+    value = value.replace("=", "\\=")  # Padding must be escaped in ffmetadata
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f";FFMETADATA1\nMETADATA_BLOCK_PICTURE={value}\n")
+    return True
+
+
+def encode_command(item: "DownloadItem", output: str, muxer: str, copy: bool,
+                   cover: Optional[str] = None, picture_meta: Optional[str] = None) -> list:
+    """
+    ffmpeg arguments: staged audio -> tagged file for `muxer`. Cover art is
+    attached as a picture stream (MP3/M4A) or read from `picture_meta` (Ogg).
+    """
+    from utils.paths import find_ffmpeg
+
+    info = item.info
+    artist = info.get("uploader") or info.get("channel")
+    tags = {
+        "title": info.get("title") or item.title,
+        "artist": artist,
+        "album_artist": artist,
+        "album": ALBUM_NAME,
+        "date": (info.get("upload_date") or "")[:4],
+        CONTAINERS[muxer][1]: info.get("webpage_url") or item.url,
+    }
+    cmd = [find_ffmpeg(), "-nostdin", "-v", "error", "-y", "-i", item.staged]
+    if cover:
+        cmd += ["-i", cover, "-map", "0:a:0", "-map", "1:v:0",
+                "-codec:v", "mjpeg", "-filter:v", f"scale='min({COVER_SIZE},iw)':-2",
+                "-disposition:v", "attached_pic",
+                "-metadata:s:v", "title=Cover", "-metadata:s:v", "comment=Cover (front)"]
+    elif picture_meta:
+        cmd += ["-i", picture_meta, "-map", "0:a:0", "-map_metadata", "1"]
+    else:
+        cmd += ["-map", "0:a:0"]
+    if not picture_meta:
+        cmd += ["-map_metadata", "-1"]
+    cmd += ["-map_metadata:s:a", "-1"]  # Drop the source stream's tags too
+    if copy:
+        cmd += ["-codec:a", "copy"]
+    else:
+        cmd += ["-codec:a", "libmp3lame", "-b:a", MP3_BITRATE]
+    if muxer == "ipod":
+        cmd += ["-movflags", "+faststart"]
+    for key, value in tags.items():
+        if value:
+            cmd += ["-metadata", f"{key}={value}"]
+    cmd += ["-f", muxer, "-progress", "pipe:1", "-nostats", output]
+    return cmd
+
+
+class DownloadCancelled(Exception):
+    """Raised inside a worker when its item was cancelled."""
+
+
+class DownloadItem:
+    """One queued download. Copies of items are handed to listeners."""
+
+    PERSISTED = ("id", "url", "title", "video_id", "audio_format", "state",
+                 "info", "staged", "cover", "filepath", "error")
+
+    def __init__(self, item_id: int, url: str, title: str, video_id: str = None,
+                 audio_format: str = MP3):
+        self.id = item_id
+        self.url = url
+        self.title = title
+        self.video_id = video_id
+        self.audio_format = audio_format   # MP3 or NATIVE
+        self.state = QUEUED
+        self.status = "Queued"
+        self.downloaded_bytes = 0
+        self.total_bytes = 0
+        self.speed = 0.0         # Smoothed download throughput, bytes/s
+        self.eta = None          # Smoothed seconds left in the current stage
+        self.convert_fraction = 0.0
+        self.info = {}           # Subset of the yt-dlp info, used for tags
+        self.staged = None       # Fetched audio in the staging folder
+        self.cover = None        # Thumbnail yt-dlp saved next to it
+        self.filepath = None     # Final tagged file
+        self.error = None
+
+    @property
+    def fraction(self) -> float:
+        """Overall progress 0..1 (download, then conversion)."""
+        if self.state == DONE:
+            return 1.0
+        if self.state in (DOWNLOADED, CONVERTING):
+            network = 1.0
+        elif self.total_bytes:
+            network = min(1.0, self.downloaded_bytes / self.total_bytes)
+        else:
+            network = 0.0
+        return network * NETWORK_SHARE + self.convert_fraction * (1 - NETWORK_SHARE)
+
+    def copy(self) -> "DownloadItem":
+        item = DownloadItem.__new__(DownloadItem)
+        item.__dict__.update(self.__dict__)
+        item.info = dict(self.info)
+        return item
+
+    def to_dict(self) -> dict:
+        return {key: getattr(self, key) for key in self.PERSISTED}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DownloadItem":
+        item = cls(data["id"], data["url"], data.get("title", ""), data.get("video_id"))
+        for key in cls.PERSISTED:
+            if key in data:
+                setattr(item, key, data[key])
+        item.info = item.info or {}
+        return item
+
+
+class DownloadManager:
+    """
+    Queue of downloads with separate network and ffmpeg parallelism.
+
+    add() queues a URL (an active item for the same video is reused),
+    cancel()/retry() act on single items. Listeners are called with a
+    copy of an item whenever it changes state, and with coalesced
+    progress at most PROGRESS_UPDATES_PER_S times a second - on worker
+    threads, so UI code hops to the main thread itself. summary()
+    aggregates the current batch into one progress figure.
+    """
+
+    def __init__(self, state_file: str = DOWNLOAD_QUEUE_FILE,
+                 output_dir: str = MUSIC_DOWNLOAD_FOLDER,
+                 staging_dir: str = DOWNLOAD_STAGING_DIR,
+                 network_workers: int = DOWNLOAD_NETWORK_WORKERS,
+                 convert_workers: int = DOWNLOAD_CONVERT_WORKERS,
+                 audio_format: str = DOWNLOAD_AUDIO_FORMAT,
+                 pool=None):
+        self.state_file = state_file
+        self.output_dir = output_dir
+        self.staging_dir = staging_dir
+        self.network_workers = network_workers
+        self.convert_workers = convert_workers
+        self.audio_format = audio_format    # Default for add()
+        self.pool = pool                    # yt-dlp pool; the shared "download" pool if None
+        self.items = OrderedDict()          # id -> DownloadItem
+        self._batch = []                    # Ids counted by summary() until the queue drains
+        self._procs = {}                    # id -> running ffmpeg
+        self._listeners = []
+        self._progress = ProgressAggregator(self._publish_progress)
+        self._cond = threading.Condition()
+        self._save_lock = threading.Lock()
+        self._next_id = 1
+        self._started = False
+        self._convert_time = None           # Smoothed seconds per finished conversion
+
+    # ===== Public API =====
+
+    def start(self):
+        """Load the saved queue and start the workers (once)."""
+        with self._cond:
+            if self._started:
+                return
+            self._started = True
+            self._load()
+        for i in range(self.network_workers):
+            threading.Thread(target=self._worker, args=(QUEUED, DOWNLOADING, self._fetch),
+                             name=f"download-{i}", daemon=True).start()
+        for i in range(self.convert_workers):
+            threading.Thread(target=self._worker, args=(DOWNLOADED, CONVERTING, self._convert),
+                             name=f"convert-{i}", daemon=True).start()
+
+    def add(self, url: str, title: str, video_id: str = None,
+            audio_format: str = None) -> DownloadItem:
+        """Queue a download (MP3 or NATIVE audio). Returns (a copy of) the item."""
+        self.start()
+        with self._cond:
+            for item in self.items.values():
+                if item.state in ACTIVE_STATES and (
+                        item.url == url or (video_id and item.video_id == video_id)):
+                    return item.copy()
+            if not any(i.state in ACTIVE_STATES for i in self.items.values()):
+                self._batch = []
+            item = DownloadItem(self._next_id, url, title, video_id,
+                                audio_format or self.audio_format)
+            self._next_id += 1
+            self.items[item.id] = item
+            self._batch.append(item.id)
+            self._cond.notify_all()
+        self._changed(item, persist=True)
+        return item.copy()
+
+    def cancel(self, item_id: int) -> bool:
+        """Cancel a queued or running item. Partial files are removed."""
+        with self._cond:
+            item = self.items.get(item_id)
+            if item is None or item.state not in ACTIVE_STATES:
+                return False
+            was = item.state
+            item.state = CANCELLED
+            item.status = "Cancelled"
+            proc = self._procs.get(item_id)
+        if proc is not None:
+            try:
+                proc.kill()
+            except OSError:
+                pass
+        # Running items clean up after themselves (a fetch on its next progress tick)
+        if was == DOWNLOADED:
+            self._remove_staged(item)
+        self._changed(item, persist=True)
+        return True
+
+    def cancel_all(self):
+        for item_id in [i.id for i in self.get_items() if i.state in ACTIVE_STATES]:
+            self.cancel(item_id)
+
+    def retry(self, item_id: int) -> bool:
+        """Queue a failed or cancelled item again."""
+        with self._cond:
+            item = self.items.get(item_id)
+            if item is None or item.state not in (FAILED, CANCELLED):
+                return False
+            if not any(i.state in ACTIVE_STATES for i in self.items.values()):
+                self._batch = []
+            item.state = DOWNLOADED if item.staged and os.path.exists(item.staged) else QUEUED
+            item.status = "Queued"
+            item.error = None
+            item.convert_fraction = 0.0
+            self._batch.append(item.id)
+            self._cond.notify_all()
+        self._changed(item, persist=True)
+        return True
+
+    def clear_finished(self):
+        """Forget finished items."""
+        with self._cond:
+            for item_id in [i.id for i in self.items.values() if i.state in FINISHED_STATES]:
+                del self.items[item_id]
+        self._save()
+
+    def get_items(self) -> List[DownloadItem]:
+        with self._cond:
+            return [item.copy() for item in self.items.values()]
+
+    def get(self, item_id: int) -> Optional[DownloadItem]:
+        with self._cond:
+            item = self.items.get(item_id)
+            return item.copy() if item else None
+
+    def find(self, url: str = None, video_id: str = None) -> Optional[DownloadItem]:
+        """Newest item for a URL or video id."""
+        with self._cond:
+            for item in reversed(self.items.values()):
+                if (url and item.url == url) or (video_id and item.video_id == video_id):
+                    return item.copy()
+        return None
+
+    def summary(self) -> dict:
+        """Aggregated progress of the current batch (everything queued since the queue was last idle)."""
+        with self._cond:
+            batch = [self.items[i] for i in self._batch
+                     if i in self.items and self.items[i].state != CANCELLED]
+            counts = {state: 0 for state in ACTIVE_STATES + FINISHED_STATES}
+            for item in batch:
+                counts[item.state] += 1
+            return {
+                "total": len(batch),
+                "active": sum(counts[s] for s in ACTIVE_STATES),
+                "done": counts[DONE],
+                "failed": counts[FAILED],
+                "downloading": counts[DOWNLOADING],
+                "converting": counts[CONVERTING],
+                "fraction": sum(i.fraction for i in batch) / len(batch) if batch else 0.0,
+                "speed": sum(i.speed for i in batch if i.state == DOWNLOADING),
+                "eta": self._batch_eta(batch),
+            }
+
+    def _batch_eta(self, batch: List[DownloadItem]) -> Optional[float]:
+        """
+        Seconds until the whole batch is done, or None while there is too
+        little to go on. Bytes left across the batch (queued items taken
+        at the average known size) at the combined download speed, then
+        the conversions still ahead, spread over the conversion workers -
+        whichever finishes last. Callers hold _cond.
+        """
+        pending = [i for i in batch if i.state in ACTIVE_STATES]
+        if not pending:
+            return None
+
+        sizes = [i.total_bytes for i in batch if i.total_bytes]
+        bytes_left = 0
+        for item in pending:
+            if item.state == DOWNLOADING and item.total_bytes:
+                bytes_left += max(0, item.total_bytes - item.downloaded_bytes)
+            elif item.state in (QUEUED, DOWNLOADING):
+                if not sizes:
+                    return None
+                bytes_left += sum(sizes) / len(sizes)
+        speed = sum(i.speed for i in batch if i.state == DOWNLOADING)
+        if bytes_left and not speed:
+            return None
+        network = bytes_left / speed if bytes_left else 0.0
+
+        per_item = self._convert_time
+        if per_item is None:
+            # Nothing converted yet - go by the conversions running now
+            running = [i.eta / (1 - i.convert_fraction) for i in pending
+                       if i.state == CONVERTING and i.eta is not None and i.convert_fraction < 1]
+            if not running:
+                return None
+            per_item = sum(running) / len(running)
+        converts_left = sum(1 - i.convert_fraction if i.state == CONVERTING else 1 for i in pending)
+        convert = converts_left * per_item / max(1, self.convert_workers)
+
+        # The last download still needs its own conversion afterwards
+        return max(network + per_item if bytes_left else 0.0, convert)
+
+    def add_listener(self, listener: Callable[[DownloadItem], None]):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[DownloadItem], None]):
+        try:
+            self._listeners.remove(listener)
+        except ValueError:
+            pass
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """Block until nothing is queued or running. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while any(i.state in ACTIVE_STATES for i in self.items.values()):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    # ===== Workers =====
+
+    def _worker(self, wanted: str, running: str, run: Callable[[DownloadItem], None]):
+        while True:
+            with self._cond:
+                item = next((i for i in self.items.values() if i.state == wanted), None)
+                while item is None:
+                    self._cond.wait()
+                    item = next((i for i in self.items.values() if i.state == wanted), None)
+                item.state = running
+            try:
+                run(item)
+            except DownloadCancelled:
+                pass
+            except Exception as e:
+                with self._cond:
+                    if item.state == running:
+                        item.state = FAILED
+                        item.status = "Failed"
+                        item.error = str(e)
+                if item.state == FAILED:
+                    print(f"Error downloading {item.title}: {e}")
+                    self._changed(item, persist=True)
+            self._end_stage(item)
+            with self._cond:
+                self._cond.notify_all()
+
+    def _advance(self, item: DownloadItem, expected: str, state: str, status: str) -> None:
+        """Move an item on, unless it was cancelled meanwhile."""
+        with self._cond:
+            if item.state != expected:
+                raise DownloadCancelled()
+            item.state = state
+            item.status = status
+            self._cond.notify_all()
+        self._end_stage(item)
+        self._changed(item, persist=True)
+
+    def _end_stage(self, item: DownloadItem):
+        """Stage progress starts over in the next stage."""
+        self._progress.discard(item.id)
+        item.speed = 0.0
+        item.eta = None
+
+    def _fetch(self, item: DownloadItem):
+        """Network stage: yt-dlp downloads the audio stream into the staging folder."""
+        item.status = "Downloading..."
+        self._changed(item, persist=True)
+        key = item.video_id or hashlib.sha1(item.url.encode("utf-8")).hexdigest()[:16]
+        os.makedirs(self.staging_dir, exist_ok=True)
+
+        def progress_hook(d):
+            if item.state != DOWNLOADING:
+                raise DownloadCancelled()
+            if d.get("status") == "downloading":
+                item.total_bytes = d.get("total_bytes") or d.get("total_bytes_estimate") or 0
+                item.downloaded_bytes = d.get("downloaded_bytes") or 0
+                self._progress.update(item.id, item.downloaded_bytes, item.total_bytes)
+
+        pool = self.pool
+        if pool is None:
+            from utils.ytdl_pool import get_pool
+            pool = get_pool("download")
+        try:
+            with pool.borrow(outtmpl=os.path.join(self.staging_dir, f"{key}.%(ext)s"),
+                             progress_hook=progress_hook) as ydl:
+                info = ydl.extract_info(item.url, download=True)
+                downloads = info.get("requested_downloads") or [{}]
+                staged = downloads[0].get("filepath") or ydl.prepare_filename(info)
+        except Exception:
+            if item.state == CANCELLED:
+                self._remove_partials(key)
+                raise DownloadCancelled()
+            raise
+        item.info = {k: info[k] for k in INFO_KEYS if info.get(k) is not None}
+        item.video_id = item.video_id or info.get("id")
+        item.staged = staged
+        # Fetched alongside the audio; embedded by ffmpeg instead of downloaded again
+        item.cover = next((t["filepath"] for t in reversed(info.get("thumbnails") or [])
+                           if t.get("filepath")), None)
+        try:
+            self._advance(item, DOWNLOADING, DOWNLOADED, "Waiting to convert...")
+        except DownloadCancelled:
+            self._remove_staged(item)
+            raise
+
+    def _convert(self, item: DownloadItem):
+        """
+        Conversion stage: one ffmpeg pass writes the final file with tags and
+        cover art - an MP3 encode, or a plain remux for native audio.
+        """
+        from utils.youtube import sanitize_filename
+
+        if not item.staged or not os.path.exists(item.staged):
+            # Staged file vanished (e.g. cache cleared) - fetch again
+            item.staged = None
+            self._advance(item, CONVERTING, QUEUED, "Queued")
+            return
+        muxer, copy = output_muxer(item)
+        started = time.monotonic()
+        item.status = "Saving..." if copy else "Converting to MP3..."
+        self._changed(item, persist=True)
+
+        extension = CONTAINERS[muxer][0]
+        final_path = os.path.join(self.output_dir, sanitize_filename(item.title) + extension)
+        tmp_path = final_path + ".tmp"
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        cover = item.cover if item.cover and os.path.exists(item.cover) else None
+        picture_meta = None
+        if cover and muxer in ("opus", "ogg"):
+            picture_meta = os.path.splitext(item.staged)[0] + ".ffmeta"
+            if not write_picture_metadata(cover, picture_meta):
+                picture_meta = None
+            cover = None
+        try:
+            returncode, error = self._run_ffmpeg(
+                item, encode_command(item, tmp_path, muxer, copy, cover, picture_meta))
+            if returncode != 0 and (cover or picture_meta) and item.state == CONVERTING:
+                # An unreadable thumbnail shouldn't cost the track
+                item.convert_fraction = 0.0
+                returncode, error = self._run_ffmpeg(
+                    item, encode_command(item, tmp_path, muxer, copy))
+        finally:
+            if picture_meta:
+                self._remove_file(picture_meta)
+
+        if item.state != CONVERTING:
+            self._remove_file(tmp_path)
+            self._remove_staged(item)
+            raise DownloadCancelled()
+        if returncode != 0:
+            self._remove_file(tmp_path)
+            raise RuntimeError(error.strip().splitlines()[-1] if error.strip() else
+                               f"ffmpeg exited with {returncode}")
+
+        os.replace(tmp_path, final_path)
+        self._remove_staged(item)
+        item.filepath = final_path
+        item.convert_fraction = 1.0
+        elapsed = time.monotonic() - started
+        with self._cond:
+            if self._convert_time is None:
+                self._convert_time = elapsed
+            else:
+                self._convert_time += CONVERT_TIME_WEIGHT * (elapsed - self._convert_time)
+        self._advance(item, CONVERTING, DONE, "Complete!")
+
+    def _run_ffmpeg(self, item: DownloadItem, cmd: list) -> tuple:
+        """Run ffmpeg with -progress on stdout, tracking the item's conversion fraction."""
+        proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, text=True, errors="replace")
+        with self._cond:
+            self._procs[item.id] = proc
+        try:
+            duration = float(item.info.get("duration") or 0)
+            for line in proc.stdout:
+                key, _, value = line.strip().partition("=")
+                if key == "out_time_us" and duration > 0 and value.isdigit():
+                    item.convert_fraction = min(1.0, int(value) / 1e6 / duration)
+                    self._progress.update(item.id, item.convert_fraction, 1.0)
+            error = proc.stderr.read()
+            proc.wait()
+        finally:
+            with self._cond:
+                self._procs.pop(item.id, None)
+        return proc.returncode, error
+
+    # ===== Files =====
+
+    @staticmethod
+    def _remove_file(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _remove_staged(self, item: DownloadItem):
+        for path in (item.staged, item.cover):
+            if path:
+                self._remove_file(path)
+        item.staged = None
+        item.cover = None
+
+    def _remove_partials(self, key: str):
+        try:
+            names = os.listdir(self.staging_dir)
+        except OSError:
+            return
+        for name in names:
+            if name.startswith(key + "."):
+                self._remove_file(os.path.join(self.staging_dir, name))
+
+    # ===== Notification & persistence =====
+
+    def _changed(self, item: DownloadItem, persist: bool = False):
+        if persist:
+            self._save()
+        snapshot = item.copy()
+        for listener in list(self._listeners):
+            try:
+                listener(snapshot)
+            except Exception as e:
+                print(f"Error in download listener: {e}")
+
+    def _publish_progress(self, item_ids: Set[int]):
+        """Aggregator callback: one listener call per item that made progress."""
+        for item_id in item_ids:
+            with self._cond:
+                item = self.items.get(item_id)
+                if item is None or item.state not in (DOWNLOADING, CONVERTING):
+                    continue
+                speed, eta = self._progress.stats(item_id)
+                if item.state == DOWNLOADING:
+                    item.speed = speed or 0.0
+                item.eta = eta
+            self._changed(item)
+
+    def _save(self):
+        # Snapshot inside the save lock so an older snapshot is never written last
+        with self._save_lock:
+            with self._cond:
+                data = {
+                    "version": 1,
+                    "items": [i.to_dict() for i in self.items.values()
+                              if i.state not in (DONE, CANCELLED)],
+                }
+            tmp = f"{self.state_file}.tmp"
+            try:
+                os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(data, f, separators=(",", ":"))
+                os.replace(tmp, self.state_file)
+            except OSError as e:
+                print(f"Error saving download queue: {e}")
+
+    def _load(self):
+        """Restore the saved queue; interrupted items pick up where they were."""
+        try:
+            with open(self.state_file, encoding="utf-8") as f:
+                data = json.load(f)
+            saved = [DownloadItem.from_dict(d) for d in data.get("items", [])]
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return
+        for item in saved:
+            if item.state in (DOWNLOADING, QUEUED):
+                item.state = QUEUED
+            elif item.state in (DOWNLOADED, CONVERTING):
+                has_file = item.staged and os.path.exists(item.staged)
+                item.state = DOWNLOADED if has_file else QUEUED
+            item.status = "Failed" if item.state == FAILED else "Queued"
+            self.items[item.id] = item
+            if item.state in ACTIVE_STATES:
+                self._batch.append(item.id)
+            self._next_id = max(self._next_id, item.id + 1)
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_download_manager() -> DownloadManager:
+    """Process-wide download manager (workers start on first use)."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = DownloadManager()
+        return _manager
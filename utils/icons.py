@@ -0,0 +1,121 @@
+"""
+Shared icon registry - each PNG is decoded once and CTkImages are shared across panels
+
+An optional prebuilt atlas (assets/icons/atlas.png + atlas.json) replaces
+the per-icon file opens with a single decode. Build it with:
+    python -m utils.icons --build-atlas
+"""
+import json
+import os
+import sys
+import threading
+
+from utils.paths import get_icon_path
+
+ATLAS_IMAGE = "atlas.png"
+ATLAS_INDEX = "atlas.json"
+ATLAS_PADDING = 1
+
+_lock = threading.Lock()
+_decoded = {}       # icon name -> PIL image
+_ctk_images = {}    # (icon name, size) -> CTkImage
+_atlas = None       # (sheet image, {name: [x, y, w, h]}) once loaded
+
+
+def _load_atlas():
+    """Load the atlas once. Returns (sheet, index) or (None, {})."""
+    global _atlas
+    if _atlas is None:
+        index_path = get_icon_path(ATLAS_INDEX)
+        sheet_path = get_icon_path(ATLAS_IMAGE)
+        try:
+            from PIL import Image
+            with open(index_path, encoding="utf-8") as f:
+                index = json.load(f)
+            sheet = Image.open(sheet_path)
+            sheet.load()
+            _atlas = (sheet, index)
+        except (OSError, ValueError):
+            _atlas = (None, {})
+    return _atlas
+
+
+def get_icon_image(name: str):
+    """Decoded PIL image for an icon file name (e.g. "play.png")."""
+    with _lock:
+        image = _decoded.get(name)
+        if image is None:
+            sheet, index = _load_atlas()
+            rect = index.get(name)
+            if rect:
+                x, y, w, h = rect
+                image = sheet.crop((x, y, x + w, y + h))
+            else:
+                from PIL import Image
+                image = Image.open(get_icon_path(name))
+                image.load()
+            _decoded[name] = image
+        return image
+
+
+def get_icon(name: str, size: tuple):
+    """Shared CTkImage for an icon at a given display size."""
+    key = (name, tuple(size))
+    image = _ctk_images.get(key)
+    if image is None:
+        import customtkinter as ctk
+        image = ctk.CTkImage(get_icon_image(name), size=key[1])
+        _ctk_images[key] = image
+    return image
+
+
+def build_atlas(icon_dir: str = None) -> str:
+    """
+    Pack every PNG in the icon folder into one sheet (simple shelf packing).
+    Returns the atlas image path.
+    """
+    from PIL import Image
+
+    icon_dir = icon_dir or os.path.dirname(get_icon_path(ATLAS_IMAGE))
+    names = sorted(
+        f for f in os.listdir(icon_dir)
+        if f.lower().endswith(".png") and f != ATLAS_IMAGE
+    )
+    images = {}
+    for name in names:
+        img = Image.open(os.path.join(icon_dir, name))
+        images[name] = img.convert("RGBA")
+
+    # Tallest first, rows no wider than ~sqrt of the total area
+    order = sorted(names, key=lambda n: images[n].height, reverse=True)
+    area = sum(images[n].width * images[n].height for n in names)
+    max_width = max(max(images[n].width for n in names), int(area ** 0.5) * 2)
+
+    index = {}
+    x = y = row_height = sheet_width = 0
+    for name in order:
+        w, h = images[name].size
+        if x and x + w > max_width:
+            x, y = 0, y + row_height + ATLAS_PADDING
+            row_height = 0
+        index[name] = [x, y, w, h]
+        x += w + ATLAS_PADDING
+        row_height = max(row_height, h)
+        sheet_width = max(sheet_width, x)
+
+    sheet = Image.new("RGBA", (sheet_width, y + row_height), (0, 0, 0, 0))
+    for name, (px, py, _, _) in index.items():
+        sheet.paste(images[name], (px, py))
+
+    sheet_path = os.path.join(icon_dir, ATLAS_IMAGE)
+    sheet.save(sheet_path, optimize=True)
+    with open(os.path.join(icon_dir, ATLAS_INDEX), "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    return sheet_path
+
+
+if __name__ == "__main__":
+    if "--build-atlas" in sys.argv:
+        print(f"Wrote {build_atlas()}")
+    else:
+        print(__doc__.strip())
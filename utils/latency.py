@@ -0,0 +1,43 @@
+"""
+Track-change latency tracking - time from a click to each visible milestone
+"""
+import time
+from typing import Callable, Optional
+
+MILESTONES = ("first_sound", "title", "art", "waveform")
+
+
+class LatencyTracker:
+    """
+    Records how long each track change takes to reach every milestone.
+
+    begin() starts a new change and returns its token. Work for that change
+    carries the token and calls mark() when its result reaches the screen
+    (or the speaker); marks for superseded tokens are ignored.
+    """
+
+    def __init__(self):
+        self.token = 0
+        self.started = 0.0
+        self.reached = {}
+        self.listener: Optional[Callable[[int, str, float], None]] = None
+
+    def begin(self) -> int:
+        """Start timing a new track change."""
+        self.token += 1
+        self.started = time.perf_counter()
+        self.reached = {}
+        return self.token
+
+    def mark(self, token: int, milestone: str):
+        """Record a milestone for `token` if it is still the current change."""
+        if token != self.token or milestone in self.reached:
+            return
+        elapsed = time.perf_counter() - self.started
+        self.reached[milestone] = elapsed
+        if self.listener:
+            self.listener(token, milestone, elapsed)
+
+    def is_complete(self, milestones=MILESTONES) -> bool:
+        """True once the current change has reached every milestone."""
+        return all(m in self.reached for m in milestones)
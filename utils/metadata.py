@@ -1,76 +1,163 @@
 """
 Audio metadata extraction utilities
+
+One mutagen parse (probe_track) yields tags, duration and cover art for
+MP3, M4A/MP4, Ogg Opus/Vorbis and FLAC alike.
 """
 import os
 import io
+import base64
 from PIL import Image
 from mutagen import File as MutagenFile
-from mutagen.mp3 import MP3
 from config.settings import ALBUM_ART_SIZE
 
-def get_track_metadata(filepath: str) -> dict:
+# Tag keys per container: ID3, MP4, Vorbis comments (Ogg/FLAC)
+TITLE_KEYS = ("TIT2", "\xa9nam", "title")
+ARTIST_KEYS = ("TPE1", "\xa9ART", "artist")
+# Where downloads record their YouTube URL: TXXX/COMM "Source" (ID3), ©cmt (MP4), source (Vorbis)
+SOURCE_KEYS = ("TXXX:Source", "\xa9cmt", "source", "comment")
+
+
+def _first_tag(tags, keys) -> str:
+    for key in keys:
+        try:
+            value = tags.get(key)
+        except (KeyError, ValueError):
+            continue
+        if value is None:
+            continue
+        value = getattr(value, "text", value)  # ID3 frames wrap a list in .text
+        if isinstance(value, (list, tuple)):
+            value = value[0] if value else None
+        if value:
+            return str(value)
+    return None
+
+
+def _cover_data(audio) -> bytes:
+    """Raw embedded cover image bytes, or None."""
+    tags = getattr(audio, "tags", None)
+    if tags:
+        # MP3 APIC frames (front cover first)
+        apics = [tags[k] for k in tags.keys() if k.startswith("APIC")]
+        if apics:
+            apics.sort(key=lambda frame: frame.type != 3)
+            return apics[0].data
+        # MP4 cover atoms
+        covers = tags.get("covr") if hasattr(tags, "get") else None
+        if covers:
+            return bytes(covers[0])
+        # Ogg: base64 FLAC picture blocks in a comment
+        try:
+            blocks = tags.get("metadata_block_picture")
+        except (KeyError, ValueError):
+            blocks = None
+        if blocks:
+            from mutagen.flac import Picture
+            try:
+                return Picture(base64.b64decode(blocks[0])).data
+            except Exception:
+                pass
+    # FLAC pictures
+    pictures = getattr(audio, "pictures", None)
+    if pictures:
+        return pictures[0].data
+    return None
+
+
+def read_source_url(filepath: str) -> str:
+    """Source URL a download was tagged with, or None. Reads tags only."""
+    try:
+        audio = MutagenFile(filepath)
+    except Exception:
+        return None
+    tags = getattr(audio, "tags", None)
+    if not tags:
+        return None
+    keys = list(SOURCE_KEYS)
+    if hasattr(tags, "getall"):
+        # Older downloads used a COMM frame (any language)
+        keys += [k for k in tags.keys() if k.startswith("COMM:Source")]
+    value = _first_tag(tags, keys)
+    return value if value and "://" in value else None
+
+
+def probe_track(filepath: str) -> dict:
     """
-    Extract metadata from audio file.
-    Returns dict with title, artist, and length.
+    Read tags, length and cover art with a single parse of the file.
+    Returns dict with title, artist, length, display_title and art (bytes or None).
     """
     filename = os.path.basename(filepath)
     # Remove extension for default title
     title = os.path.splitext(filename)[0]
     artist = "Unknown artist"
-    length = 0
-    
+    length = None
+    art = None
+
+    audio = None
     try:
-        meta = MutagenFile(filepath, easy=True)
-        if meta:
-            title = meta.get("title", [title])[0]
-            artist = meta.get("artist", ["Unknown artist"])[0]
+        audio = MutagenFile(filepath)
     except Exception:
         pass
-    
-    # Get track length
-    try:
-        audio = MP3(filepath)
-        length = int(audio.info.length)
-    except Exception:
+
+    if audio is not None:
+        tags = audio.tags
+        if tags:
+            title = _first_tag(tags, TITLE_KEYS) or title
+            artist = _first_tag(tags, ARTIST_KEYS) or artist
+        try:
+            length = int(audio.info.length)
+        except Exception:
+            length = None
+        try:
+            art = _cover_data(audio)
+        except Exception:
+            art = None
+
+    if length is None:
+        # Formats mutagen can't read - decode as a last resort
         try:
             from pydub import AudioSegment
             seg = AudioSegment.from_file(filepath)
             length = int(seg.duration_seconds)
         except Exception:
             length = 0
-    
+
     return {
         "title": title,
         "artist": artist,
         "length": length,
-        "display_title": f"{title} — {artist}" if artist != "Unknown artist" else title
+        "display_title": f"{title} — {artist}" if artist != "Unknown artist" else title,
+        "art": art,
     }
 
-def extract_album_art(filepath: str) -> Image.Image:
+
+def get_track_metadata(filepath: str, probe: dict = None) -> dict:
+    """
+    Extract metadata from audio file.
+    Returns dict with title, artist, and length.
+    """
+    probe = probe or probe_track(filepath)
+    return {key: probe[key] for key in ("title", "artist", "length", "display_title")}
+
+
+def extract_album_art(filepath: str, probe: dict = None) -> Image.Image:
     """
     Extract album art from audio file.
     Returns PIL Image or placeholder if not found.
     """
     img = None
-    
-    try:
-        f = MutagenFile(filepath)
-        if hasattr(f, "tags") and f.tags:
-            # Try MP3 APIC frames
-            for tag_k in f.tags.keys():
-                if tag_k.startswith("APIC"):
-                    img_data = f.tags[tag_k].data
-                    img = Image.open(io.BytesIO(img_data))
-                    break
-            # FLAC/MP4 coverart
-            if img is None and hasattr(f, "pictures") and getattr(f, "pictures"):
-                img_data = f.pictures[0].data
-                img = Image.open(io.BytesIO(img_data))
-    except Exception:
-        img = None
-    
+    data = (probe or probe_track(filepath))["art"]
+
+    if data:
+        try:
+            img = Image.open(io.BytesIO(data))
+            img.draft("RGB", ALBUM_ART_SIZE)  # JPEG decodes straight to a smaller size
+        except Exception:
+            img = None
+
     if img is None:
         # Create placeholder
         img = Image.new("RGB", ALBUM_ART_SIZE, color=(18, 24, 28))
-    
-    return img.resize(ALBUM_ART_SIZE, Image.LANCZOS)
\ No newline at end of file
+
+    return img.resize(ALBUM_ART_SIZE, Image.LANCZOS)
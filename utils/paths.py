@@ -3,6 +3,7 @@ Path utilities for PyInstaller compatibility
 """
 import os
 import sys
+import shutil
 
 def resource_path(relative_path: str) -> str:
     """
@@ -23,4 +24,11 @@ def get_ffmpeg_path() -> str:
 
 def get_ffprobe_path() -> str:
     """Get path to ffprobe executable."""
-    return resource_path("assets/ffmpeg/ffprobe.exe")
\ No newline at end of file
+    return resource_path("assets/ffmpeg/ffprobe.exe")
+
+def find_ffmpeg() -> str:
+    """Get the bundled ffmpeg if present, otherwise the one on PATH."""
+    bundled = get_ffmpeg_path()
+    if os.path.exists(bundled):
+        return bundled
+    return shutil.which("ffmpeg") or "ffmpeg"
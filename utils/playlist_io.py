@@ -0,0 +1,350 @@
+"""
+Playlist import/export - streaming M3U/M3U8, PLS, XSPF and JSON
+
+Readers are generators that pull the file in chunks and yield one entry
+at a time; writers take any iterable of paths and write in chunks, so a
+100k-entry playlist never exists as a second in-memory copy.
+"""
+import json
+import os
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote, unquote, urlparse
+from urllib.request import url2pathname
+
+from config.settings import PLAYLIST_IO_BATCH
+
+READ_CHUNK = 1 << 16
+WRITE_LINES = 1000          # Lines joined per write() call
+DIR_CACHE_SIZE = 64         # Folder listings kept for the existence check
+XSPF_NS = "http://xspf.org/ns/0/"
+
+PLAYLIST_FORMATS = {
+    ".m3u": "m3u",
+    ".m3u8": "m3u",
+    ".pls": "pls",
+    ".xspf": "xspf",
+    ".json": "json",
+}
+
+
+def detect_format(path: str) -> str:
+    """Playlist format from the file extension."""
+    fmt = PLAYLIST_FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Unsupported playlist format: {path}")
+    return fmt
+
+
+# ===== Reading =====
+
+def _resolve(entry: str, base_dir: str) -> Optional[str]:
+    """Turn a playlist entry (path or file:// URI) into an absolute path."""
+    entry = entry.strip()
+    if not entry:
+        return None
+    if "://" in entry[:12]:
+        url = urlparse(entry)
+        if url.scheme != "file":
+            return None  # Streams / web URLs can't be played from disk
+        entry = url2pathname(url.path)  # Also percent-decodes
+        if url.netloc and url.netloc != "localhost":
+            entry = f"//{url.netloc}{entry}"
+    if os.sep != "\\":
+        entry = entry.replace("\\", os.sep)
+    if not os.path.isabs(entry):
+        entry = os.path.join(base_dir, entry)
+    return os.path.normpath(entry)
+
+
+def _iter_lines(path: str) -> Iterator[str]:
+    # utf-8-sig drops a BOM; undecodable bytes (latin-1 .m3u) become U+FFFD
+    with open(path, encoding="utf-8-sig", errors="replace", buffering=READ_CHUNK) as f:
+        for line in f:
+            yield line.rstrip("\r\n")
+
+
+def _read_m3u(path: str) -> Iterator[str]:
+    for line in _iter_lines(path):
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield line
+
+
+def _read_pls(path: str) -> Iterator[str]:
+    for line in _iter_lines(path):
+        key, sep, value = line.partition("=")
+        if sep and key.strip().lower().startswith("file"):
+            yield value
+
+
+def _read_xspf(path: str) -> Iterator[str]:
+    import xml.etree.ElementTree as ET
+
+    location = f"{{{XSPF_NS}}}location"
+    track = f"{{{XSPF_NS}}}track"
+    found = None
+    parents = []
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            parents.append(elem)
+            continue
+        parents.pop()
+        tag = elem.tag
+        if tag in (location, "location") and found is None:
+            found = (elem.text or "").strip()
+        elif tag in (track, "track"):
+            if found:
+                # Relative locations are URI references too
+                yield found if "://" in found[:12] else unquote(found)
+            found = None
+            # Drop finished tracks so memory stays flat on huge files
+            if parents:
+                parents[-1].remove(elem)
+
+
+def _read_json(path: str) -> Iterator[str]:
+    """
+    Stream the items of the "tracks" array (or a top-level array).
+    Items may be plain paths or objects with a "path"/"location" key.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8-sig", buffering=READ_CHUNK) as f:
+        buf = ""
+        pos = 0
+
+        def fill():
+            nonlocal buf, pos
+            chunk = f.read(READ_CHUNK)
+            buf = buf[pos:] + chunk
+            pos = 0
+            return bool(chunk)
+
+        # Find the start of the array
+        while True:
+            key = buf.find('"tracks"', pos)
+            start = buf.find("[", key if key >= 0 else pos)
+            if start >= 0 and (key >= 0 or not buf[:start].strip()):
+                pos = start + 1
+                break
+            if not fill():
+                return
+
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buf):
+                if not fill():
+                    return
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if not fill():
+                    raise
+                continue
+            pos = end
+            if isinstance(item, dict):
+                item = item.get("path") or item.get("location")
+            if isinstance(item, str):
+                yield item
+
+
+_READERS = {
+    "m3u": _read_m3u,
+    "pls": _read_pls,
+    "xspf": _read_xspf,
+    "json": _read_json,
+}
+
+
+def iter_playlist(path: str) -> Iterator[str]:
+    """Yield absolute track paths from a playlist file, in order."""
+    base_dir = os.path.dirname(os.path.abspath(path))
+    for entry in _READERS[detect_format(path)](path):
+        resolved = _resolve(entry, base_dir)
+        if resolved:
+            yield resolved
+
+
+class _ExistenceChecker:
+    """
+    Batched existence check: each folder in a batch is listed once with
+    os.scandir (no per-file stat syscalls); a small LRU keeps recent
+    listings. Falls back to os.stat when a folder can't be listed.
+    """
+
+    def __init__(self, size: int = DIR_CACHE_SIZE):
+        self.size = size
+        self.listings = OrderedDict()
+
+    def _listing(self, folder: str):
+        names = self.listings.get(folder)
+        if names is not None:
+            self.listings.move_to_end(folder)
+            return names
+        try:
+            with os.scandir(folder) as it:
+                names = {os.path.normcase(e.name) for e in it if not e.is_dir()}
+        except OSError:
+            names = False  # Unlistable; stat individually
+        self.listings[folder] = names
+        if len(self.listings) > self.size:
+            self.listings.popitem(last=False)
+        return names
+
+    def filter(self, paths: List[str]) -> List[str]:
+        kept = []
+        for path in paths:
+            folder, name = os.path.split(path)
+            names = self._listing(folder)
+            if names is False:
+                if os.path.isfile(path):
+                    kept.append(path)
+            elif os.path.normcase(name) in names:
+                kept.append(path)
+        return kept
+
+
+def iter_batches(paths: Iterable[str], batch_size: int = PLAYLIST_IO_BATCH,
+                 skip_missing: bool = True) -> Iterator[Tuple[List[str], int]]:
+    """Group paths into batches. Yields (existing paths, skipped count)."""
+    checker = _ExistenceChecker() if skip_missing else None
+    batch = []
+    for path in paths:
+        batch.append(path)
+        if len(batch) >= batch_size:
+            kept = checker.filter(batch) if checker else batch
+            yield kept, len(batch) - len(kept)
+            batch = []
+    if batch:
+        kept = checker.filter(batch) if checker else batch
+        yield kept, len(batch) - len(kept)
+
+
+def import_playlist(path: str, on_batch: Callable[[List[str]], None],
+                    batch_size: int = PLAYLIST_IO_BATCH,
+                    skip_missing: bool = True) -> Tuple[int, int]:
+    """
+    Stream a playlist file into `on_batch` (e.g. Playlist.add_multiple).
+    Returns (added, skipped).
+    """
+    added = skipped = 0
+    for kept, missing in iter_batches(iter_playlist(path), batch_size, skip_missing):
+        skipped += missing
+        if kept:
+            on_batch(kept)
+            added += len(kept)
+    return added, skipped
+
+
+# ===== Writing =====
+
+@lru_cache(maxsize=DIR_CACHE_SIZE)
+def _relative_folder(folder: str, base_dir: str) -> str:
+    try:
+        return os.path.relpath(folder, base_dir)
+    except ValueError:
+        return folder  # Different drive on Windows
+
+
+def _relative(track: str, base_dir: str) -> str:
+    # relpath is slow; tracks share few folders, so resolve per folder
+    folder, name = os.path.split(track)
+    rel = _relative_folder(folder, base_dir)
+    return name if rel == os.curdir else os.path.join(rel, name)
+
+
+def _file_uri(track: str, base_dir: str, relative: bool) -> str:
+    if relative:
+        rel = _relative(track, base_dir)
+        if not os.path.isabs(rel):
+            return quote(rel.replace(os.sep, "/"))
+    from pathlib import Path
+    return Path(os.path.abspath(track)).as_uri()
+
+
+def _xml_escape(text: str) -> str:
+    return (text.replace("&", "&amp;").replace("<", "&lt;")
+            .replace(">", "&gt;").replace('"', "&quot;"))
+
+
+def _write_m3u(tracks, base_dir, relative):
+    yield "#EXTM3U"
+    for track in tracks:
+        name = os.path.splitext(os.path.basename(track))[0]
+        yield f"#EXTINF:-1,{name}"
+        yield _relative(track, base_dir) if relative else track
+
+
+def _write_pls(tracks, base_dir, relative):
+    yield "[playlist]"
+    count = 0
+    for count, track in enumerate(tracks, 1):
+        yield f"File{count}={_relative(track, base_dir) if relative else track}"
+    yield f"NumberOfEntries={count}"
+    yield "Version=2"
+
+
+def _write_xspf(tracks, base_dir, relative):
+    yield '<?xml version="1.0" encoding="UTF-8"?>'
+    yield f'<playlist version="1" xmlns="{XSPF_NS}">'
+    yield "  <trackList>"
+    for track in tracks:
+        title = _xml_escape(os.path.splitext(os.path.basename(track))[0])
+        location = _xml_escape(_file_uri(track, base_dir, relative))
+        yield f"    <track><location>{location}</location><title>{title}</title></track>"
+    yield "  </trackList>"
+    yield "</playlist>"
+
+
+def _write_json(tracks, base_dir, relative):
+    # One entry per line keeps the file diffable and cheap to stream back
+    yield '{"version": 1, "tracks": ['
+    first = True
+    for track in tracks:
+        entry = json.dumps(_relative(track, base_dir) if relative else track, ensure_ascii=False)
+        yield entry if first else "," + entry
+        first = False
+    yield "]}"
+
+
+_WRITERS = {
+    "m3u": _write_m3u,
+    "pls": _write_pls,
+    "xspf": _write_xspf,
+    "json": _write_json,
+}
+
+
+def export_playlist(path: str, tracks: Iterable[str], relative: bool = True) -> int:
+    """
+    Write tracks to a playlist file (format from the extension). Paths are
+    stored relative to the playlist's folder when `relative` is set.
+    Written to a temp file first, then moved into place. Returns the entry count.
+    """
+    fmt = detect_format(path)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    count = 0
+
+    def counted():
+        nonlocal count
+        for track in tracks:
+            count += 1
+            yield track
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8", newline="\n", buffering=READ_CHUNK) as f:
+        lines = []
+        for line in _WRITERS[fmt](counted(), base_dir, relative):
+            lines.append(line)
+            if len(lines) >= WRITE_LINES:
+                f.write("\n".join(lines) + "\n")
+                lines = []
+        if lines:
+            f.write("\n".join(lines) + "\n")
+    os.replace(tmp, path)
+    return count
@@ -0,0 +1,133 @@
+"""
+Progress aggregation - coalesce high-rate updates, publish at a fixed rate
+
+Workers report progress as often as they like (yt-dlp calls its hook on
+every chunk); update() only records the latest figures. A publisher
+thread hands the keys that changed to `publish` at most `rate` times a
+second, so listeners see a bounded update rate however many tasks run
+and however fast they go. Throughput is a moving average over time
+rather than over samples, so ETAs don't jump around with chunk timing.
+"""
+import math
+import threading
+import time
+from typing import Callable, Hashable, Optional, Set, Tuple
+
+from config.settings import PROGRESS_UPDATES_PER_S
+
+SAMPLE_INTERVAL_S = 0.25     # Throughput is measured over at least this long
+SPEED_TIME_CONSTANT_S = 3.0  # Averaging window of the smoothed throughput
+
+
+class _Task:
+    __slots__ = ("done", "total", "speed", "sample_done", "sample_time")
+
+    def __init__(self, done: float, total: float, now: float):
+        self.done = done
+        self.total = total
+        self.speed = None
+        self.sample_done = done
+        self.sample_time = now
+
+
+class ProgressAggregator:
+    """
+    Latest progress per task key, published in coalesced batches.
+
+    `publish(keys)` runs on the aggregator's own thread with the set of
+    keys updated since the last call; it reads figures back with stats().
+    Units are the caller's (bytes for downloads, a 0..1 fraction for
+    conversions) - speed is units per second, ETA is seconds.
+    """
+
+    def __init__(self, publish: Callable[[Set[Hashable]], None],
+                 rate: float = PROGRESS_UPDATES_PER_S,
+                 time_constant: float = SPEED_TIME_CONSTANT_S):
+        self.publish = publish
+        self.interval = 1.0 / rate
+        self.time_constant = time_constant
+        self._tasks = {}      # key -> _Task
+        self._dirty = set()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+    def update(self, key: Hashable, done: float, total: float = 0):
+        """Record progress; cheap enough to call on every chunk."""
+        now = time.monotonic()
+        with self._cond:
+            task = self._tasks.get(key)
+            if task is None or done < task.sample_done:
+                task = self._tasks[key] = _Task(done, total, now)  # New, or restarted
+            task.done = done
+            task.total = total
+            elapsed = now - task.sample_time
+            if elapsed >= SAMPLE_INTERVAL_S:
+                rate = (done - task.sample_done) / elapsed
+                if task.speed is None:
+                    task.speed = rate
+                else:
+                    weight = 1 - math.exp(-elapsed / self.time_constant)
+                    task.speed += weight * (rate - task.speed)
+                task.sample_done = done
+                task.sample_time = now
+            self._dirty.add(key)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="progress", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def discard(self, key: Hashable):
+        """Forget a task (finished, failed or moved to another stage)."""
+        with self._cond:
+            self._tasks.pop(key, None)
+            self._dirty.discard(key)
+
+    def stats(self, key: Hashable) -> Tuple[Optional[float], Optional[float]]:
+        """Smoothed (speed, ETA in seconds) of a task; None where not known yet."""
+        with self._cond:
+            task = self._tasks.get(key)
+            if task is None or task.speed is None:
+                return None, None
+            eta = None
+            if task.speed > 0 and task.total > task.done:
+                eta = (task.total - task.done) / task.speed
+            return task.speed, eta
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._dirty and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                keys, self._dirty = self._dirty, set()
+            try:
+                self.publish(keys)
+            except Exception as e:
+                print(f"Error publishing progress: {e}")
+            time.sleep(self.interval)
+
+
+def format_speed(bytes_per_s: float) -> str:
+    """Human-readable throughput, e.g. "1.4 MB/s"."""
+    for unit in ("B/s", "KB/s", "MB/s"):
+        if bytes_per_s < 1024:
+            return f"{bytes_per_s:.0f} {unit}" if unit == "B/s" else f"{bytes_per_s:.1f} {unit}"
+        bytes_per_s /= 1024
+    return f"{bytes_per_s:.1f} GB/s"
+
+
+def format_eta(seconds: float) -> str:
+    """Time left as m:ss (h:mm:ss when long)."""
+    seconds = int(math.ceil(seconds))
+    mins, secs = divmod(seconds, 60)
+    if mins >= 60:
+        hours, mins = divmod(mins, 60)
+        return f"{hours}:{mins:02d}:{secs:02d}"
+    return f"{mins}:{secs:02d}"
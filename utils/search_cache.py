@@ -0,0 +1,111 @@
+"""
+Search result cache - memory + disk, with a TTL and stale-while-revalidate
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a search query."""
+    return " ".join(query.lower().split())
+
+
+class SearchCache:
+    """
+    Caches search results by key in memory (LRU) and on disk (one small
+    JSON file per key, written atomically).
+
+    get() returns (results, age in seconds) for entries younger than
+    `max_age`; whether an entry is fresh or only good enough to show
+    while refreshing (or while offline) is up to the caller via `ttl`.
+    """
+
+    def __init__(self, directory: str, ttl: float, max_age: float,
+                 memory_entries: int = 64, disk_entries: int = 500):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_age = max_age
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self._memory = OrderedDict()  # key -> (timestamp, results)
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def _remember(self, key: str, stamp: float, results: list):
+        self._memory[key] = (stamp, results)
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Tuple[list, float]]:
+        """Cached (results, age) or None. Results are copies - safe to mutate."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+        if entry is None:
+            try:
+                with open(self._path(key), encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("key") != key:
+                    return None  # Hash collision
+                entry = (data["time"], data["results"])
+            except (OSError, ValueError, KeyError):
+                return None
+            with self._lock:
+                self._remember(key, *entry)
+
+        stamp, results = entry
+        age = time.time() - stamp
+        if age > self.max_age:
+            return None
+        return [dict(r) for r in results], age
+
+    def is_fresh(self, age: float) -> bool:
+        return age < self.ttl
+
+    def put(self, key: str, results: list):
+        """Store results in memory and on disk."""
+        stamp = time.time()
+        results = [dict(r) for r in results]
+        with self._lock:
+            self._remember(key, stamp, results)
+            self._writes += 1
+            prune = self._writes % 50 == 1
+
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"key": key, "time": stamp, "results": results}, f)
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Error writing search cache: {e}")
+            return
+        if prune:
+            self._prune()
+
+    def _prune(self):
+        """Keep at most `disk_entries` files, dropping the oldest."""
+        try:
+            entries = [e for e in os.scandir(self.directory) if e.name.endswith(".json")]
+        except OSError:
+            return
+        if len(entries) <= self.disk_entries:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[:len(entries) - self.disk_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
@@ -0,0 +1,132 @@
+"""
+Startup helpers - background warm-up of heavy modules and a startup profiler
+"""
+import builtins
+import importlib
+import sys
+import threading
+import time
+
+# Loaded after the first frame, in this order (most urgent first)
+WARMUP_MODULES = (
+    "numpy",
+    "PIL.ImageTk",
+    "mutagen",
+    "mutagen.mp3",
+    "pydub",
+    "utils.metadata",
+    "utils.waveform",
+    "core.player",
+)
+
+
+def warm_up(modules=WARMUP_MODULES, on_done=None) -> threading.Thread:
+    """Import heavy modules on a daemon thread so first use is instant."""
+
+    def _run():
+        # pydub needs its ffmpeg paths before anything decodes
+        try:
+            from utils.windows_patch import configure_pydub
+            configure_pydub()
+        except Exception:
+            pass
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                print(f"Warm-up import failed for {name}: {e}")
+        if on_done:
+            on_done()
+
+    thread = threading.Thread(target=_run, name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+class StartupProfiler:
+    """
+    Records import times and startup phases for --profile-startup.
+
+    Wraps builtins.__import__ so every first-time `import` is timed
+    (cumulative and self time, per thread), and collects named phase
+    marks relative to when the profiler was created.
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.phases = []
+        self.imports = []
+        self._original_import = None
+        self._local = threading.local()
+
+    def mark(self, phase: str):
+        """Record a startup phase at the current time."""
+        self.phases.append((phase, time.perf_counter() - self.t0))
+
+    def elapsed(self, phase: str) -> float:
+        for name, t in self.phases:
+            if name == phase:
+                return t
+        return 0.0
+
+    def install(self):
+        """Start timing imports."""
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def uninstall(self):
+        if self._original_import:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import
+        if level or name in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+
+        started = time.perf_counter()
+        stack.append(0.0)
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            total = time.perf_counter() - started
+            children = stack.pop()
+            if stack:
+                stack[-1] += total
+            self.imports.append({
+                "module": name,
+                "cumulative": total,
+                "self": total - children,
+                "depth": len(stack),
+                "thread": threading.current_thread().name,
+                "at": started - self.t0,
+            })
+
+    def report(self, budget_ms: float = None, top: int = 15) -> str:
+        """Human-readable startup report."""
+        lines = ["", "=== Startup profile ==="]
+        for phase, t in self.phases:
+            lines.append(f"  {phase:<28} {t * 1000:8.1f} ms")
+
+        paint = self.elapsed("first_paint")
+        main_imports = [i for i in self.imports
+                        if i["thread"] == "MainThread" and (not paint or i["at"] < paint)]
+        top_level = [i for i in main_imports if i["depth"] == 0]
+        lines.append("")
+        lines.append(f"  Imports before first paint: {sum(i['cumulative'] for i in top_level) * 1000:.1f} ms")
+        for i in sorted(top_level, key=lambda i: i["cumulative"], reverse=True)[:top]:
+            lines.append(f"    {i['module']:<30} {i['cumulative'] * 1000:8.1f} ms")
+
+        warm = [i for i in self.imports if i["thread"] == "warmup" and i["depth"] == 0]
+        if warm:
+            lines.append(f"  Background warm-up imports: {sum(i['cumulative'] for i in warm) * 1000:.1f} ms")
+
+        if budget_ms is not None and paint:
+            status = "OK" if paint * 1000 <= budget_ms else "OVER BUDGET"
+            lines.append("")
+            lines.append(f"  First paint {paint * 1000:.1f} ms / budget {budget_ms:.0f} ms - {status}")
+        return "\n".join(lines)
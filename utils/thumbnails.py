@@ -0,0 +1,228 @@
+"""
+Thumbnail loader for search results - pooled downloads, disk + memory cache
+
+One requests.Session (keep-alive) is shared by a small worker pool.
+Downloaded files are stored by the hash of their content, with a tiny
+ref file per URL pointing at it, so identical images (e.g. YouTube's
+"no thumbnail" placeholder) are stored once. Decoded, resized PIL images
+are handed to callbacks directly - no re-encoding between threads.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+from config.settings import (
+    THUMBNAIL_CACHE_DIR, THUMBNAIL_WORKERS,
+    THUMBNAIL_MEMORY_ENTRIES, THUMBNAIL_DISK_ENTRIES
+)
+
+# YouTube thumbnail variants, smallest first: (file name, width, height)
+YOUTUBE_VARIANTS = (
+    ("default.jpg", 120, 90),
+    ("mqdefault.jpg", 320, 180),
+    ("hqdefault.jpg", 480, 360),
+    ("sddefault.jpg", 640, 480),
+)
+REQUEST_TIMEOUT = 10
+
+
+def youtube_thumbnail_url(video_id: str, size: Tuple[int, int]) -> str:
+    """URL of the smallest thumbnail variant that covers `size` pixels."""
+    width, height = size
+    name = YOUTUBE_VARIANTS[-1][0]
+    for variant, w, h in YOUTUBE_VARIANTS:
+        if w >= width and h >= height:
+            name = variant
+            break
+    return f"https://i.ytimg.com/vi/{video_id}/{name}"
+
+
+def _sha1(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+class ThumbnailLoader:
+    """
+    Loads thumbnails on a bounded thread pool.
+
+    load() returns a Future; the callback gets a resized PIL image (or
+    None on failure) on a worker thread, so UI code should hop back to
+    the main thread itself. get_cached() answers memory hits synchronously.
+    """
+
+    def __init__(self, directory: str = THUMBNAIL_CACHE_DIR,
+                 workers: int = THUMBNAIL_WORKERS,
+                 memory_entries: int = THUMBNAIL_MEMORY_ENTRIES,
+                 disk_entries: int = THUMBNAIL_DISK_ENTRIES):
+        self.directory = directory
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail")
+        self._memory = OrderedDict()  # (url, size) -> PIL image
+        self._lock = threading.Lock()
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._writes = 0
+
+    # ===== Cache =====
+
+    def get_cached(self, url: str, size: Tuple[int, int]):
+        """Resized image from memory, or None."""
+        key = (url, tuple(size))
+        with self._lock:
+            image = self._memory.get(key)
+            if image is not None:
+                self._memory.move_to_end(key)
+            return image
+
+    def _remember(self, key, image):
+        with self._lock:
+            self._memory[key] = image
+            self._memory.move_to_end(key)
+            if len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _ref_path(self, url: str) -> str:
+        return os.path.join(self.directory, "refs", _sha1(url.encode("utf-8")))
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], f"{digest}.jpg")
+
+    def _read_disk(self, url: str) -> Optional[bytes]:
+        try:
+            with open(self._ref_path(url), encoding="ascii") as f:
+                digest = f.read().strip()
+            with open(self._blob_path(digest), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, url: str, data: bytes):
+        digest = _sha1(data)
+        blob = self._blob_path(digest)
+        ref = self._ref_path(url)
+        try:
+            if not os.path.exists(blob):
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                self._atomic_write(blob, data)
+            os.makedirs(os.path.dirname(ref), exist_ok=True)
+            self._atomic_write(ref, digest.encode("ascii"))
+        except OSError as e:
+            print(f"Error caching thumbnail: {e}")
+            return
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % 100 == 1
+        if prune:
+            self._prune()
+
+    @staticmethod
+    def _atomic_write(path: str, data: bytes):
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _prune(self):
+        """Keep at most `disk_entries` refs; drop blobs nothing points at."""
+        refs_dir = os.path.join(self.directory, "refs")
+        try:
+            refs = list(os.scandir(refs_dir))
+        except OSError:
+            return
+        if len(refs) <= self.disk_entries:
+            return
+        refs.sort(key=lambda e: e.stat().st_mtime)
+        for entry in refs[:len(refs) - self.disk_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+        live = set()
+        for entry in os.scandir(refs_dir):
+            try:
+                with open(entry.path, encoding="ascii") as f:
+                    live.add(f.read().strip())
+            except OSError:
+                pass
+        for folder in os.scandir(self.directory):
+            if folder.name == "refs" or not folder.is_dir():
+                continue
+            for blob in os.scandir(folder.path):
+                if blob.name.endswith(".jpg") and blob.name[:-4] not in live:
+                    try:
+                        os.remove(blob.path)
+                    except OSError:
+                        pass
+
+    # ===== Loading =====
+
+    def _get_session(self):
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.workers)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+            return self._session
+
+    def _fetch(self, url: str) -> Optional[bytes]:
+        data = self._read_disk(url)
+        if data is not None:
+            return data
+        response = self._get_session().get(url, timeout=REQUEST_TIMEOUT)
+        if response.status_code != 200:
+            return None
+        data = response.content
+        self._write_disk(url, data)
+        return data
+
+    def _load(self, url: str, size: Tuple[int, int]):
+        key = (url, tuple(size))
+        image = self.get_cached(url, size)
+        if image is not None:
+            return image
+        data = self._fetch(url)
+        if not data:
+            return None
+
+        from io import BytesIO
+        from PIL import Image
+        image = Image.open(BytesIO(data))
+        image.draft("RGB", key[1])  # Let the JPEG decoder downscale for us
+        image = image.convert("RGB").resize(key[1], Image.Resampling.LANCZOS)
+        self._remember(key, image)
+        return image
+
+    def load(self, url: str, size: Tuple[int, int],
+             callback: Callable[[object], None]):
+        """Load `url` resized to `size` and pass the PIL image (or None) to callback."""
+
+        def _run():
+            try:
+                image = self._load(url, size)
+            except Exception:
+                image = None  # Thumbnails are best-effort
+            callback(image)
+
+        return self._executor.submit(_run)
+
+
+_loader = None
+_loader_lock = threading.Lock()
+
+
+def get_thumbnail_loader() -> ThumbnailLoader:
+    """Process-wide thumbnail loader."""
+    global _loader
+    with _loader_lock:
+        if _loader is None:
+            _loader = ThumbnailLoader()
+        return _loader
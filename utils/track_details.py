@@ -0,0 +1,255 @@
+"""
+Track details loader - tags, cover art and waveform for the current track
+
+Track changes can come much faster than details load (mashing "next").
+Only the newest track matters, so each stage runs on one worker that
+keeps a single pending job: a newer request replaces it instead of
+queueing behind it. Tags and art run on one worker and the waveform on
+another, so a long decode never delays the next track's title. A
+superseded job stops at the next stage boundary, and the waveform
+decode checks as it goes and stops early.
+
+While a track plays, a third worker prepares the next few tracks into
+an in-memory cache, so a track change can show its title, art and
+waveform in the same frame as the click. Waveforms are also read from
+and saved to the on-disk analysis store (see utils.analysis).
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List
+
+from config.settings import TRACK_DETAIL_CACHE_ENTRIES, PREFETCH_PAUSE_S
+
+
+class LatestWorker:
+    """One daemon thread that only ever runs the newest submitted job."""
+
+    def __init__(self, run: Callable, name: str):
+        self.run = run
+        self.name = name
+        self._pending = None
+        self._cond = threading.Condition()
+        self._thread = None
+        self.replaced = 0  # Jobs dropped before they started
+
+    def submit(self, *args):
+        with self._cond:
+            if self._pending is not None:
+                self.replaced += 1
+            self._pending = args
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    self._cond.wait()
+                args, self._pending = self._pending, None
+            try:
+                self.run(*args)
+            except Exception as e:
+                print(f"Error in {self.name}: {e}")
+
+
+class TrackDetailLoader:
+    """
+    Latest-wins loader for the details of the playing track, with a
+    small cache that a low-priority prefetcher fills for upcoming tracks.
+
+    load(filepath, token) supersedes every earlier load. Results are
+    passed, on worker threads, to on_meta(token, filepath, meta),
+    on_art(token, pil_image) and on_waveform(token, heights or None) -
+    only while `token` is still the newest. A newer load() can still
+    land between that check and the UI applying the result, so receivers
+    compare tokens once more on the UI thread.
+
+    cached(filepath) answers on the UI thread, from memory or (for the
+    waveform) one small analysis record; stages the caller already
+    showed from it are passed as `shown` and skipped.
+    """
+
+    def __init__(self, on_meta: Callable, on_art: Callable, on_waveform: Callable,
+                 cache_entries: int = TRACK_DETAIL_CACHE_ENTRIES):
+        self.on_meta = on_meta
+        self.on_art = on_art
+        self.on_waveform = on_waveform
+        self.cache_entries = cache_entries
+        self.token = None
+        self._cache = OrderedDict()  # path -> {"stamp", "meta", "art", "heights"}
+        self._cache_lock = threading.Lock()
+        self._idle = threading.Event()  # Set while no foreground load is running
+        self._idle.set()
+        self._prefetch_generation = 0
+        self._details = LatestWorker(self._load_details, "track-details")
+        self._waveform = LatestWorker(self._load_waveform, "track-waveform")
+        self._prefetcher = LatestWorker(self._prefetch, "track-prefetch")
+
+    def load(self, filepath: str, token: int, shown=()):
+        """Load details for the new current track; `shown` stages came from cached()."""
+        self.token = token
+        self._idle.clear()
+        self._details.submit(filepath, token, frozenset(shown))
+
+    def is_current(self, token: int) -> bool:
+        return token == self.token
+
+    def is_idle(self) -> bool:
+        """True while no foreground load is running."""
+        return self._idle.is_set()
+
+    def prefetch(self, filepaths: List[str]):
+        """Warm the cache for these tracks, in order, whenever foreground loads are idle."""
+        self._prefetch_generation += 1
+        self._prefetcher.submit(list(filepaths), self._prefetch_generation)
+
+    # ===== Cache =====
+
+    def cached(self, filepath: str) -> dict:
+        """Cached stages for a track: any of "meta", "art", "heights"."""
+        from utils.analysis import get_analysis_store
+
+        stamp = _file_stamp(filepath)
+        with self._cache_lock:
+            entry = self._cache.get(filepath)
+            if entry is not None and entry["stamp"] == stamp:
+                self._cache.move_to_end(filepath)
+                stages = {k: v for k, v in entry.items() if k != "stamp"}
+            else:
+                stages = {}
+        if "heights" not in stages:
+            # Analyzed in the background, or played in an earlier session
+            heights = get_analysis_store().heights(filepath)
+            if heights is not None:
+                self._store(filepath, heights=heights)
+                stages["heights"] = heights
+        return stages
+
+    def _store(self, filepath: str, **stages):
+        stamp = _file_stamp(filepath)
+        with self._cache_lock:
+            entry = self._cache.get(filepath)
+            if entry is None or entry["stamp"] != stamp:
+                entry = self._cache[filepath] = {"stamp": stamp}
+            entry.update(stages)
+            self._cache.move_to_end(filepath)
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+
+    # ===== Foreground =====
+
+    def _load_details(self, filepath: str, token: int, shown: frozenset):
+        from utils.metadata import probe_track, extract_album_art
+
+        if not self.is_current(token):
+            return
+        entry = self.cached(filepath)
+        meta, art = entry.get("meta"), entry.get("art")
+        if meta is None or art is None:
+            try:
+                # Tags, length and cover art from one parse of the file
+                probe = probe_track(filepath)
+                art = extract_album_art(filepath, probe)
+            except Exception:
+                if self.is_current(token):
+                    self._idle.set()  # Nothing more is coming for this track
+                raise
+            meta = {k: v for k, v in probe.items() if k != "art"}  # Raw art bytes aren't kept
+            self._store(filepath, meta=meta, art=art)
+        if not self.is_current(token):
+            return
+        if "meta" not in shown:
+            self.on_meta(token, filepath, meta)
+        if "art" not in shown:
+            self.on_art(token, art)
+
+        # Slowest stage - only started for a track that is still current
+        self._waveform.submit(filepath, token, shown)
+
+    def _load_waveform(self, filepath: str, token: int, shown: frozenset):
+        from utils.waveform import compute_waveform
+
+        try:
+            if not self.is_current(token):
+                return
+            entry = self.cached(filepath)
+            if "heights" in entry:
+                heights = entry["heights"]
+            else:
+                try:
+                    heights = compute_waveform(filepath, cancelled=lambda: not self.is_current(token))
+                except Exception:
+                    heights = None
+                if not self.is_current(token):
+                    return
+                self._store(filepath, heights=heights)
+                _save_heights(filepath, heights)
+            if "heights" not in shown:
+                self.on_waveform(token, heights)
+        finally:
+            if self.is_current(token):
+                self._idle.set()
+
+    # ===== Prefetch =====
+
+    def _prefetch(self, filepaths: List[str], generation: int):
+        """
+        Fill the cache for upcoming tracks. Runs only while no foreground
+        load is busy, decodes at low OS priority and pauses between tracks.
+        """
+        from utils.metadata import probe_track, extract_album_art
+        from utils.waveform import compute_waveform
+
+        def superseded():
+            return generation != self._prefetch_generation
+
+        def interrupted():
+            return superseded() or not self._idle.is_set()
+
+        for filepath in filepaths:
+            while True:
+                self._idle.wait()
+                if superseded():
+                    return
+                entry = self.cached(filepath)
+                if "meta" not in entry or "art" not in entry:
+                    try:
+                        probe = probe_track(filepath)
+                        art = extract_album_art(filepath, probe)
+                    except Exception:
+                        break  # Unreadable - the foreground load will report it
+                    self._store(filepath, meta={k: v for k, v in probe.items() if k != "art"},
+                                art=art)
+                    continue  # Let a track change in between take precedence
+                if "heights" not in entry:
+                    try:
+                        heights = compute_waveform(filepath, cancelled=interrupted,
+                                                   low_priority=True)
+                    except Exception:
+                        heights = None
+                    if heights is None and interrupted():
+                        continue  # Stopped for a foreground load - retry once idle
+                    self._store(filepath, heights=heights)
+                    _save_heights(filepath, heights)
+                break
+            time.sleep(PREFETCH_PAUSE_S)
+
+
+def _save_heights(filepath: str, heights: list):
+    """Keep a decoded waveform on disk for later sessions."""
+    from utils.analysis import get_analysis_store
+    if heights is not None:
+        get_analysis_store().put_heights(filepath, heights)
+
+
+def _file_stamp(filepath: str):
+    """Changes when the file does."""
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return stat.st_mtime, stat.st_size
@@ -1,28 +1,45 @@
 """
 Waveform computation utilities - Optimized for speed
 """
+from typing import Callable, Optional
+
 import numpy as np
 from config.settings import WAVEFORM_WIDTH, WAVEFORM_HEIGHT
 
+WAVEFORM_SAMPLE_RATE = 8000  # Lower sample rate = faster
+
+
 def compute_waveform(filepath: str, width: int = WAVEFORM_WIDTH, 
-                     height: int = WAVEFORM_HEIGHT) -> list:
+                     height: int = WAVEFORM_HEIGHT,
+                     cancelled: Optional[Callable[[], bool]] = None,
+                     low_priority: bool = False) -> list:
     """
     Compute waveform visualization data from audio file.
     Returns list of normalized vertical heights for drawing.
     
-    Optimized version - samples audio instead of reading entire file.
+    Optimized version - decodes mono at a low sample rate, in blocks, so
+    `cancelled()` is checked as it goes; returns None if it says so.
+    `low_priority` runs the decoder below normal priority (prefetch).
     """
-    from pydub import AudioSegment
+    from utils.decoder import PCMDecoder
     
-    # Load audio with lower sample rate for speed
-    seg = AudioSegment.from_file(filepath)
-    
-    # Convert to mono and reduce sample rate for faster processing
-    seg = seg.set_channels(1)
-    seg = seg.set_frame_rate(8000)  # Lower sample rate = faster
+    # Decode with lower sample rate for speed
+    decoder = PCMDecoder(filepath, sample_rate=WAVEFORM_SAMPLE_RATE, channels=1,
+                         low_priority=low_priority)
+    blocks = []
+    try:
+        while True:
+            if cancelled is not None and cancelled():
+                return None  # Track changed - stop decoding
+            block = decoder.read_block(WAVEFORM_SAMPLE_RATE)  # One second at a time
+            if block is None:
+                break
+            blocks.append(block[:, 0])
+    finally:
+        decoder.close()
     
     # Get raw samples
-    raw = np.array(seg.get_array_of_samples(), dtype=np.float32)
+    raw = np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
     
     if raw.size == 0:
         raise ValueError("No audio samples")
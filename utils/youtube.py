@@ -4,65 +4,280 @@ YouTube search and download utilities using yt-dlp
 import os
 import threading
 import re
+from contextlib import ExitStack
+from itertools import islice
 from typing import Callable, Optional
-import yt_dlp
 
-from utils.paths import get_ffmpeg_path
-from config.settings import MUSIC_DOWNLOAD_FOLDER, MAX_SEARCH_RESULTS
+from utils.search_cache import SearchCache, normalize_query
+from utils.ytdl_pool import get_pool
+from config.settings import (
+    MUSIC_DOWNLOAD_FOLDER, MAX_SEARCH_RESULTS, SEARCH_MAX_TOTAL,
+    YT_SEARCH_CACHE_DIR, YT_SEARCH_CACHE_TTL_S, YT_SEARCH_CACHE_MAX_AGE_S
+)
 
 
 # Ensure download folder exists
 os.makedirs(MUSIC_DOWNLOAD_FOLDER, exist_ok=True)
 
 
-def search_youtube(query: str, max_results: int = MAX_SEARCH_RESULTS) -> list:
+_search_cache = None
+_refreshing = set()
+_refresh_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    """Process-wide search cache (memory + disk)."""
+    global _search_cache
+    if _search_cache is None:
+        _search_cache = SearchCache(
+            YT_SEARCH_CACHE_DIR,
+            ttl=YT_SEARCH_CACHE_TTL_S,
+            max_age=YT_SEARCH_CACHE_MAX_AGE_S,
+        )
+    return _search_cache
+
+
+def search_youtube(
+    query: str,
+    max_results: int = MAX_SEARCH_RESULTS,
+    on_update: Optional[Callable[[list], None]] = None,
+    use_cache: bool = True
+) -> list:
     """
     Search YouTube for videos.
     Returns list of dicts with: id, title, duration, channel, thumbnail
+    
+    Repeat queries are answered from the cache. Entries older than the
+    TTL are still returned immediately while a background refresh runs;
+    on_update(results) is called if the refresh brings different results.
+    When the network is down, past results are returned instead of nothing.
     """
-    ydl_opts = {
-        'quiet': True,
-        'no_warnings': True,
-        'extract_flat': True,  # Keep it fast
-        'default_search': 'ytsearch',
-    }
+    key = _cache_key(query, max_results)
+    cache = get_search_cache() if use_cache else None
+    cached = cache.get(key) if cache else None
     
-    results = []
+    if cached:
+        results, age = cached
+        if not cache.is_fresh(age):
+            _refresh_in_background(key, query, max_results, results, on_update)
+        return results
     
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            search_results = ydl.extract_info(
-                f"ytsearch{max_results}:{query}", 
-                download=False
-            )
-            
-            if search_results and 'entries' in search_results:
-                for entry in search_results['entries']:
-                    if entry:
-                        # Format duration
-                        duration = entry.get('duration', 0) or 0
-                        mins, secs = divmod(int(duration), 60)
-                        
-                        # Construct thumbnail URL from video ID
-                        video_id = entry.get('id', '')
-                        thumbnail = f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg" if video_id else ""
-                        
-                        results.append({
-                            'id': video_id,
-                            'title': entry.get('title', 'Unknown'),
-                            'duration': f"{mins}:{secs:02d}",
-                            'duration_seconds': duration,
-                            'channel': entry.get('channel', entry.get('uploader', 'Unknown')),
-                            'url': f"https://www.youtube.com/watch?v={video_id}",
-                            'thumbnail': thumbnail,
-                        })
+        results = _search_network(query, max_results)
     except Exception:
-        pass  # On error, return empty list
-        
-    
+        return []  # On error, return empty list
+    if cache and results:
+        cache.put(key, results)
     return results
 
 
+def _cache_key(query: str, max_results: int) -> str:
+    return f"{normalize_query(query)}|{max_results}"
+
+
+def _refresh_in_background(key, query, max_results, old_results, on_update):
+    """Stale-while-revalidate: refetch once per key, tell the caller if it changed."""
+    with _refresh_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+    
+    def _refresh():
+        try:
+            results = _search_network(query, max_results)
+            if results:
+                get_search_cache().put(key, results)
+                changed = [r["id"] for r in results] != [r["id"] for r in old_results]
+                if changed and on_update:
+                    on_update(results)
+        except Exception:
+            pass  # Offline - keep serving the cached results
+        finally:
+            with _refresh_lock:
+                _refreshing.discard(key)
+    
+    threading.Thread(target=_refresh, name="search-refresh", daemon=True).start()
+
+
+def _search_network(query: str, max_results: int) -> list:
+    """Run the actual yt-dlp search. Raises on network/extractor errors."""
+    with get_pool("search").borrow() as ydl:
+        return list(islice(_iter_entries(ydl, query, max_results), max_results))
+
+
+def _iter_entries(ydl, query: str, max_results: int):
+    """
+    Search results as yt-dlp's lazy search generator produces them.
+    With process=False nothing is materialized up front; each further
+    page of YouTube results is requested only when iteration reaches it.
+    """
+    search_results = ydl.extract_info(
+        f"ytsearch{max_results}:{query}", 
+        download=False,
+        process=False
+    )
+    for entry in (search_results or {}).get('entries') or ():
+        if entry:
+            yield _to_result(entry)
+
+
+def _to_result(entry: dict) -> dict:
+    """Search result dict for one flat yt-dlp entry."""
+    # Format duration
+    duration = entry.get('duration', 0) or 0
+    mins, secs = divmod(int(duration), 60)
+    
+    # Construct thumbnail URL from video ID
+    video_id = entry.get('id', '')
+    thumbnail = f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg" if video_id else ""
+    
+    return {
+        'id': video_id,
+        'title': entry.get('title', 'Unknown'),
+        'duration': f"{mins}:{secs:02d}",
+        'duration_seconds': duration,
+        'channel': entry.get('channel', entry.get('uploader', 'Unknown')),
+        'url': f"https://www.youtube.com/watch?v={video_id}",
+        'thumbnail': thumbnail,
+    }
+
+
+class SearchStream:
+    """
+    One YouTube search, read a page at a time.
+
+    Results come from yt-dlp's lazy search generator and are handed to
+    `on_result` one by one as they are parsed, so the first can be shown
+    before the page is complete and later pages cost only the requests
+    they need. prefetch() reads the next page ahead in the background;
+    next_page() then returns it instantly. The generator keeps a pooled
+    yt-dlp instance until the stream is exhausted or closed.
+
+    Calls block on network I/O - run them off the UI thread.
+    """
+
+    def __init__(self, query: str, page_size: int = MAX_SEARCH_RESULTS,
+                 max_results: int = SEARCH_MAX_TOTAL):
+        self.query = query
+        self.page_size = page_size
+        self.max_results = max_results
+        self.results = []     # Delivered so far
+        self.exhausted = False
+        self._ahead = []      # Prefetched, not yet delivered
+        self._seen = set()
+        self._entries = None
+        self._stack = None
+        self._closed = False
+        self._lock = threading.Lock()  # One reader of the generator at a time
+
+    @property
+    def has_more(self) -> bool:
+        return bool(self._ahead) or not (self.exhausted or self._closed)
+
+    def first_page(self, on_result: Optional[Callable[[dict], None]] = None,
+                   on_update: Optional[Callable[[list], None]] = None) -> list:
+        """
+        First page, from the search cache when possible (same TTL and
+        stale-while-revalidate rules as search_youtube), else streamed.
+        """
+        cache = get_search_cache()
+        key = _cache_key(self.query, self.page_size)
+        cached = cache.get(key)
+        if cached:
+            results, age = cached
+            if not cache.is_fresh(age):
+                def refreshed(new_results):
+                    self._accept(new_results)
+                    if on_update:
+                        on_update(new_results)
+                _refresh_in_background(key, self.query, self.page_size, results, refreshed)
+            self._accept(results)
+            if on_result:
+                for result in results:
+                    on_result(result)
+            return results
+
+        page = self.next_page(on_result)
+        if len(page) == self.page_size or (page and self.exhausted):
+            cache.put(key, page)
+        return page
+
+    def next_page(self, on_result: Optional[Callable[[dict], None]] = None) -> list:
+        """Up to page_size more results (fewer at the end; [] when exhausted)."""
+        page = []
+        with self._lock:
+            while len(page) < self.page_size:
+                result = self._ahead.pop(0) if self._ahead else self._pull()
+                if result is None:
+                    break
+                page.append(result)
+                self.results.append(result)
+                if on_result:
+                    on_result(result)
+            self._release_if_done()
+        return page
+
+    def prefetch(self):
+        """Read the next page into the look-ahead buffer."""
+        with self._lock:
+            while len(self._ahead) < self.page_size:
+                result = self._pull()
+                if result is None:
+                    break
+                self._ahead.append(result)
+            self._release_if_done()
+
+    def close(self):
+        """Stop the search and return its yt-dlp instance; never blocks."""
+        self._closed = True
+        if self._lock.acquire(blocking=False):
+            try:
+                self._release()
+            finally:
+                self._lock.release()
+        # Otherwise the reader holding the lock releases it when done
+
+    def _accept(self, results: list):
+        """Record results delivered from the cache."""
+        with self._lock:
+            for result in results:
+                if result['id'] not in self._seen:
+                    self._seen.add(result['id'])
+                    self.results.append(result)
+
+    # Callers of the methods below hold _lock
+
+    def _pull(self) -> Optional[dict]:
+        """Next unseen result from the generator, or None."""
+        if self.exhausted or self._closed:
+            return None
+        try:
+            if self._entries is None:
+                self._stack = ExitStack()
+                ydl = self._stack.enter_context(get_pool("search").borrow())
+                self._entries = _iter_entries(ydl, self.query, self.max_results)
+            for result in self._entries:
+                if result['id'] not in self._seen:
+                    self._seen.add(result['id'])
+                    return result
+        except Exception as e:
+            print(f"Error searching YouTube: {e}")
+        self.exhausted = True
+        return None
+
+    def _release_if_done(self):
+        if self.exhausted or self._closed:
+            self._release()
+
+    def _release(self):
+        if self._entries is not None:
+            self._entries.close()
+            self._entries = None
+        if self._stack is not None:
+            self._stack.close()
+            self._stack = None
+
+
 def sanitize_filename(title: str) -> str:
     """Remove invalid characters from filename."""
     # Remove invalid chars
@@ -79,10 +294,10 @@ def download_audio(
     on_progress: Optional[Callable[[float, str], None]] = None,
     on_complete: Optional[Callable[[str], None]] = None,
     on_error: Optional[Callable[[str], None]] = None
-) -> None:
+) -> int:
     """
     Download YouTube video as MP3.
-    Runs in background thread.
+    Queued on the shared download manager; returns the queue item id.
     
     Args:
         url: YouTube video URL
@@ -91,224 +306,27 @@ def download_audio(
         on_complete: Callback(filepath) when download completes
         on_error: Callback(error_message) on error
     """
+    from utils.downloads import get_download_manager, DONE, FAILED, CANCELLED
     
-    def _download():
-        try:
-            filename = sanitize_filename(title)
-            output_path = os.path.join(MUSIC_DOWNLOAD_FOLDER, filename)
-
-            # Store metadata for writing later
-            video_info = None
-            
-            def progress_hook(d):
-                nonlocal video_info
-
-                if d['status'] == 'downloading':
-                    # Calculate percentage
-                    total = d.get('total_bytes') or d.get('total_bytes_estimate', 0)
-                    downloaded = d.get('downloaded_bytes', 0)
-                    if total > 0:
-                        percent = (downloaded / total) * 100
-                        if on_progress:
-                            on_progress(percent, "Downloading...")
-                
-                elif d['status'] == 'finished':
-                    if on_progress:
-                        on_progress(90, "Converting to MP3...")
-            
-            # Use my local ffmpeg
-            ffmpeg_path = get_ffmpeg_path()
-
-            ydl_opts = {
-                'format': 'bestaudio/best',
-                'postprocessors': [{
-                    'key': 'FFmpegExtractAudio',
-                    'preferredcodec': 'mp3',
-                    'preferredquality': '192',
-                }],
-                'outtmpl': output_path,
-                'quiet': True,
-                'no_warnings': True,
-                'progress_hooks': [progress_hook],
-
-                # Bug Fix
-                'ffmpeg_location': ffmpeg_path,
-            }
-            
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                # Get video info for metadata
-                video_info = ydl.extract_info(url, download=False)
-                # Download
-                ydl.download([url])
-            
-            # Final path will have .mp3 extension
-            final_path = output_path + '.mp3'
-            
-            if os.path.exists(final_path):
-                # Write metadata to MP3 file
-                if on_progress:
-                    on_progress(95, "Adding metadata...") 
-                    _write_metadata(final_path, video_info, output_path)
-                if on_progress:
-                    on_progress(100, "Complete!")
-                if on_complete:
-                    on_complete(final_path)
-            else:
-                # Sometimes yt-dlp doesn't add extension
-                if os.path.exists(output_path):
-                    os.rename(output_path, final_path)
-                    if on_progress:
-                        on_progress(100, "Complete!")
-                    if on_complete:
-                        on_complete(final_path)
-                else:
-                    raise FileNotFoundError("Downloaded file not found")
-                    
-        except Exception as e:
-            if on_error:
-                on_error(str(e))
-    
-    # Run in background thread
-    thread = threading.Thread(target=_download, daemon=True)
-    thread.start()
-
-def _write_metadata(filepath: str, video_info: dict, base_path: str = None):
-    """
-    Write ID3 metadata to downloaded MP3 file including album art.
+    manager = get_download_manager()
     
-    Args:
-        filepath: Path to MP3 file
-        video_info: Video information from yt-dlp
-        base_path: Base path for finding thumbnail file
-    """
-    try:
-        from mutagen.mp3 import MP3
-        from mutagen.id3 import ID3, TIT2, TPE1, TALB, TDRC, TPE2, COMM, APIC
-        from PIL import Image
-        import io
-        
-        # Load or create ID3 tags
-        try:
-            audio = MP3(filepath, ID3=ID3)
-            audio.add_tags()
-        except:
-            audio = MP3(filepath)
-        
-        if video_info:
-            # Title
-            if 'title' in video_info:
-                audio['TIT2'] = TIT2(encoding=3, text=video_info['title'])
-            
-            # Artist (uploader/channel)
-            if 'uploader' in video_info:
-                audio['TPE1'] = TPE1(encoding=3, text=video_info['uploader'])
-                audio['TPE2'] = TPE2(encoding=3, text=video_info['uploader'])
-            
-            # Album (set as "YouTube Downloads")
-            audio['TALB'] = TALB(encoding=3, text="YouTube Downloads")
-            
-            # Year (upload date)
-            if 'upload_date' in video_info:
-                upload_date = video_info['upload_date']
-                year = upload_date[:4] if len(upload_date) >= 4 else None
-                if year:
-                    audio['TDRC'] = TDRC(encoding=3, text=year)
-            
-            # Comment (source URL)
-            if 'webpage_url' in video_info:
-                audio['COMM'] = COMM(
-                    encoding=3,
-                    lang='eng',
-                    desc='Source',
-                    text=video_info['webpage_url']
-                )
-            
-            # Album Art (thumbnail)
-            thumbnail_data = _get_thumbnail(video_info, base_path)
-            if thumbnail_data:
-                audio['APIC'] = APIC(
-                    encoding=3,
-                    mime='image/jpeg',
-                    type=3,  # Cover (front)
-                    desc='Cover',
-                    data=thumbnail_data
-                )
-        
-        # Save tags
-        audio.save()
-        
-    except Exception:
-        pass  # Ignore metadata writing errors
-
-
-def _get_thumbnail(video_info: dict, base_path: str = None) -> bytes:
-    """
-    Get and process thumbnail image for album art.
+    # The manager keeps one active item per URL, so URL identifies ours
+    def listener(item):
+        if item.url != url:
+            return
+        if item.state == DONE:
+            manager.remove_listener(listener)
+            if on_complete:
+                on_complete(item.filepath)
+        elif item.state in (FAILED, CANCELLED):
+            manager.remove_listener(listener)
+            if on_error:
+                on_error(item.error or "Cancelled")
+        elif on_progress:
+            on_progress(item.fraction * 100, item.status)
     
-    Args:
-        video_info: Video information from yt-dlp
-        base_path: Base path where thumbnail might be saved
-        
-    Returns:
-        Thumbnail image data as bytes, or None if not available
-    """
-    try:
-        from PIL import Image
-        import io
-        
-        # Try to find downloaded thumbnail file
-        if base_path:
-            # yt-dlp saves thumbnails with various extensions
-            for ext in ['.jpg', '.jpeg', '.png', '.webp']:
-                thumb_path = base_path + ext
-                if os.path.exists(thumb_path):
-                    # Load and convert image
-                    img = Image.open(thumb_path)
-                    
-                    # Resize to reasonable size (500x500 max)
-                    img.thumbnail((500, 500), Image.Resampling.LANCZOS)
-                    
-                    # Convert to JPEG
-                    output = io.BytesIO()
-                    if img.mode in ('RGBA', 'LA', 'P'):
-                        # Convert transparent images to RGB
-                        img = img.convert('RGB')
-                    img.save(output, format='JPEG', quality=85)
-                    
-                    # Clean up thumbnail file
-                    try:
-                        os.remove(thumb_path)
-                    except:
-                        pass
-                    
-                    return output.getvalue()
-        
-        # Fallback: download thumbnail from URL
-        if 'thumbnail' in video_info and video_info['thumbnail']:
-            import urllib.request
-            
-            thumb_url = video_info['thumbnail']
-            
-            # Download thumbnail
-            with urllib.request.urlopen(thumb_url, timeout=10) as response:
-                thumb_data = response.read()
-            
-            # Load and process
-            img = Image.open(io.BytesIO(thumb_data))
-            img.thumbnail((500, 500), Image.Resampling.LANCZOS)
-            
-            output = io.BytesIO()
-            if img.mode in ('RGBA', 'LA', 'P'):
-                img = img.convert('RGB')
-            img.save(output, format='JPEG', quality=85)
-            
-            return output.getvalue()
-        
-        return None
-        
-    except Exception:
-        return None
-
+    manager.add_listener(listener)
+    return manager.add(url, title).id
 
 
 def get_download_folder() -> str:
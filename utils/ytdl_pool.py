@@ -0,0 +1,215 @@
+"""
+Pool of long-lived yt-dlp instances shared by search and downloads
+
+Building a YoutubeDL parses options, loads extractors and sets up a fresh
+HTTP layer; reusing instances keeps cookies and keep-alive connections,
+so only the first search/download pays for setup and TLS handshakes.
+"""
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from config.settings import YTDL_POOL_IDLE
+
+_MISSING = object()
+
+SEARCH_OPTIONS = {
+    'quiet': True,
+    'no_warnings': True,
+    'extract_flat': True,  # Keep it fast
+    'default_search': 'ytsearch',
+}
+
+# Downloads fetch the audio stream and thumbnail only; the download manager runs ffmpeg itself
+DOWNLOAD_OPTIONS = {
+    'format': 'bestaudio/best',
+    'continuedl': True,  # Resume .part files left by an earlier run
+    'writethumbnail': True,  # Cover art, embedded by the conversion step
+    'noprogress': True,
+    'quiet': True,
+    'no_warnings': True,
+}
+
+# Extractors initialized ahead of the first use of each kind
+WARM_EXTRACTORS = {
+    "search": ("YoutubeSearch", "Youtube"),
+    "download": ("Youtube",),
+}
+PRECONNECT_URL = "https://www.youtube.com/"
+
+
+def _default_factory(options: dict):
+    import yt_dlp  # Heavy - loaded on first use
+    return yt_dlp.YoutubeDL(options)
+
+
+def _kind_options(kind: str) -> dict:
+    if kind == "search":
+        return dict(SEARCH_OPTIONS)
+    if kind == "download":
+        from utils.paths import find_ffmpeg
+        # Use my local ffmpeg (yt-dlp still needs it for container fixups)
+        return dict(DOWNLOAD_OPTIONS, ffmpeg_location=find_ffmpeg())
+    raise ValueError(f"Unknown yt-dlp pool: {kind}")
+
+
+class _Slot:
+    """One pooled instance plus the progress hook of whoever borrowed it."""
+
+    def __init__(self, ydl):
+        self.ydl = ydl
+        self.progress_hook = None
+
+    def dispatch(self, d: dict):
+        hook = self.progress_hook
+        if hook:
+            hook(d)
+
+
+class YDLPool:
+    """
+    Free list of YoutubeDL instances built from one set of options.
+
+    borrow() hands out an idle instance (or builds one - callers are never
+    blocked) with per-operation params applied, and restores them when
+    the instance comes back. At most `idle` instances are kept; extras
+    are closed. `factory(options)` builds an instance, so a local
+    stand-in extractor can replace yt-dlp.
+    """
+
+    def __init__(self, options: dict, idle: int = YTDL_POOL_IDLE,
+                 factory: Optional[Callable[[dict], object]] = None,
+                 warm_extractors=()):
+        self.options = options
+        self.idle = idle
+        self.factory = factory or _default_factory
+        self.warm_extractors = warm_extractors
+        self._free = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self.created = 0
+
+    def _create(self) -> _Slot:
+        slot = _Slot(self.factory(dict(self.options)))
+        # One permanent hook per instance; it forwards to the current borrower
+        if hasattr(slot.ydl, "add_progress_hook"):
+            slot.ydl.add_progress_hook(slot.dispatch)
+        for ie_key in self.warm_extractors:
+            try:
+                slot.ydl.get_info_extractor(ie_key)
+            except Exception:
+                pass
+        with self._lock:
+            self.created += 1
+        return slot
+
+    def _take(self) -> _Slot:
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+        return self._create()
+
+    def _give_back(self, slot: _Slot):
+        slot.progress_hook = None
+        with self._lock:
+            if not self._closed and len(self._free) < self.idle:
+                self._free.append(slot)
+                return
+        self._close_slot(slot)
+
+    @staticmethod
+    def _close_slot(slot: _Slot):
+        try:
+            slot.ydl.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def borrow(self, progress_hook: Optional[Callable[[dict], None]] = None, **params):
+        """
+        Borrow an instance for one operation:
+
+            with pool.borrow(outtmpl=path, progress_hook=hook) as ydl:
+                ydl.download([url])
+
+        `params` override the pooled options until the instance is returned.
+        """
+        slot = self._take()
+        ydl = slot.ydl
+        saved = {}
+        try:
+            for key, value in params.items():
+                saved[key] = ydl.params.get(key, _MISSING)
+                if key == 'outtmpl' and isinstance(value, str) and isinstance(saved[key], dict):
+                    value = dict(saved[key], default=value)  # yt-dlp keeps templates parsed
+                ydl.params[key] = value
+            slot.progress_hook = progress_hook
+            yield ydl
+        finally:
+            for key, value in saved.items():
+                if value is _MISSING:
+                    ydl.params.pop(key, None)
+                else:
+                    ydl.params[key] = value
+            self._give_back(slot)
+
+    def warm(self, count: int = 1, preconnect: Optional[str] = None) -> threading.Thread:
+        """Build up to `count` idle instances on a daemon thread (and open a connection)."""
+
+        def _run():
+            try:
+                slots = []
+                with self._lock:
+                    missing = count - len(self._free)
+                for _ in range(max(0, missing)):
+                    slots.append(self._create())
+                if preconnect and slots and hasattr(slots[0].ydl, "urlopen"):
+                    from yt_dlp.networking import Request
+                    slots[0].ydl.urlopen(Request(preconnect, method="HEAD")).close()
+                for slot in slots:
+                    self._give_back(slot)
+            except Exception as e:
+                print(f"Error warming yt-dlp: {e}")
+
+        thread = threading.Thread(target=_run, name="ytdl-warm", daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        """Close idle instances; borrowed ones are closed when returned."""
+        with self._lock:
+            self._closed = True
+            free, self._free = self._free, []
+        for slot in free:
+            self._close_slot(slot)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_factory = None
+
+
+def get_pool(kind: str) -> YDLPool:
+    """Process-wide pool for "search" or "download"."""
+    with _pools_lock:
+        pool = _pools.get(kind)
+        if pool is None:
+            pool = YDLPool(_kind_options(kind), factory=_factory,
+                           warm_extractors=WARM_EXTRACTORS.get(kind, ()))
+            _pools[kind] = pool
+        return pool
+
+
+def set_factory(factory: Optional[Callable[[dict], object]]):
+    """Swap the instance factory (None = yt-dlp) for all pools, e.g. for a stand-in extractor."""
+    global _factory
+    _factory = factory
+    close_pools()
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()